@@ -0,0 +1,342 @@
+import csv
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+ANALYTICS_PATH = os.getenv('ANALYTICS_PATH')
+SKETCH_ACCURACY = 0.01
+SKETCH_MAX_BUCKETS = 2048
+REPORT_QUANTILES = (0.5, 0.9, 0.99)
+REVIEW_STATUS = 'reviewing'
+APPROVED_STATUS = 'approved'
+REJECTED_STATUS = 'rejected'
+OPEN_REVIEW_TTL = 90 * 24 * 60 * 60
+DATE_UPDATED_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def updated_at(record, default=None):
+    """Время смены статуса из date_updated записи, иначе default."""
+    if not record.date_updated:
+        return default
+    try:
+        return datetime.strptime(
+            record.date_updated, DATE_UPDATED_FORMAT
+        ).replace(tzinfo=timezone.utc).timestamp()
+    except (TypeError, ValueError):
+        return default
+
+
+class QuantileSketch:
+    """Потоковые перцентили с относительной погрешностью accuracy.
+
+    Значения раскладываются по логарифмическим корзинам, как в DDSketch:
+    память зависит от разброса значений, а не от их числа. Когда корзин
+    больше max_buckets, младшие сливаются, теряя точность на самых
+    малых значениях.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY,
+                 max_buckets=SKETCH_MAX_BUCKETS):
+        """Пустой скетч с относительной погрешностью accuracy."""
+        self.accuracy = accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, value):
+        """Добавляет неотрицательное значение."""
+        self.count += 1
+        self.total += value
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, share):
+        """Значение перцентиля share (0..1) или None без данных."""
+        if not self.count:
+            return None
+        rank = share * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                return 2 * self._gamma ** index / (self._gamma + 1)
+        return self.max
+
+    def merge(self, other):
+        """Добавляет значения другого скетча той же точности."""
+        if other.accuracy != self.accuracy:
+            raise ValueError('Скетчи разной точности не объединяются')
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        while len(self.buckets) > self.max_buckets:
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        if other.max is not None:
+            self.max = (other.max if self.max is None
+                        else max(self.max, other.max))
+
+    def summary(self):
+        """Число значений, среднее, перцентили и максимум."""
+        summary = {'count': self.count}
+        if self.count:
+            summary['mean'] = round(self.total / self.count, 3)
+            for share in REPORT_QUANTILES:
+                summary[f'p{round(share * 100)}'] = round(
+                    self.quantile(share), 3
+                )
+            summary['max'] = round(self.max, 3)
+        return summary
+
+    def to_dict(self):
+        """Состояние скетча для записи в JSON."""
+        return {
+            'accuracy': self.accuracy, 'max_buckets': self.max_buckets,
+            'buckets': [[index, count]
+                        for index, count in self.buckets.items()],
+            'zeros': self.zeros, 'count': self.count,
+            'total': self.total, 'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Скетч из состояния to_dict."""
+        sketch = cls(data['accuracy'], data['max_buckets'])
+        sketch.buckets = {index: count for index, count in data['buckets']}
+        sketch.zeros = data['zeros']
+        sketch.count = data['count']
+        sketch.total = data['total']
+        sketch.max = data['max']
+        return sketch
+
+
+class ReviewAnalytics:
+    """Статистика проверки работ, обновляемая по каждой смене статуса.
+
+    Считает переходы между статусами, время на ревью (от reviewing
+    до вердикта), полное время до принятия (от первой отправки на ревью
+    до approved) и число отклонений до принятия. Хранятся только
+    агрегаты и начало ревью работ, которые ещё не приняты, поэтому
+    отчёт не требует перечитывать историю. Незакрытые проверки старше
+    open_ttl секунд от последней смены статуса выбрасываются при
+    сохранении и слиянии и учитываются в expired_reviews. С path
+    агрегаты периодически сбрасываются в файл через flush.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY, path=None,
+                 open_ttl=OPEN_REVIEW_TTL):
+        """Пустые агрегаты; path - файл для flush, open_ttl - в секундах."""
+        self.path = path
+        self.open_ttl = open_ttl
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.transitions = Counter()
+        self.review_seconds = QuantileSketch(accuracy)
+        self.turnaround_seconds = QuantileSketch(accuracy)
+        self.rejections_before_approval = Counter()
+        self._in_review = {}
+        self._open = {}
+        self.expired_reviews = 0
+        self._latest = 0
+
+    def _expire_locked(self):
+        cutoff = self._latest - self.open_ttl
+        open_reviews = {
+            key: started for key, started in self._open.items()
+            if started[0] >= cutoff
+        }
+        self.expired_reviews += len(self._open) - len(open_reviews)
+        self._open = open_reviews
+        self._in_review = {
+            key: started for key, started in self._in_review.items()
+            if started >= cutoff
+        }
+
+    def observe(self, tenant_id, homework_name, old_status, new_status,
+                observed_at=None):
+        """Учитывает смену статуса работы."""
+        observed_at = time.time() if observed_at is None else observed_at
+        key = f'{tenant_id}:{homework_name}'
+        with self._lock:
+            self._dirty = True
+            self._latest = max(self._latest, observed_at)
+            self.transitions[f'{old_status}->{new_status}'] += 1
+            review_started = self._in_review.pop(key, None)
+            if review_started is not None:
+                self.review_seconds.add(observed_at - review_started)
+            if new_status == REVIEW_STATUS:
+                self._in_review[key] = observed_at
+                self._open.setdefault(key, [observed_at, 0])
+            elif new_status == REJECTED_STATUS and key in self._open:
+                self._open[key][1] += 1
+            elif new_status == APPROVED_STATUS and key in self._open:
+                first_review, rejections = self._open.pop(key)
+                self.turnaround_seconds.add(observed_at - first_review)
+                self.rejections_before_approval[rejections] += 1
+
+    def observe_records(self, tenant_id, records, last_statuses,
+                        observed_at=None):
+        """Учитывает записи Homework, сменившие статус после last_statuses.
+
+        Время смены берётся из date_updated записи: время опроса отстаёт
+        от него на период опроса. observed_at - для записей без даты.
+        """
+        for record in records:
+            self.observe(tenant_id, record.homework_name,
+                         last_statuses.get(record.homework_name),
+                         record.status, updated_at(record, observed_at))
+
+    def observe_transitions(self, transitions):
+        """Учитывает смены статусов из журнала событий."""
+        for transition in transitions:
+            self.observe(transition.tenant_id, transition.homework_name,
+                         transition.old_status, transition.new_status,
+                         transition.updated_at)
+
+    def report(self):
+        """Сводка для выгрузки."""
+        with self._lock:
+            return {
+                'transitions': dict(self.transitions.most_common()),
+                'review_seconds': self.review_seconds.summary(),
+                'turnaround_seconds': self.turnaround_seconds.summary(),
+                'rejections_before_approval': {
+                    str(rejections): works for rejections, works
+                    in sorted(self.rejections_before_approval.items())
+                },
+                'in_review': len(self._in_review),
+                'expired_reviews': self.expired_reviews,
+            }
+
+    def stats(self):
+        """Числовые показатели для /metrics."""
+        report = self.report()
+        stats = {'in_review': report['in_review'],
+                 'expired_reviews': report['expired_reviews']}
+        for name in ('review_seconds', 'turnaround_seconds'):
+            for key, value in report[name].items():
+                stats[f'{name}_{key}'] = value
+        return stats
+
+    def write_json(self, report_file):
+        """Выгрузка сводки в JSON."""
+        json.dump(self.report(), report_file, ensure_ascii=False, indent=2)
+        report_file.write('\n')
+
+    def write_csv(self, report_file):
+        """Выгрузка сводки в CSV: раздел, ключ, значение."""
+        writer = csv.writer(report_file)
+        writer.writerow(('section', 'key', 'value'))
+        for section, values in self.report().items():
+            if isinstance(values, dict):
+                for key, value in values.items():
+                    writer.writerow((section, key, value))
+            else:
+                writer.writerow((section, '', values))
+
+    def to_dict(self):
+        """Агрегаты и незакрытые проверки для записи в JSON."""
+        with self._lock:
+            return {
+                'transitions': dict(self.transitions),
+                'review_seconds': self.review_seconds.to_dict(),
+                'turnaround_seconds': self.turnaround_seconds.to_dict(),
+                'rejections_before_approval': [
+                    [rejections, works] for rejections, works
+                    in self.rejections_before_approval.items()
+                ],
+                'in_review': self._in_review,
+                'open': self._open,
+                'expired_reviews': self.expired_reviews,
+                'latest': self._latest,
+            }
+
+    @classmethod
+    def from_dict(cls, data, path=None):
+        """Статистика из состояния to_dict."""
+        analytics = cls(path=path)
+        analytics.transitions.update(data['transitions'])
+        analytics.review_seconds = QuantileSketch.from_dict(
+            data['review_seconds']
+        )
+        analytics.turnaround_seconds = QuantileSketch.from_dict(
+            data['turnaround_seconds']
+        )
+        analytics.rejections_before_approval.update(
+            dict(data['rejections_before_approval'])
+        )
+        analytics._in_review = data['in_review']
+        analytics._open = data['open']
+        analytics.expired_reviews = data.get('expired_reviews', 0)
+        analytics._latest = data.get('latest', 0)
+        return analytics
+
+    def merge(self, other):
+        """Добавляет агрегаты другого процесса, например другой доли."""
+        with self._lock:
+            self._dirty = True
+            self.transitions.update(other.transitions)
+            self.review_seconds.merge(other.review_seconds)
+            self.turnaround_seconds.merge(other.turnaround_seconds)
+            self.rejections_before_approval.update(
+                other.rejections_before_approval
+            )
+            self._in_review.update(other._in_review)
+            self._open.update(other._open)
+            self.expired_reviews += other.expired_reviews
+            self._latest = max(self._latest, other._latest)
+            self._expire_locked()
+
+    def save(self, path=None):
+        """Сохраняет агрегаты в файл, подменяя его целиком."""
+        path = self.path if path is None else path
+        with self._lock:
+            self._dirty = False
+            self._expire_locked()
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w', encoding='UTF-8') as snapshot:
+            json.dump(self.to_dict(), snapshot, separators=(',', ':'))
+        os.replace(temporary_path, path)
+
+    def flush(self):
+        """Сохраняет агрегаты в path, если они изменились с прошлого раза."""
+        if self.path and self._dirty:
+            self.save()
+
+
+def shard_path(path, shard):
+    """Файл агрегатов процесса shard: analytics-1.json для analytics.json."""
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f'{root}-{shard}{extension}'
+
+
+def open_analytics(path=ANALYTICS_PATH):
+    """Агрегаты из файла path, новые, если файла нет; None без пути."""
+    if not path:
+        return None
+    if not os.path.exists(path):
+        return ReviewAnalytics(path=path)
+    with open(path, encoding='UTF-8') as snapshot:
+        return ReviewAnalytics.from_dict(json.load(snapshot), path)
@@ -0,0 +1,86 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from homework import make_headers, request_api_answer
+from http_pool import HTTP_POOL_SIZE
+from streaming import HomeworkStream
+from validation import (changed_records, validate_homework_statuses,
+                        validate_homework_stream)
+
+BACKFILL_WORKERS = int(os.getenv('BACKFILL_WORKERS', HTTP_POOL_SIZE))
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_history(tenant, from_date=0, stream=True):
+    """История работ подписчика с from_date: (current_date, статусы)."""
+    response = request_api_answer(
+        from_date, make_headers(tenant.practicum_token), stream=stream
+    )
+    if isinstance(response, HomeworkStream):
+        try:
+            records = changed_records(
+                validate_homework_stream(response, strict=False), {}
+            )
+        finally:
+            response.close()
+        current_date = response.current_date
+    else:
+        current_date, records = validate_homework_statuses(
+            response, strict=False
+        )
+        records = changed_records(records, {})
+    return current_date, {
+        record.homework_name: record.status for record in records
+    }
+
+
+def backfill(tenants, state_store, from_date=0, workers=BACKFILL_WORKERS,
+             force=False, stream=True):
+    """Загружает текущие статусы работ подписчиков в хранилище состояния.
+
+    Истории подписчиков запрашиваются параллельно пулом из workers потоков,
+    а сливаются в хранилище в вызывающем потоке по мере готовности.
+    Уведомления не отправляются: после загрузки опрос сообщает только
+    о новых изменениях. Подписчики с уже сохранённым курсором пропускаются,
+    если не задан force. Возвращает сводку с пропускной способностью.
+    """
+    started = time.perf_counter()
+    tenants = list(tenants)
+    pending = [
+        tenant for tenant in tenants
+        if force or state_store.load_cursor(tenant.tenant_id) is None
+    ]
+    report = {'tenants': 0, 'failed': 0, 'homeworks': 0}
+    with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='backfill') as executor:
+        futures = {
+            executor.submit(fetch_history, tenant, from_date, stream): tenant
+            for tenant in pending
+        }
+        for future in as_completed(futures):
+            tenant_id = futures[future].tenant_id
+            try:
+                current_date, statuses = future.result()
+            except Exception as error:
+                message = (f'Подписчик {tenant_id}: '
+                           f'история не загружена: {error}')
+                logger.error(message, extra={
+                    'tenant': tenant_id, 'error_class': type(error).__name__
+                })
+                report['failed'] += 1
+                continue
+            state_store.save(
+                tenant_id, current_date or int(time.time()), statuses
+            )
+            report['tenants'] += 1
+            report['homeworks'] += len(statuses)
+    state_store.flush()
+    elapsed = time.perf_counter() - started
+    report['skipped'] = len(tenants) - len(pending)
+    report['seconds'] = round(elapsed, 3)
+    report['tenants_per_sec'] = round(report['tenants'] / elapsed, 1)
+    logger.info(f'Загрузка истории завершена: {report}')
+    return report
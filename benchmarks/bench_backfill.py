@@ -0,0 +1,69 @@
+"""Бенчмарк загрузки истории работ (engine.py backfill).
+
+API Практикума подменяется локальным сервером с задержкой ответа, как
+у настоящего API. Сравнивается последовательная загрузка (один поток)
+с параллельной для заданного числа подписчиков.
+
+    python benchmarks/bench_backfill.py --tenants 200 --workers 1 10
+"""
+import argparse
+import time
+
+import utils
+import homework
+from backfill import backfill
+from state_store import MemoryStateStore
+from tenants import Tenant
+
+
+class HistoryHandler(utils.JSONHandler):
+    """API с историей из history работ и задержкой latency секунд."""
+
+    history = 30
+    latency = 0.05
+
+    def do_GET(self):
+        """Полная история работ подписчика после задержки."""
+        time.sleep(self.latency)
+        token = self.headers.get('Authorization', '')[-8:]
+        self.send_json({
+            'homeworks': [
+                {
+                    'id': number,
+                    'homework_name': f'{token}__hw{number:02d}.zip',
+                    'status': 'approved',
+                    'date_updated': f'2023-01-{number % 28 + 1:02d}T10:00Z',
+                }
+                for number in range(self.history)
+            ],
+            'current_date': int(time.time()),
+        })
+
+
+def main():
+    """Замер загрузки истории при разном числе потоков."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--output')
+    arguments = parser.parse_args()
+    HistoryHandler.latency = arguments.latency
+    tenants = [
+        Tenant(number, f'token-{number:08d}', str(number))
+        for number in range(1, arguments.tenants + 1)
+    ]
+    scenarios = []
+    with utils.LocalServer(HistoryHandler) as practicum:
+        homework.ENDPOINT = (
+            f'{practicum.url}/api/user_api/homework_statuses/'
+        )
+        for workers in arguments.workers:
+            report = backfill(tenants, MemoryStateStore(), workers=workers)
+            scenarios.append({'workers': workers, **report})
+    utils.write_report(scenarios, arguments.output, benchmark='backfill',
+                       latency=arguments.latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Бенчмарк цикла опрос -> разбор -> уведомление.
+
+API Практикума и Bot API подменяются локальными HTTP-серверами, бот
+работает через настоящий HTTP-стек. Для каждого числа подписчиков
+измеряются пропускная способность (опросов в секунду), p50/p99 длительности
+цикла подписчика и каждого этапа, а также память на подписчика.
+
+    python benchmarks/bench_cycle.py --tenants 1 100 10000 --output report.json
+"""
+import argparse
+import time
+import tracemalloc
+
+from telegram import Bot
+
+import utils
+import engine
+import homework
+from http_pool import get_session
+from state_store import MemoryStateStore
+from templates import Catalog
+from tenants import Tenant
+
+STAGES = {
+    'get_api_answer': (engine, 'request_api_answer'),
+    'validate': (engine, 'validate_homework_statuses'),
+    'render': (Catalog, 'render'),
+    'send_message': (engine, 'send_chat_message'),
+}
+
+
+class StaticRegistry:
+    """Реестр подписчиков в памяти: без записи на диск при заполнении."""
+
+    def __init__(self, count):
+        """Реестр из count подписчиков с номерами от 1."""
+        self._tenants = [
+            Tenant(number, f'token-{number:08d}', str(number))
+            for number in range(1, count + 1)
+        ]
+
+    def tenants(self):
+        """Все подписчики."""
+        return self._tenants
+
+
+def instrument(timings):
+    """Подменяет функции этапов обёртками с замером времени."""
+    originals = {}
+    for stage, (owner, name) in STAGES.items():
+        original = getattr(owner, name)
+        originals[owner, name] = original
+
+        def timed(*args, _original=original, _stage=stage, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                timings[_stage].append(time.perf_counter() - started)
+
+        setattr(owner, name, timed)
+    return originals
+
+
+def build_engine(count, bot):
+    """Движок на count подписчиков с расписанием на первый раунд."""
+    polling_engine = engine.PollingEngine(
+        StaticRegistry(count), bot, state_store=MemoryStateStore()
+    )
+    polling_engine.refresh(0)
+    return polling_engine
+
+
+def measure_memory(count, bot):
+    """Память на подписчика после первого полного раунда опроса."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    polling_engine = build_engine(count, bot)
+    polling_engine.run_round(10 ** 10)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del polling_engine
+    return allocated / count
+
+
+def run_scenario(count, rounds, bot):
+    """Замер rounds раундов опроса count подписчиков по этапам."""
+    timings = {stage: [] for stage in STAGES}
+    cycles = []
+    originals = instrument(timings)
+    polling_engine = build_engine(count, bot)
+    poll_tenant = polling_engine.poll_tenant
+
+    def timed_poll(cursor):
+        started = time.perf_counter()
+        try:
+            return poll_tenant(cursor)
+        finally:
+            cycles.append(time.perf_counter() - started)
+
+    polling_engine.poll_tenant = timed_poll
+    connections_before = get_session().connection_stats()
+    started = time.perf_counter()
+    polls = 0
+    for number in range(1, rounds + 1):
+        polls += polling_engine.run_round(number * 10 ** 10)
+    elapsed = time.perf_counter() - started
+    for (owner, name), original in originals.items():
+        setattr(owner, name, original)
+    return {
+        'tenants': count,
+        'rounds': rounds,
+        'polls': polls,
+        'seconds': round(elapsed, 3),
+        'polls_per_sec': round(polls / elapsed, 1),
+        'cycle': utils.summarize(cycles),
+        'stages': {
+            stage: utils.summarize(durations)
+            for stage, durations in timings.items()
+        },
+        'response_cache': polling_engine.response_cache.stats(),
+        'connections': {
+            name: value - connections_before[name]
+            for name, value in get_session().connection_stats().items()
+        },
+        'memory_per_tenant_bytes': round(measure_memory(count, bot)),
+    }
+
+
+def main():
+    """Замер цикла опроса для разного числа подписчиков."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, nargs='+',
+                        default=[1, 100, 10000])
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--output')
+    arguments = parser.parse_args()
+    with utils.LocalServer(utils.PracticumHandler) as practicum, \
+            utils.LocalServer(utils.TelegramHandler) as telegram_api:
+        homework.ENDPOINT = (
+            f'{practicum.url}/api/user_api/homework_statuses/'
+        )
+        bot = Bot(token='1234:abcdefg', base_url=f'{telegram_api.url}/bot')
+        scenarios = [
+            run_scenario(count, arguments.rounds, bot)
+            for count in arguments.tenants
+        ]
+    utils.write_report(scenarios, arguments.output, benchmark='cycle')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Бенчмарк холодного старта: время импорта модулей бота.
+
+Каждый модуль импортируется в новом интерпретаторе с -X importtime,
+из вывода берётся суммарное время импорта модуля со всеми зависимостями
+и самые тяжёлые прямые импорты. Медиана сравнивается с бюджетом;
+с --check превышение бюджета завершает бенчмарк с кодом 1.
+
+    python benchmarks/bench_import.py --modules homework engine --check
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import utils
+
+IMPORT_BUDGETS_MS = {
+    'homework': float(os.getenv('IMPORT_BUDGET_MS', 100)),
+    'validation': float(os.getenv('IMPORT_BUDGET_MS', 100)),
+    'engine': float(os.getenv('IMPORT_BUDGET_MS', 100)),
+}
+SLOWEST_IMPORTS = 5
+
+
+def parse_importtime(stderr):
+    """Строки -X importtime: (глубина, модуль, суммарно мкс)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(cumulative)))
+    return rows
+
+
+def import_once(module):
+    """Импорт module в новом процессе: время импорта, старта и импорты."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=utils.BASE_DIR, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+    rows = parse_importtime(result.stderr)
+    index, total = next(
+        (index, cumulative)
+        for index, (depth, name, cumulative) in enumerate(rows)
+        if depth == 0 and name == module
+    )
+    start = index
+    while start > 0 and rows[start - 1][0] > 0:
+        start -= 1
+    children = [
+        (name, cumulative) for depth, name, cumulative in rows[start:index]
+        if depth == 1
+    ]
+    return total / 1000, wall * 1000, children
+
+
+def measure(module, repeat):
+    """Медианы времени импорта module за repeat запусков."""
+    imports, walls, slowest = [], [], {}
+    for _ in range(repeat):
+        import_ms, wall_ms, children = import_once(module)
+        imports.append(import_ms)
+        walls.append(wall_ms)
+        for name, cumulative in children:
+            slowest.setdefault(name, []).append(cumulative / 1000)
+    import_ms = statistics.median(imports)
+    budget_ms = IMPORT_BUDGETS_MS.get(module)
+    return {
+        'module': module,
+        'import_ms': round(import_ms, 2),
+        'process_ms': round(statistics.median(walls), 2),
+        'budget_ms': budget_ms,
+        'within_budget': budget_ms is None or import_ms <= budget_ms,
+        'slowest_imports': {
+            name: round(statistics.median(values), 2)
+            for name, values in sorted(
+                slowest.items(), key=lambda item: -statistics.median(item[1])
+            )[:SLOWEST_IMPORTS]
+        },
+    }
+
+
+def main():
+    """Замер импорта модулей и проверка бюджетов."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+',
+                        default=['homework', 'validation', 'engine'])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--check', action='store_true')
+    parser.add_argument('--output')
+    arguments = parser.parse_args()
+    scenarios = [
+        measure(module, arguments.repeat) for module in arguments.modules
+    ]
+    utils.write_report(scenarios, arguments.output, benchmark='import')
+    if arguments.check and not all(
+            scenario['within_budget'] for scenario in scenarios):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
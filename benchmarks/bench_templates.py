@@ -0,0 +1,83 @@
+"""Бенчмарк текстов уведомлений для пачки изменившихся работ.
+
+Сравнивает сборку сообщений пачки: f-строкой render_verdict без кеша,
+str.format по шаблону из настроек на каждое сообщение и скомпилированным
+Catalog.render из реестра шаблонов.
+
+    python benchmarks/bench_templates.py --batch 10 100 1000
+"""
+import argparse
+import time
+
+import utils
+from homework import HOMEWORK_VERDICTS, render_verdict
+from templates import DEFAULT_TEMPLATES, TemplateRegistry
+
+MESSAGE = DEFAULT_TEMPLATES['locales']['ru']['message']
+
+
+def make_batch(size):
+    """Пачка из size пар имя работы - статус."""
+    statuses = list(HOMEWORK_VERDICTS)
+    return [(f'student{number}__hw{number % 20:02d}.zip',
+             statuses[number % len(statuses)]) for number in range(size)]
+
+
+def fstring_path(batch):
+    """Сообщения f-строкой без кеша."""
+    render = render_verdict.__wrapped__
+    return [render(name, status) for name, status in batch]
+
+
+def format_path(batch):
+    """Сообщения через str.format шаблона."""
+    return [MESSAGE.format(homework_name=name, status=status,
+                           verdict=HOMEWORK_VERDICTS[status])
+            for name, status in batch]
+
+
+def compiled_path(batch, catalog=TemplateRegistry().catalog()):
+    """Сообщения из скомпилированного каталога."""
+    render = catalog.render
+    return [render(name, status) for name, status in batch]
+
+
+def measure(function, batch, repeat):
+    """Время function на пачке batch за repeat запусков."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(batch)
+        durations.append(time.perf_counter() - started)
+    summary = utils.summarize(durations)
+    summary['messages_per_sec'] = round(
+        len(batch) / utils.percentile(durations, 0.5)
+    )
+    return summary
+
+
+def main():
+    """Сравнение способов сборки сообщений."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output')
+    arguments = parser.parse_args()
+    scenarios = []
+    for size in arguments.batch:
+        batch = make_batch(size)
+        assert fstring_path(batch) == format_path(batch) == (
+            compiled_path(batch)
+        )
+        scenarios.append({
+            'batch': size,
+            'render_verdict': measure(fstring_path, batch, arguments.repeat),
+            'str.format': measure(format_path, batch, arguments.repeat),
+            'templates': measure(compiled_path, batch, arguments.repeat),
+        })
+    utils.write_report(scenarios, arguments.output, benchmark='templates')
+
+
+if __name__ == '__main__':
+    main()
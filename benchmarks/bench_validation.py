@@ -0,0 +1,95 @@
+"""Микро-бенчмарк проверки ответа homework_statuses.
+
+Сравнивает стоимость разбора одного ответа: check_response + parse_status
+по каждой работе против скомпилированного validate_homework_statuses с
+Catalog.render_records из реестра шаблонов. Ответ содержит сотни работ,
+как у ревьюера или при первом запросе с from_date=0.
+
+    python benchmarks/bench_validation.py --homeworks 100 500 1000
+"""
+import argparse
+import sys
+import time
+
+import utils
+from homework import HOMEWORK_VERDICTS, check_response, parse_status
+from templates import TemplateRegistry
+from validation import validate_homework_statuses
+
+
+def make_response(count):
+    """Ответ API с count работами."""
+    statuses = list(HOMEWORK_VERDICTS)
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'student{number}__hw{number % 20:02d}.zip',
+                'status': statuses[number % len(statuses)],
+                'reviewer_comment': 'Замечаний нет.',
+                'lesson_name': f'Спринт {number % 20}',
+                'date_updated': f'2023-01-{number % 28 + 1:02d}T10:00:00Z',
+            }
+            for number in range(count)
+        ],
+        'current_date': 1672531200,
+    }
+
+
+def dict_path(response):
+    """Проверка ответа по словарям: check_response и parse_status."""
+    return [parse_status(homework) for homework in check_response(response)]
+
+
+def compiled_path(response, catalog=TemplateRegistry().catalog()):
+    """Проверка ответа в записи Homework и сообщения из каталога."""
+    _, records = validate_homework_statuses(response)
+    return catalog.render_records(records)
+
+
+def measure(function, response, repeat):
+    """Время function на ответе response за repeat запусков."""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(response)
+        durations.append(time.perf_counter() - started)
+    return utils.summarize(durations)
+
+
+def bytes_per_homework(response):
+    """Размер одной работы: словарь из JSON против записи Homework."""
+    _, records = validate_homework_statuses(response)
+    return {
+        'dict': sys.getsizeof(response['homeworks'][0]),
+        'record': sys.getsizeof(records[0]),
+    }
+
+
+def main():
+    """Сравнение способов проверки ответа API."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--homeworks', type=int, nargs='+',
+                        default=[100, 500, 1000])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--output')
+    arguments = parser.parse_args()
+    scenarios = []
+    for count in arguments.homeworks:
+        response = make_response(count)
+        assert dict_path(response) == compiled_path(response)
+        scenarios.append({
+            'homeworks': count,
+            'check_response+parse_status': measure(
+                dict_path, response, arguments.repeat
+            ),
+            'validate_homework_statuses': measure(
+                compiled_path, response, arguments.repeat
+            ),
+            'bytes_per_homework': bytes_per_homework(response),
+        })
+    utils.write_report(scenarios, arguments.output, benchmark='validation')
+
+
+if __name__ == '__main__':
+    main()
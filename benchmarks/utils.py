@@ -0,0 +1,152 @@
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault('PRACTICUM_TOKEN', 'sometoken')
+os.environ.setdefault('TELEGRAM_TOKEN', '1234:abcdefg')
+os.environ.setdefault('TELEGRAM_CHAT_ID', '12345')
+
+
+def percentile(values, share):
+    """Перцентиль share (0..1) по отсортированной выборке."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(durations):
+    """Сводка длительностей в миллисекундах."""
+    return {
+        'calls': len(durations),
+        'p50_ms': round(percentile(durations, 0.5) * 1000, 4),
+        'p99_ms': round(percentile(durations, 0.99) * 1000, 4),
+    } if durations else {'calls': 0}
+
+
+def write_report(scenarios, output=None, **extra):
+    """Машиночитаемый отчёт: в файл output или в stdout."""
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': int(time.time()),
+        **extra,
+        'scenarios': scenarios,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output:
+        with open(output, 'w', encoding='UTF-8') as report_file:
+            report_file.write(text + '\n')
+    else:
+        print(text)
+    return report
+
+
+class LocalServer:
+    """HTTP-сервер в фоновом потоке на свободном порту."""
+
+    def __init__(self, handler):
+        """Сервер с обработчиком handler, ещё не запущенный."""
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+
+    @property
+    def url(self):
+        """Адрес сервера."""
+        return f'http://127.0.0.1:{self.server.server_address[1]}'
+
+    def __enter__(self):
+        """Запускает сервер."""
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        """Останавливает сервер и закрывает сокет."""
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Обработчик с ответами JSON по keep-alive соединению."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def send_json(self, data, status=200):
+        """Ответ status с телом data в JSON."""
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Запросы не пишутся в stderr."""
+        pass
+
+
+class PracticumHandler(JSONHandler):
+    """Заменитель API Практикума.
+
+    Каждый change_every-й запрос подписчика (со сдвигом по токену)
+    возвращает работу с новым статусом, остальные - пустой список работ.
+    """
+
+    change_every = 10
+    statuses = ('reviewing', 'approved', 'rejected')
+    counters = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        """Ответ со статусами работ подписчика."""
+        token = self.headers.get('Authorization', '')
+        with self.lock:
+            count = self.counters.get(token, 0) + 1
+            self.counters[token] = count
+        homeworks = []
+        if (count + zlib.crc32(token.encode())) % self.change_every == 0:
+            homeworks.append({
+                'id': 1,
+                'homework_name': f'{token[-8:]}__hw.zip',
+                'status': self.statuses[count // self.change_every % 3],
+                'lesson_name': 'Итоговый проект',
+                'reviewer_comment': '',
+                'date_updated': '2023-05-22T10:00:00Z',
+            })
+        self.send_json({
+            'homeworks': homeworks, 'current_date': int(time.time())
+        })
+
+
+class TelegramHandler(JSONHandler):
+    """Заменитель Bot API: принимает sendMessage и отвечает успехом."""
+
+    message_id = 0
+
+    def do_POST(self):
+        """Успешный ответ sendMessage."""
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        TelegramHandler.message_id += 1
+        self.send_json({'ok': True, 'result': {
+            'message_id': TelegramHandler.message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(payload.get('chat_id', 0)),
+                     'type': 'private'},
+            'text': payload.get('text', ''),
+        }})
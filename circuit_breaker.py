@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+from exceptions_api_answer import CircuitOpenError
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', 60))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    """Предохранитель запросов к API, общий для всех подписчиков.
+
+    В закрытом состоянии запросы идут как обычно. После failure_threshold
+    сбоев подряд (ошибка соединения или ответ 5xx) он размыкается, и
+    запросы сразу завершаются CircuitOpenError. Через recovery_timeout
+    пропускается один пробный запрос: успех замыкает предохранитель,
+    сбой размыкает его ещё на recovery_timeout. Ошибки конкретного
+    подписчика (401, 400) сбоем сервиса не считаются.
+    """
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+                 recovery_timeout=CIRCUIT_RECOVERY_TIMEOUT,
+                 clock=time.monotonic):
+        """Замкнутый предохранитель без сбоев."""
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = None
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Разрешение на запрос; CircuitOpenError, если запрос не нужен."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = self.clock()
+            probe_allowed = (
+                now - self._opened_at >= self.recovery_timeout
+                if self.state == OPEN
+                else now - self._probe_started_at >= self.recovery_timeout
+            )
+            if not probe_allowed:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    'API Практикума недоступно, запрос отложен'
+                )
+            self.state = HALF_OPEN
+            self._probe_started_at = now
+
+    def record_success(self):
+        """Запрос дошёл до сервиса: предохранитель замыкается."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """Сбой сервиса: при достижении порога предохранитель размыкается."""
+        with self._lock:
+            self.failures += 1
+            if self.state == OPEN:
+                return
+            if (self.state == HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened += 1
+                self._opened_at = self.clock()
+
+    def reset(self):
+        """Замыкает предохранитель: сбои прежнего адреса API не в счёт."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._opened_at = None
+            self._probe_started_at = None
+
+    def stats(self):
+        """Состояние предохранителя для мониторинга."""
+        return {
+            'state': STATE_CODES[self.state],
+            'failures': self.failures,
+            'opened': self.opened,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,131 @@
+import logging
+
+from exceptions_api_answer import TokenOwnedError
+from templates import load_templates
+
+COMMAND_WORKERS = 4
+NOT_SUBSCRIBED = ('Чат не подписан. Отправьте /subscribe <токен Практикума>, '
+                  'чтобы получать статусы проверки работ.')
+TOKEN_OWNED = ('Этот токен уже подписан в другом чате. Отпишите его там '
+               'или обратитесь к администратору бота.')
+
+logger = logging.getLogger(__name__)
+
+
+class CommandInterface:
+    """Команды бота в Telegram: /status, /subscribe, /pause и /resume.
+
+    Ответы собираются из реестра подписок и хранилища состояния, которые
+    уже ведёт цикл опроса, поэтому команда не запрашивает API Практикума
+    и отвечает за миллисекунды. on_change вызывается после изменения
+    подписок, чтобы цикл опроса перечитал реестр, не дожидаясь срока.
+    """
+
+    def __init__(self, registry, state_store, on_change=None,
+                 templates=None):
+        """Команды поверх реестра подписок и хранилища состояния."""
+        self.registry = registry
+        self.state_store = state_store
+        self.on_change = on_change
+        self.templates = load_templates() if templates is None else templates
+        self.commands = {
+            'status': self.status,
+            'subscribe': self.subscribe,
+            'pause': self.pause,
+            'resume': self.resume,
+        }
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def status(self, chat_id, args=()):
+        """Последние известные статусы работ подписок чата."""
+        tenants = self.registry.by_chat(chat_id)
+        if not tenants:
+            return NOT_SUBSCRIBED
+        blocks = []
+        for tenant in tenants:
+            title = f'Подписка {tenant.tenant_id}'
+            if tenant.paused:
+                title += ' (приостановлена)'
+            statuses = self.state_store.statuses(tenant.tenant_id)
+            lines = [
+                f'{name}: {self.templates.verdict(status, tenant.tenant_id)}'
+                for name, status in sorted(statuses.items())
+            ] or ['Статусов работ пока нет.']
+            blocks.append('\n'.join([f'{title}:'] + lines))
+        return '\n\n'.join(blocks)
+
+    def subscribe(self, chat_id, args=()):
+        """Подписывает чат на статусы работ по токену Практикума."""
+        if len(args) != 1:
+            return 'Использование: /subscribe <токен Практикума>'
+        try:
+            tenant = self.registry.subscribe(args[0], chat_id)
+        except TokenOwnedError:
+            logger.warning(f'Чат {chat_id} пытался подписаться на токен '
+                           f'другого чата.')
+            return TOKEN_OWNED
+        self._changed()
+        return f'Подписка {tenant.tenant_id} оформлена.'
+
+    def _set_paused(self, chat_id, paused):
+        tenants = self.registry.by_chat(chat_id)
+        for tenant in tenants:
+            self.registry.set_paused(tenant.tenant_id, paused)
+        if tenants:
+            self._changed()
+        return bool(tenants)
+
+    def pause(self, chat_id, args=()):
+        """Приостанавливает опрос подписок чата."""
+        if not self._set_paused(chat_id, True):
+            return NOT_SUBSCRIBED
+        return 'Уведомления приостановлены. /resume - возобновить.'
+
+    def resume(self, chat_id, args=()):
+        """Возобновляет опрос подписок чата."""
+        if not self._set_paused(chat_id, False):
+            return NOT_SUBSCRIBED
+        return 'Уведомления возобновлены.'
+
+    def handle(self, command, chat_id, args=()):
+        """Ответ на команду чата."""
+        return self.commands[command](str(chat_id), args)
+
+    def _callback(self, update, context):
+        from telegram import TelegramError
+        message = update.effective_message
+        command = message.text.split()[0].lstrip('/').split('@')[0]
+        reply = self.handle(command, message.chat_id, context.args or ())
+        if command == 'subscribe' and context.args:
+            try:
+                message.delete()
+            except TelegramError as error:
+                logger.debug(f'Сообщение с токеном не удалено: {error}')
+        context.bot.send_message(message.chat_id, reply)
+
+    def start(self, token, workers=COMMAND_WORKERS):
+        """Long polling команд в фоновых потоках, возвращает Updater."""
+        from telegram.ext import CommandHandler, Updater
+        updater = Updater(token=token, workers=workers, use_context=True)
+        for command in self.commands:
+            updater.dispatcher.add_handler(
+                CommandHandler(command, self._callback)
+            )
+        updater.start_polling(drop_pending_updates=True)
+        logger.debug(f'Команды бота: {", ".join(self.commands)}')
+        return updater
+
+
+def start_command_interface(engine, token):
+    """Команды бота рядом с работающим циклом опроса engine."""
+    interface = CommandInterface(
+        engine.registry, engine.state_store, engine.request_refresh,
+        engine.templates
+    )
+    engine.on_settings.append(
+        lambda engine: setattr(interface, 'templates', engine.templates)
+    )
+    return interface.start(token)
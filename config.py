@@ -0,0 +1,275 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from dataclasses import dataclass, fields
+
+from templates import TemplateRegistry, merge_templates
+
+CONFIG_PATH = os.getenv('CONFIG_PATH')
+CONFIG_POLL_INTERVAL = 1.0
+PERIOD_SETTINGS = (
+    'retry_period', 'reviewing_period', 'idle_period', 'refresh_period'
+)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+INOTIFY_EVENT = struct.Struct('iIII')
+INOTIFY_BUFFER_SIZE = 65536
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Настройки из файла, которые меняются без перезапуска.
+
+    None - настройка в файле не задана, действует значение при запуске.
+    chat_id действует только в одиночном режиме homework.main: в движке
+    чаты задаёт реестр подписчиков.
+    """
+
+    retry_period: float = None
+    reviewing_period: float = None
+    idle_period: float = None
+    refresh_period: float = None
+    endpoint: str = None
+    chat_id: str = None
+    templates: TemplateRegistry = None
+
+    def overrides(self):
+        """Заданные в файле настройки."""
+        return {
+            field.name: getattr(self, field.name) for field in fields(self)
+            if getattr(self, field.name) is not None
+        }
+
+
+def _parse_period(name, value):
+    if (isinstance(value, bool) or not isinstance(value, (int, float))
+            or value <= 0):
+        raise ValueError(f'{name} должен быть положительным числом')
+    return value
+
+
+def _parse_endpoint(name, value):
+    if not isinstance(value, str) or not value.startswith(
+            ('https://', 'http://')):
+        raise ValueError(f'{name} должен быть адресом http(s)')
+    return value
+
+
+def _parse_chat_id(name, value):
+    if (isinstance(value, bool) or not isinstance(value, (str, int))
+            or not str(value).strip()):
+        raise ValueError(f'{name} должен быть строкой или числом')
+    return str(value)
+
+
+def _parse_templates(name, value):
+    return TemplateRegistry(merge_templates(value))
+
+
+SETTING_PARSERS = {
+    **{name: _parse_period for name in PERIOD_SETTINGS},
+    'endpoint': _parse_endpoint,
+    'chat_id': _parse_chat_id,
+    'templates': _parse_templates,
+}
+
+
+def parse_settings(data):
+    """Проверяет настройки из файла; ошибка - ValueError."""
+    if not isinstance(data, dict):
+        raise ValueError('Файл настроек должен содержать объект JSON')
+    unknown = set(data) - set(SETTING_PARSERS)
+    if unknown:
+        raise ValueError(f'Неизвестные настройки: {", ".join(unknown)}')
+    return Settings(**{
+        name: SETTING_PARSERS[name](name, value)
+        for name, value in data.items()
+    })
+
+
+def load_settings(path):
+    """Настройки из JSON-файла path."""
+    with open(path, encoding='UTF-8') as config_file:
+        return parse_settings(json.load(config_file))
+
+
+class SettingsSlot:
+    """Передача настроек из потока слежения в поток опроса.
+
+    Поток слежения лишь кладёт новые настройки, поток опроса забирает
+    их между циклами: цикл не видит наполовину применённых настроек.
+    """
+
+    def __init__(self, defaults):
+        """Пустой слот; defaults - значения настроек при запуске."""
+        self.defaults = defaults
+        self.settings = None
+        self._pending = None
+
+    def request(self, settings):
+        """Запоминает настройки до следующего take."""
+        self._pending = settings
+
+    def take(self):
+        """Значения новых настроек поверх defaults; None без изменений."""
+        settings = self._pending
+        if settings is None or settings is self.settings:
+            return None
+        self.settings = settings
+        return {**self.defaults, **settings.overrides()}
+
+
+class PollingWatcher:
+    """Изменения файла по os.stat раз в interval секунд."""
+
+    def __init__(self, path):
+        """Запоминает текущее состояние файла path."""
+        self.path = path
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def wait(self, timeout):
+        """Ждёт до timeout секунд, возвращает True, если файл изменился."""
+        time.sleep(timeout)
+        signature = self._stat()
+        changed = signature != self._signature
+        self._signature = signature
+        return changed
+
+    def close(self):
+        """Опрос не держит открытых ресурсов."""
+
+
+class InotifyWatcher:
+    """Изменения файла через inotify Linux, вызываемый через ctypes.
+
+    Наблюдается каталог файла: так замечается и запись на месте,
+    и атомарная подмена переименованием, которой сохраняют редакторы.
+    """
+
+    def __init__(self, path):
+        """Подписывается на изменения каталога файла path."""
+        self.path = path
+        self._name = os.fsencode(os.path.basename(path))
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        directory = os.path.dirname(os.path.abspath(path))
+        if libc.inotify_add_watch(
+                self._fd, os.fsencode(directory),
+                IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, 'inotify_add_watch', directory)
+
+    def wait(self, timeout):
+        """Ждёт до timeout секунд, возвращает True, если файл изменился."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return False
+        changed = False
+        while True:
+            try:
+                data = os.read(self._fd, INOTIFY_BUFFER_SIZE)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                changed = changed or name == self._name
+
+    def close(self):
+        """Закрывает дескриптор inotify."""
+        os.close(self._fd)
+
+
+def make_watcher(path):
+    """inotify, где он есть, иначе опрос файла."""
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError, TypeError) as error:
+        logger.debug(f'inotify недоступен, файл настроек опрашивается: '
+                     f'{error}')
+        return PollingWatcher(path)
+
+
+class ConfigWatcher:
+    """Перечитывает файл настроек при изменении и передаёт их on_change.
+
+    Файл читается в фоновом потоке; если он не разбирается, действуют
+    прежние настройки, а ошибка пишется в лог.
+    """
+
+    def __init__(self, path, on_change, interval=CONFIG_POLL_INTERVAL,
+                 watcher=None):
+        """Слежение за path; без watcher выбирается make_watcher."""
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.watcher = make_watcher(path) if watcher is None else watcher
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def reload(self):
+        """Читает файл и передаёт настройки; None, если не удалось.
+
+        Любая ошибка разбора лишь пишется в лог: слежение за файлом
+        продолжается, а действуют прежние настройки.
+        """
+        try:
+            settings = load_settings(self.path)
+            self.on_change(settings)
+        except Exception as error:
+            logger.error(f'Настройки из {self.path} не применены: {error}')
+            return None
+        logger.info(f'Настройки из {self.path} загружены.')
+        return settings
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if self.watcher.wait(self.interval):
+                self.reload()
+
+    def start(self):
+        """Загружает настройки и начинает следить за файлом."""
+        if os.path.exists(self.path):
+            self.reload()
+        self._thread = threading.Thread(
+            target=self._run, name='config-watcher', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Прекращает слежение."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.watcher.close()
+
+
+def watch_config(on_change, path=CONFIG_PATH):
+    """Следит за файлом настроек и передаёт их on_change; None без пути."""
+    if not path:
+        return None
+    return ConfigWatcher(path, on_change).start()
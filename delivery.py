@@ -0,0 +1,303 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+from homework import lazy_import
+from metrics import instrumented
+
+TELEGRAM_GLOBAL_RATE = 30
+TELEGRAM_CHAT_RATE = 1
+DELIVERY_WORKERS = 4
+DELIVERY_RETRIES = 5
+DELIVERY_BACKOFF = 1.0
+DELIVERY_BACKOFF_MAX = 60.0
+DELIVERY_BUCKET_SWEEP = 60.0
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Ограничитель частоты: rate токенов в секунду, запас capacity.
+
+    rate - число или функция без аргументов: функция читается при каждом
+    пополнении, так лимит следует за меняющейся долей процесса. Без
+    capacity запас равен текущему rate.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """Ограничитель с полным запасом."""
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = self._limits()[1]
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _limits(self):
+        rate = self.rate() if callable(self.rate) else self.rate
+        return rate, rate if self.capacity is None else self.capacity
+
+    def _refill(self):
+        rate, capacity = self._limits()
+        now = self.clock()
+        self._tokens = min(
+            capacity, self._tokens + (now - self._updated_at) * rate
+        )
+        self._updated_at = now
+        return rate
+
+    def delay(self):
+        """Сколько секунд ждать до появления токена."""
+        with self._lock:
+            rate = self._refill()
+            return max(0.0, (1 - self._tokens) / rate)
+
+    def try_acquire(self):
+        """Забирает токен; если его нет, возвращает время ожидания."""
+        with self._lock:
+            rate = self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / rate
+
+    def is_full(self):
+        """Запас полон: ограничитель не отличается от нового."""
+        with self._lock:
+            capacity = self._limits()[1]
+            self._refill()
+            return self._tokens >= capacity
+
+
+def split_message(text, limit):
+    """Части text не длиннее limit, по возможности по границам строк."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 1, limit + 1)
+        if cut < 0:
+            cut = text.rfind(' ', 1, limit + 1)
+        if cut < 0:
+            parts.append(text[:limit])
+            text = text[limit:]
+        else:
+            parts.append(text[:cut])
+            text = text[cut + 1:]
+    parts.append(text)
+    return parts
+
+
+class DeliveryQueue:
+    """Очередь исходящих сообщений Telegram с пулом отправителей.
+
+    Сообщения одного чата отправляются по порядку и не чаще лимита на чат,
+    все чаты вместе - не чаще общего лимита Telegram. Накопившиеся для
+    чата сообщения склеиваются в одно (в пределах длины сообщения), а
+    слишком длинное сообщение делится на части. Ограничители чатов без
+    очереди, чей запас уже восстановился, удаляются.
+    Временные ошибки повторяются с нарастающей задержкой, а RetryAfter
+    выдерживает паузу, запрошенную Telegram.
+    """
+
+    def __init__(self, bot, workers=DELIVERY_WORKERS,
+                 global_rate=TELEGRAM_GLOBAL_RATE,
+                 chat_rate=TELEGRAM_CHAT_RATE,
+                 retries=DELIVERY_RETRIES, coalesce=True):
+        """Запускает workers потоков-отправителей."""
+        self.bot = bot
+        self.max_length = lazy_import('telegram.constants').MAX_MESSAGE_LENGTH
+        self.chat_rate = chat_rate
+        self.retries = retries
+        self.coalesce = coalesce
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.dropped = 0
+        self._global_bucket = TokenBucket(global_rate)
+        self._chat_buckets = {}
+        self._next_sweep = time.monotonic() + DELIVERY_BUCKET_SWEEP
+        self._pending = {}
+        self._attempts = {}
+        self._ready = []
+        self._scheduled = set()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._workers = [
+            threading.Thread(
+                target=self._work, name=f'delivery-{number}', daemon=True
+            )
+            for number in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def put(self, chat_id, message):
+        """Ставит сообщение в очередь чата, не дожидаясь отправки."""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Очередь доставки закрыта')
+            self._pending.setdefault(chat_id, deque()).extend(
+                split_message(message, self.max_length)
+            )
+            if chat_id not in self._scheduled:
+                self._schedule(chat_id, time.monotonic())
+
+    def _schedule(self, chat_id, ready_at):
+        self._scheduled.add(chat_id)
+        heapq.heappush(
+            self._ready, (ready_at, next(self._sequence), chat_id)
+        )
+        self._condition.notify()
+
+    def _next_chat(self):
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._ready and self._ready[0][0] <= now:
+                    return heapq.heappop(self._ready)[2]
+                if self._closed and not self._ready:
+                    return None
+                timeout = self._ready[0][0] - now if self._ready else None
+                self._condition.wait(timeout)
+
+    def _take_batch(self, chat_id):
+        with self._condition:
+            pending = self._pending[chat_id]
+            message = pending.popleft()
+            batch = [message]
+            if self.coalesce:
+                length = len(message)
+                while pending and (
+                        length + 2 + len(pending[0]) <= self.max_length):
+                    length += 2 + len(pending[0])
+                    batch.append(pending.popleft())
+            return batch
+
+    def _return_batch(self, chat_id, batch):
+        with self._condition:
+            self._pending[chat_id].extendleft(reversed(batch))
+
+    def _count(self, counter, value=1):
+        with self._condition:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def _retry_delay(self, chat_id):
+        attempts = self._attempts.get(chat_id, 0) + 1
+        self._attempts[chat_id] = attempts
+        if attempts > self.retries:
+            return None
+        self._count('retried')
+        return min(DELIVERY_BACKOFF * 2 ** (attempts - 1),
+                   DELIVERY_BACKOFF_MAX)
+
+    @instrumented(name='send_chat_message')
+    def _send_message(self, chat_id, text):
+        self.bot.send_message(chat_id, text)
+
+    def _send(self, chat_id):
+        """Отправка очередной пачки чата, возвращает паузу до следующей."""
+        with self._condition:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, capacity=1)
+                self._chat_buckets[chat_id] = bucket
+        wait = bucket.delay() or self._global_bucket.try_acquire()
+        if wait:
+            return wait
+        bucket.try_acquire()
+        batch = self._take_batch(chat_id)
+        try:
+            self._send_message(chat_id, '\n\n'.join(batch))
+        except lazy_import('telegram.error').RetryAfter as error:
+            logger.warning(f'Telegram просит подождать {error.retry_after} с')
+            self._return_batch(chat_id, batch)
+            return error.retry_after
+        except lazy_import('telegram.error').BadRequest as error:
+            logger.error(f'Сообщение в Telegram не отправлено: {error}')
+            self._count('dropped', len(batch))
+        except lazy_import('telegram.error').NetworkError as error:
+            delay = self._retry_delay(chat_id)
+            if delay is not None:
+                logger.warning(f'Повтор отправки через {delay} с: {error}')
+                self._return_batch(chat_id, batch)
+                return delay
+            logger.error(f'Сообщение в Telegram не отправлено: {error}')
+            self._count('dropped', len(batch))
+        except lazy_import('telegram').TelegramError as error:
+            logger.error(f'Сообщение в Telegram не отправлено: {error}')
+            self._count('dropped', len(batch))
+        else:
+            logger.debug(f'Отправляет сообщение пользователю:{batch}')
+            self._count('sent')
+            self._count('coalesced', len(batch) - 1)
+        self._attempts.pop(chat_id, None)
+        return 0.0
+
+    def _work(self):
+        while True:
+            chat_id = self._next_chat()
+            if chat_id is None:
+                return
+            try:
+                delay = self._send(chat_id)
+            except Exception as error:
+                logger.error(f'Сбой очереди доставки: {error}')
+                delay = 0.0
+            with self._condition:
+                self._scheduled.discard(chat_id)
+                if self._pending.get(chat_id):
+                    self._schedule(chat_id, time.monotonic() + delay)
+                else:
+                    self._pending.pop(chat_id, None)
+                    self._evict_idle_buckets()
+                    self._condition.notify_all()
+
+    def _evict_idle_buckets(self):
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + DELIVERY_BUCKET_SWEEP
+        idle = [chat_id for chat_id, bucket in self._chat_buckets.items()
+                if chat_id not in self._pending and bucket.is_full()]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    def __len__(self):
+        """Число сообщений, ожидающих отправки."""
+        with self._condition:
+            return sum(len(pending) for pending in self._pending.values())
+
+    def join(self, timeout=None):
+        """Ждёт, пока очередь опустеет; False, если не дождались."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = (None if deadline is None
+                             else deadline - time.monotonic())
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """Дожидается отправки очереди и останавливает отправителей."""
+        self.join(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def stats(self):
+        """Счётчики доставки для мониторинга."""
+        return {
+            'queued': len(self),
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'chat_buckets': len(self._chat_buckets),
+        }
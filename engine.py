@@ -0,0 +1,594 @@
+import argparse
+import heapq
+import json
+import logging
+import os
+import random
+import sys
+import time
+from sys import exit
+
+from analytics import ANALYTICS_PATH, ReviewAnalytics, open_analytics
+from circuit_breaker import CircuitBreaker
+from commands import start_command_interface
+from config import CONFIG_PATH, SettingsSlot, watch_config
+from delivery import DeliveryQueue
+from error_throttle import ErrorThrottle
+from event_log import EVENT_LOG_PATH, RECENT_LIMIT, open_event_log
+from exceptions_api_answer import TokenOwnedError
+from homework import (MAIN_TENANT_ID,
+                      PRACTICUM_TOKEN,
+                      RETRY_PERIOD,
+                      TELEGRAM_CHAT_ID,
+                      TELEGRAM_TOKEN,
+                      join_messages,
+                      lazy_import,
+                      make_headers,
+                      request_api_answer,
+                      send_chat_message,
+                      )
+from metrics import REGISTRY, start_metrics_server
+from response_cache import CachedAnswer, ResponseCache
+from scheduler import AdaptiveScheduler
+from state_store import STATE_STORE_PATH, open_state_store
+from streaming import HomeworkStream
+from structured_logging import configure_logging
+from templates import load_templates
+from tenants import Tenant, open_registry
+from validation import (changed_records, validate_homework_statuses,
+                        validate_homework_stream)
+
+SUBSCRIPTIONS_PATH = os.getenv('SUBSCRIPTIONS_PATH', 'subscriptions.sqlite3')
+REGISTRY_REFRESH_PERIOD = 60
+
+logger = logging.getLogger(__name__)
+
+
+class TenantCursor:
+    """Состояние опроса одного подписчика."""
+
+    __slots__ = ('tenant', 'timestamp', 'due', 'changed_at', 'failures')
+
+    def __init__(self, tenant, timestamp, due, changed_at):
+        """Курсор подписчика tenant со сроком опроса due."""
+        self.tenant = tenant
+        self.timestamp = timestamp
+        self.due = due
+        self.changed_at = changed_at
+        self.failures = 0
+
+
+class PollingEngine:
+    """Опрос API Практикума для всех подписчиков в одном процессе."""
+
+    def __init__(self, registry, bot, retry_period=RETRY_PERIOD,
+                 refresh_period=REGISTRY_REFRESH_PERIOD,
+                 response_cache=None, state_store=None, scheduler=None,
+                 delivery=None, error_throttle=None, stream_responses=False,
+                 circuit_breaker=None, event_log=None, analytics=None,
+                 templates=None):
+        """Цикл опроса подписчиков registry с отправкой через bot."""
+        self.registry = registry
+        self.bot = bot
+        self.delivery = delivery
+        self.retry_period = retry_period
+        self.refresh_period = refresh_period
+        self.stream_responses = stream_responses
+        self.event_log = event_log
+        self.analytics = analytics
+        self.templates = load_templates() if templates is None else templates
+        self.response_cache = (
+            ResponseCache() if response_cache is None else response_cache
+        )
+        self.state_store = (
+            open_state_store(None) if state_store is None else state_store
+        )
+        self.scheduler = (
+            AdaptiveScheduler(retry_period) if scheduler is None else scheduler
+        )
+        self.error_throttle = (
+            ErrorThrottle() if error_throttle is None else error_throttle
+        )
+        self.circuit_breaker = (
+            CircuitBreaker() if circuit_breaker is None else circuit_breaker
+        )
+        self.endpoint = None
+        self.on_settings = []
+        self._settings = SettingsSlot(self.current_settings())
+        self._cursors = {}
+        self._schedule = []
+        self._refreshed_at = None
+
+    def __len__(self):
+        """Число подписчиков в расписании."""
+        return len(self._cursors)
+
+    def _schedule_poll(self, cursor, due):
+        cursor.due = due
+        heapq.heappush(self._schedule, (due, cursor.tenant.tenant_id))
+
+    def refresh(self, now=None):
+        """Синхронизирует подписчиков с реестром.
+
+        Новые подписчики продолжают с сохранённого курсора (или с текущего
+        момента, если его нет), а их первый
+        опрос распределяется по RETRY_PERIOD, чтобы не опрашивать API
+        всеми подписчиками одновременно. Приостановленные подписки
+        не опрашиваются. Заодно статистика проверки сбрасывается в файл,
+        чтобы падение процесса не стирало её.
+        """
+        now = time.time() if now is None else now
+        tenants = {tenant.tenant_id: tenant
+                   for tenant in self.registry.tenants()
+                   if not tenant.paused}
+        for tenant_id in set(self._cursors) - set(tenants):
+            del self._cursors[tenant_id]
+        for tenant_id, tenant in tenants.items():
+            cursor = self._cursors.get(tenant_id)
+            if cursor is not None:
+                cursor.tenant = tenant
+                continue
+            timestamp = self.state_store.load_cursor(tenant_id) or int(now)
+            cursor = TenantCursor(tenant, timestamp, None, now)
+            self._cursors[tenant_id] = cursor
+            self._schedule_poll(
+                cursor, now + random.uniform(0, self.retry_period)
+            )
+        if self.analytics is not None:
+            self.analytics.flush()
+        self._refreshed_at = now
+        logger.debug(f'Подписчиков в работе: {len(self._cursors)}')
+
+    def request_refresh(self):
+        """Перечитать реестр при следующем раунде, а не по расписанию."""
+        self._refreshed_at = None
+
+    def current_settings(self):
+        """Действующие настройки, которые можно сменить на ходу."""
+        return {
+            'retry_period': self.retry_period,
+            'reviewing_period': self.scheduler.reviewing_period,
+            'idle_period': self.scheduler.idle_period,
+            'refresh_period': self.refresh_period,
+            'endpoint': self.endpoint,
+            'templates': self.templates,
+        }
+
+    def request_settings(self, settings):
+        """Применить settings перед следующим раундом.
+
+        Вызывается из потока слежения за файлом: настройки подменяются
+        между раундами в потоке опроса.
+        """
+        self._settings.request(settings)
+
+    def compress_schedule(self, ratio, now=None):
+        """Приближает запланированные опросы, сохраняя их разброс."""
+        now = time.time() if now is None else now
+        for cursor in self._cursors.values():
+            if cursor.due is not None and cursor.due > now:
+                self._schedule_poll(cursor, now + (cursor.due - now) * ratio)
+
+    def apply_pending_settings(self, now=None):
+        """Подменяет настройки, если пришли новые; True, если подменены.
+
+        Не заданное в файле возвращается к значению при запуске.
+        """
+        values = self._settings.take()
+        if values is None:
+            return False
+        if values['retry_period'] < self.retry_period:
+            self.compress_schedule(
+                values['retry_period'] / self.retry_period, now
+            )
+        self.retry_period = values['retry_period']
+        self.scheduler.retry_period = values['retry_period']
+        self.scheduler.reviewing_period = values['reviewing_period']
+        self.scheduler.idle_period = values['idle_period']
+        self.refresh_period = values['refresh_period']
+        if values['endpoint'] != self.endpoint:
+            self.circuit_breaker.reset()
+            self.response_cache.clear()
+        self.endpoint = values['endpoint']
+        self.templates = values['templates']
+        logger.info(f'Применены настройки: период опроса '
+                    f'{self.retry_period} с, адрес API '
+                    f'{self.endpoint or "по умолчанию"}')
+        for callback in self.on_settings:
+            callback(self)
+        return True
+
+    def process_response(self, cursor, response):
+        """Разбор ответа API, возвращает сообщения для подписчика."""
+        if isinstance(response, CachedAnswer):
+            return self.apply_changes(
+                cursor, response.get('current_date'), [], {}
+            )
+        last_statuses = self.state_store.statuses(cursor.tenant.tenant_id)
+        if isinstance(response, HomeworkStream):
+            try:
+                changed = changed_records(
+                    validate_homework_stream(response, strict=False),
+                    last_statuses
+                )
+            finally:
+                response.close()
+            current_date = response.current_date
+        else:
+            current_date, records = validate_homework_statuses(
+                response, strict=False
+            )
+            changed = changed_records(records, last_statuses)
+        return self.apply_changes(
+            cursor, current_date, changed, last_statuses
+        )
+
+    def apply_changes(self, cursor, current_date, changed, last_statuses):
+        """Сохраняет изменившиеся записи, возвращает сообщения подписчику."""
+        tenant_id = cursor.tenant.tenant_id
+        messages = []
+        recovered_message = self.error_throttle.recovered(tenant_id)
+        if recovered_message:
+            messages.append(recovered_message)
+        if changed:
+            messages.append(join_messages(
+                self.templates.catalog(tenant_id).render_records(changed)
+            ))
+            cursor.changed_at = time.time()
+        else:
+            logger.debug('Новых статусов работ Нет!',
+                         extra={'tenant': tenant_id})
+        for record in changed:
+            logger.debug('Новый статус работы.', extra={
+                'tenant': tenant_id, 'homework': record.homework_name
+            })
+        timestamp = cursor.timestamp if current_date is None else current_date
+        self.state_store.save(tenant_id, timestamp, {
+            record.homework_name: record.status for record in changed
+        })
+        cursor.timestamp = timestamp
+        self.response_cache.commit(
+            make_headers(cursor.tenant.practicum_token)['Authorization']
+        )
+        if changed and self.event_log is not None:
+            self.event_log.append(
+                tenant_id, changed, last_statuses, current_date
+            )
+        if changed and self.analytics is not None:
+            self.analytics.observe_records(tenant_id, changed, last_statuses)
+        return messages
+
+    def fetch(self, cursor):
+        """Запрос к API Практикума от имени подписчика."""
+        return request_api_answer(
+            cursor.timestamp,
+            make_headers(cursor.tenant.practicum_token),
+            self.response_cache,
+            self.stream_responses,
+            self.circuit_breaker,
+            self.endpoint
+        )
+
+    def poll_tenant(self, cursor):
+        """Один цикл опроса подписчика, возвращает число сообщений."""
+        started = time.perf_counter()
+        messages = self.process_response(cursor, self.fetch(cursor))
+        for message in messages:
+            self.deliver(cursor.tenant.chat_id, message)
+        logger.debug('Опрос подписчика завершён.', extra={
+            'tenant': cursor.tenant.tenant_id,
+            'duration': round(time.perf_counter() - started, 6),
+        })
+        return len(messages)
+
+    def deliver(self, chat_id, message):
+        """Отправляет сообщение через очередь доставки, если она есть."""
+        if self.delivery is not None:
+            self.delivery.put(chat_id, message)
+        else:
+            send_chat_message(self.bot, chat_id, message)
+
+    def pop_due(self, now):
+        """Извлекает из расписания подписчиков, чей срок наступил."""
+        self.apply_pending_settings(now)
+        if (self._refreshed_at is None
+                or now - self._refreshed_at >= self.refresh_period):
+            self.refresh(now)
+        while self._schedule and self._schedule[0][0] <= now:
+            due, tenant_id = heapq.heappop(self._schedule)
+            cursor = self._cursors.get(tenant_id)
+            if cursor is not None and cursor.due == due:
+                yield cursor
+
+    def reschedule(self, cursor, now, error=None):
+        """Планирует следующий опрос подписчика по итогу цикла."""
+        if self.scheduler.is_backoff_error(error):
+            cursor.failures += 1
+        else:
+            cursor.failures = 0
+        tenant_id = cursor.tenant.tenant_id
+        if tenant_id in self._cursors:
+            delay = self.scheduler.next_delay(
+                self.state_store.statuses(tenant_id),
+                cursor.changed_at,
+                cursor.failures,
+                now
+            )
+            self._schedule_poll(cursor, now + delay)
+
+    def error_messages(self, cursor, error):
+        """Логирует сбой опроса; сообщение подписчику, если не подавлено."""
+        tenant_id = cursor.tenant.tenant_id
+        message = f'Сбой в работе программы: {error}'
+        logger.error(f'Подписчик {tenant_id}: {message}', extra={
+            'tenant': tenant_id, 'error_class': type(error).__name__
+        })
+        if self.error_throttle.should_notify(tenant_id, error):
+            return [message]
+        return []
+
+    def run_round(self, now=None):
+        """Опрашивает всех подписчиков, чей срок наступил."""
+        now = time.time() if now is None else now
+        polled = 0
+        for cursor in self.pop_due(now):
+            error = None
+            try:
+                self.poll_tenant(cursor)
+            except Exception as poll_error:
+                error = poll_error
+                for message in self.error_messages(cursor, error):
+                    self.deliver(cursor.tenant.chat_id, message)
+            self.reschedule(cursor, now, error)
+            polled += 1
+        return polled
+
+    def next_due(self):
+        """Время ближайшего запланированного опроса или None."""
+        while self._schedule:
+            due, tenant_id = self._schedule[0]
+            cursor = self._cursors.get(tenant_id)
+            if cursor is not None and cursor.due == due:
+                return due
+            heapq.heappop(self._schedule)
+        return None
+
+    def run_forever(self):
+        """Бесконечный цикл опроса."""
+        while True:
+            self.run_round()
+            self.state_store.flush()
+            next_due = self.next_due()
+            delay = self.refresh_period
+            if next_due is not None:
+                delay = min(delay, next_due - time.time())
+            time.sleep(max(delay, 0))
+
+
+def register_engine_metrics(engine, registry=REGISTRY):
+    """Выдаёт счётчики движка на /metrics."""
+    registry.register_stats(
+        'homework_bot_response_cache',
+        'Кеш ответов API Практикума.',
+        engine.response_cache.stats
+    )
+    registry.register_stats(
+        'homework_bot_http',
+        'Соединения с API Практикума.',
+        lazy_import('http_pool').get_session().connection_stats
+    )
+    registry.register_stats(
+        'homework_bot_circuit',
+        'Предохранитель запросов к API Практикума.',
+        engine.circuit_breaker.stats
+    )
+    registry.register_stats(
+        'homework_bot_engine',
+        'Подписчики в работе.',
+        lambda: {'tenants': len(engine)}
+    )
+    if engine.delivery is not None:
+        registry.register_stats(
+            'homework_bot_delivery',
+            'Очередь доставки сообщений Telegram.',
+            engine.delivery.stats
+        )
+    if engine.analytics is not None:
+        registry.register_stats(
+            'homework_bot_review',
+            'Время проверки работ по сменам статусов.',
+            engine.analytics.stats
+        )
+
+
+def run(arguments):
+    """Запуск опроса всех подписчиков."""
+    if not TELEGRAM_TOKEN:
+        no_token_msg = ('Бот не работает!'
+                        'Отсутствует переменная окружения:TELEGRAM_TOKEN!')
+        logger.critical(no_token_msg)
+        exit(no_token_msg)
+    registry = open_registry(arguments.registry)
+    bot = lazy_import('telegram').Bot(token=TELEGRAM_TOKEN)
+    engine = PollingEngine(
+        registry,
+        bot,
+        state_store=open_state_store(arguments.state),
+        delivery=DeliveryQueue(bot),
+        stream_responses=arguments.stream,
+        event_log=open_event_log(arguments.events),
+        analytics=open_analytics(arguments.analytics)
+    )
+    register_engine_metrics(engine)
+    start_metrics_server()
+    updater = (start_command_interface(engine, TELEGRAM_TOKEN)
+               if arguments.commands else None)
+    config_watcher = watch_config(engine.request_settings,
+                                  arguments.config)
+    try:
+        engine.run_forever()
+    finally:
+        if config_watcher is not None:
+            config_watcher.stop()
+        engine.state_store.close()
+        if engine.event_log is not None:
+            engine.event_log.close()
+        if engine.analytics is not None:
+            engine.analytics.flush()
+        engine.delivery.close(timeout=REGISTRY_REFRESH_PERIOD)
+        if updater is not None:
+            updater.stop()
+
+
+def subscribe(arguments):
+    """Добавление подписки."""
+    registry = open_registry(arguments.registry)
+    try:
+        tenant = registry.subscribe(
+            arguments.practicum_token, arguments.chat_id, arguments.reassign
+        )
+    except TokenOwnedError:
+        exit('Токен уже подписан в другом чате; '
+             'перенести подписку - --reassign')
+    print(f'Подписка {tenant.tenant_id}: чат {tenant.chat_id}')
+
+
+def unsubscribe(arguments):
+    """Удаление подписки."""
+    registry = open_registry(arguments.registry)
+    if not registry.unsubscribe(arguments.tenant_id):
+        exit(f'Подписка {arguments.tenant_id} не найдена')
+
+
+def list_tenants(arguments):
+    """Вывод списка подписок."""
+    for tenant in open_registry(arguments.registry).tenants():
+        print(f'{tenant.tenant_id}\t{tenant.chat_id}')
+
+
+def run_backfill(arguments):
+    """Загрузка текущих статусов работ без уведомлений."""
+    tenants = list(open_registry(arguments.registry).tenants())
+    if arguments.main:
+        tenants.append(
+            Tenant(MAIN_TENANT_ID, PRACTICUM_TOKEN, TELEGRAM_CHAT_ID)
+        )
+    backfill = lazy_import('backfill')
+    workers = arguments.workers
+    if workers is None:
+        workers = backfill.BACKFILL_WORKERS
+    state_store = open_state_store(arguments.state)
+    try:
+        report = backfill.backfill(
+            tenants,
+            state_store,
+            from_date=arguments.from_date,
+            workers=workers,
+            force=arguments.force,
+            stream=True
+        )
+    finally:
+        state_store.close()
+    print(json.dumps(report, ensure_ascii=False))
+
+
+def print_transitions(transitions):
+    """Вывод смен статусов строками JSON."""
+    for transition in transitions:
+        print(json.dumps(transition._asdict(), ensure_ascii=False))
+
+
+def history(arguments):
+    """Смены статусов из журнала событий."""
+    event_log = open_event_log(arguments.events)
+    if event_log is None:
+        exit('Не задан журнал событий: --events или EVENT_LOG_PATH')
+    if arguments.homework is not None and arguments.tenant_id is None:
+        exit('Для истории работы нужен --tenant-id')
+    try:
+        if arguments.homework is None:
+            print_transitions(
+                event_log.recent(arguments.tenant_id, arguments.limit)
+            )
+        elif arguments.turnaround:
+            print(event_log.turnaround(arguments.tenant_id,
+                                       arguments.homework))
+        else:
+            print_transitions(
+                event_log.history(arguments.tenant_id, arguments.homework)
+            )
+    finally:
+        event_log.close()
+
+
+def report(arguments):
+    """Выгрузка статистики проверки работ в JSON или CSV.
+
+    Файлы процессов supervisor, переданные аргументами, объединяются.
+    """
+    paths = [path for path in (arguments.analytics, *arguments.snapshots)
+             if path]
+    if not paths:
+        exit('Не задан файл статистики: --analytics или ANALYTICS_PATH')
+    analytics = ReviewAnalytics()
+    for path in paths:
+        analytics.merge(open_analytics(path))
+    if arguments.format == 'csv':
+        analytics.write_csv(sys.stdout)
+    else:
+        analytics.write_json(sys.stdout)
+
+
+def build_parser():
+    """Разбор аргументов командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Опрос статусов домашних работ для многих подписчиков.'
+    )
+    parser.add_argument('--registry', default=SUBSCRIPTIONS_PATH)
+    parser.add_argument('--state', default=STATE_STORE_PATH)
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--commands', action='store_true')
+    parser.add_argument('--events', default=EVENT_LOG_PATH)
+    parser.add_argument('--analytics', default=ANALYTICS_PATH)
+    parser.add_argument('--config', default=CONFIG_PATH)
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('run').set_defaults(handler=run)
+    subscribe_parser = commands.add_parser('subscribe')
+    subscribe_parser.add_argument('practicum_token')
+    subscribe_parser.add_argument('chat_id')
+    subscribe_parser.add_argument('--reassign', action='store_true')
+    subscribe_parser.set_defaults(handler=subscribe)
+    unsubscribe_parser = commands.add_parser('unsubscribe')
+    unsubscribe_parser.add_argument('tenant_id', type=int)
+    unsubscribe_parser.set_defaults(handler=unsubscribe)
+    commands.add_parser('list').set_defaults(handler=list_tenants)
+    backfill_parser = commands.add_parser('backfill')
+    backfill_parser.add_argument('--from-date', type=int, default=0)
+    backfill_parser.add_argument('--workers', type=int)
+    backfill_parser.add_argument('--force', action='store_true')
+    backfill_parser.add_argument('--main', action='store_true')
+    backfill_parser.set_defaults(handler=run_backfill)
+    history_parser = commands.add_parser('history')
+    history_parser.add_argument('--tenant-id', type=int)
+    history_parser.add_argument('--homework')
+    history_parser.add_argument('--turnaround', action='store_true')
+    history_parser.add_argument('--limit', type=int, default=RECENT_LIMIT)
+    history_parser.set_defaults(handler=history)
+    report_parser = commands.add_parser('report')
+    report_parser.add_argument('--format', choices=('json', 'csv'),
+                               default='json')
+    report_parser.add_argument('snapshots', nargs='*')
+    report_parser.set_defaults(handler=report)
+    parser.set_defaults(handler=run)
+    return parser
+
+
+def main():
+    """Точка входа многопользовательского режима."""
+    arguments = build_parser().parse_args()
+    arguments.handler(arguments)
+
+
+if __name__ == '__main__':
+    configure_logging('program.log')
+    main()
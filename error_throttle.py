@@ -0,0 +1,62 @@
+import threading
+import time
+
+ERROR_THROTTLE_WINDOW = 3600
+
+
+def error_key(error):
+    """Устойчивое имя ошибки: тип и HTTP-код ответа или тип причины.
+
+    Текст ошибки соединения содержит адрес объекта urllib3, который
+    меняется от попытки к попытке, поэтому в ключ он не входит.
+    """
+    status_code = getattr(error, 'status_code', None)
+    if status_code is not None:
+        return type(error).__name__, status_code
+    if error.__cause__ is not None:
+        return type(error).__name__, type(error.__cause__).__name__
+    return type(error).__name__, str(error)
+
+
+class ErrorThrottle:
+    """Подавление повторных уведомлений об одной и той же ошибке.
+
+    Ошибка определяется error_key: типом исключения и кодом ответа,
+    типом исходной ошибки запроса или, для прочих, текстом. О новой ошибке
+    сообщается сразу, о повторяющейся - не чаще раза в window секунд.
+    Когда цикл снова проходит успешно, recovered возвращает сообщение
+    о восстановлении с числом подавленных повторов.
+    """
+
+    def __init__(self, window=ERROR_THROTTLE_WINDOW, clock=time.monotonic):
+        """Пустой список активных ошибок с окном window секунд."""
+        self.window = window
+        self.clock = clock
+        self.suppressed = 0
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def should_notify(self, scope, error):
+        """Нужно ли сообщать об ошибке подписчику scope."""
+        key = error_key(error)
+        now = self.clock()
+        with self._lock:
+            errors = self._active.setdefault(scope, {})
+            notified_at, repeats = errors.get(key, (None, 0))
+            if notified_at is not None and now - notified_at < self.window:
+                errors[key] = (notified_at, repeats + 1)
+                self.suppressed += 1
+                return False
+            errors[key] = (now, 0)
+            return True
+
+    def recovered(self, scope):
+        """Сообщение о восстановлении, если у scope были ошибки, иначе None."""
+        with self._lock:
+            errors = self._active.pop(scope, None)
+        if not errors:
+            return None
+        names = ', '.join(sorted({name for name, _ in errors}))
+        repeats = sum(repeats for _, repeats in errors.values())
+        return (f'Работа бота восстановлена после ошибок: {names}. '
+                f'Подавлено повторных уведомлений: {repeats}.')
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from analytics import updated_at
+
+EVENT_LOG_PATH = os.getenv('EVENT_LOG_PATH')
+RECENT_LIMIT = 20
+
+Transition = namedtuple('Transition', (
+    'tenant_id', 'homework_name', 'old_status', 'new_status',
+    'observed_at', 'current_date', 'updated_at'
+))
+
+_COLUMNS = ('tenant_id, homework_name, old_status, new_status, '
+            'observed_at, server_date, updated_at')
+
+
+class EventLog:
+    """Журнал смен статусов работ в базе SQLite, только дописывается.
+
+    Каждая смена статуса - отдельное событие: прежний и новый статус,
+    время, когда бот её увидел, current_date ответа API и date_updated
+    работы. Индексы по подписчику и по работе отдают события сразу
+    в порядке event_id, индекс со статусом ищет начало и конец проверки.
+    """
+
+    def __init__(self, path=':memory:'):
+        """Открывает или создаёт журнал в базе path."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'CREATE TABLE IF NOT EXISTS events ('
+            'event_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'tenant_id INTEGER NOT NULL, homework_name TEXT NOT NULL, '
+            'old_status TEXT, new_status TEXT NOT NULL, '
+            'observed_at REAL NOT NULL, server_date INTEGER, '
+            'updated_at REAL);'
+        )
+        columns = {
+            row[1] for row in self._connection.execute(
+                'PRAGMA table_info(events)'
+            )
+        }
+        if 'updated_at' not in columns:
+            with self._connection:
+                self._connection.execute(
+                    'ALTER TABLE events ADD COLUMN updated_at REAL'
+                )
+                self._connection.execute(
+                    'UPDATE events SET updated_at = observed_at'
+                )
+        self._connection.executescript(
+            'CREATE INDEX IF NOT EXISTS events_tenant ON events (tenant_id);'
+            'CREATE INDEX IF NOT EXISTS events_homework '
+            'ON events (tenant_id, homework_name);'
+            'CREATE INDEX IF NOT EXISTS events_status '
+            'ON events (tenant_id, homework_name, new_status);'
+        )
+
+    def append(self, tenant_id, records, last_statuses, current_date=None,
+               observed_at=None):
+        """Дописывает смены статусов records относительно last_statuses."""
+        observed_at = time.time() if observed_at is None else observed_at
+        rows = [
+            (tenant_id, record.homework_name,
+             last_statuses.get(record.homework_name), record.status,
+             observed_at, current_date, updated_at(record, observed_at))
+            for record in records
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._connection:
+            self._connection.executemany(
+                f'INSERT INTO events ({_COLUMNS}) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+        return len(rows)
+
+    def _select(self, where, params, order='ASC', limit=-1):
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT {_COLUMNS} FROM events {where} '
+                f'ORDER BY event_id {order} LIMIT ?', (*params, limit)
+            ).fetchall()
+        return [Transition(*row) for row in rows]
+
+    def recent(self, tenant_id=None, limit=RECENT_LIMIT):
+        """Последние смены статусов, от свежих к давним."""
+        if tenant_id is None:
+            return self._select('', (), 'DESC', limit)
+        return self._select('WHERE tenant_id = ?', (tenant_id,), 'DESC', limit)
+
+    def history(self, tenant_id, homework_name):
+        """Все смены статуса работы в порядке наблюдения."""
+        return self._select(
+            'WHERE tenant_id = ? AND homework_name = ?',
+            (tenant_id, homework_name)
+        )
+
+    def _first(self, tenant_id, homework_name, status, after=0):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT event_id, updated_at FROM events '
+                'WHERE tenant_id = ? AND homework_name = ? '
+                'AND new_status = ? AND event_id > ? '
+                'ORDER BY event_id LIMIT 1',
+                (tenant_id, homework_name, status, after)
+            ).fetchone()
+
+    def turnaround(self, tenant_id, homework_name, start='reviewing',
+                   end='approved'):
+        """Секунды от первого статуса start до следующего за ним end.
+
+        Считается по date_updated работы, а без него - по времени опроса.
+        None, если работа ещё не проходила оба статуса.
+        """
+        started = self._first(tenant_id, homework_name, start)
+        if started is None:
+            return None
+        finished = self._first(tenant_id, homework_name, end, started[0])
+        if finished is None:
+            return None
+        return finished[1] - started[1]
+
+    def __len__(self):
+        """Число событий в журнале."""
+        with self._lock:
+            (count,) = self._connection.execute(
+                'SELECT COUNT(*) FROM events'
+            ).fetchone()
+        return count
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+def open_event_log(path=EVENT_LOG_PATH):
+    """Журнал смен статусов по пути или None, если путь не задан."""
+    return EventLog(path) if path else None
@@ -1,6 +1,10 @@
 class StatusOtherThan200Error(Exception):
     """Ответ от сервера не равный 200."""
-    pass
+
+    def __init__(self, message='', status_code=None):
+        """Сообщение об ошибке и HTTP-код ответа."""
+        super().__init__(message)
+        self.status_code = status_code
 
 
 class ApiRequestError(Exception):
@@ -21,3 +25,13 @@ class JSONDecodeError(Exception):
 class EmptyResponseFromAPI(Exception):
     """Пустой ответ от API."""
     pass
+
+
+class CircuitOpenError(Exception):
+    """API Практикума недоступно, запросы временно не отправляются."""
+    pass
+
+
+class TokenOwnedError(Exception):
+    """Токен Практикума уже подписан в другом чате."""
+    pass
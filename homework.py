@@ -1,3 +1,5 @@
+import functools
+import importlib
 import logging
 import os
 import time
@@ -5,13 +7,17 @@ from http import HTTPStatus
 from logging.handlers import RotatingFileHandler
 from sys import exit
 
-import requests
 from dotenv import load_dotenv
-from telegram import Bot, TelegramError
 
+from error_throttle import ErrorThrottle
 from exceptions_api_answer import (StatusOtherThan200Error,
                                    ApiRequestError,
                                    )
+from metrics import instrumented, start_metrics_server
+from scheduler import AdaptiveScheduler
+from state_store import open_state_store
+from streaming import stream_or_read
+from structured_logging import configure_logging
 
 load_dotenv()
 
@@ -20,8 +26,17 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+MAIN_TENANT_ID = 0
+VERDICT_CACHE_SIZE = 4096
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+
+
+def make_headers(token):
+    """Заголовки авторизации для токена Практикума."""
+    return {'Authorization': f'OAuth {token}'}
+
+
+HEADERS = make_headers(PRACTICUM_TOKEN)
 
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -36,12 +51,23 @@ formatter = logging.Formatter(
 handler = RotatingFileHandler(
     'bot.log',
     maxBytes=50000000,
-    encoding='UTF-8'
+    encoding='UTF-8',
+    delay=True
 )
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
 
+@functools.cache
+def lazy_import(name):
+    """Модуль name, загружаемый при первом обращении, а не при импорте.
+
+    Повторные обращения не проходят через механизм импорта, поэтому
+    вызов годится и для горячего пути, и для выражения в except.
+    """
+    return importlib.import_module(name)
+
+
 def check_tokens():
     """Проверка доступности переменных окружения."""
     names_tokens = {
@@ -62,35 +88,113 @@ def check_tokens():
 
 def send_message(bot, message):
     """Отправка сообщения в чат, определяемая TELEGRAM_CHAT_ID."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+@instrumented
+def send_chat_message(bot, chat_id, message):
+    """Отправка сообщения в произвольный чат Telegram."""
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
+        bot.send_message(chat_id, message)
         logger.debug(f'Отправляет сообщение пользователю:{message}')
-    except TelegramError as telegram_error:
+    except lazy_import('telegram').TelegramError as telegram_error:
         logger.error(f'Сообщение в Telegram не отправлено: {telegram_error}')
 
 
 def get_api_answer(timestamp):
     """Получение ответа от Яндекс-Практикума."""
+    return request_api_answer(timestamp, HEADERS)
+
+
+def read_early_answer(api_answer, cache, cache_key, stream):
+    """Ответ без декодирования JSON: поток работ или CachedAnswer."""
+    if stream:
+        homework_stream = stream_or_read(api_answer)
+        if homework_stream is not None:
+            logger.debug('Ответ API читается потоком.')
+            return homework_stream
+    if cache is not None:
+        cached_answer = cache.check(cache_key, api_answer)
+        if cached_answer is not None:
+            logger.debug('Ответ API не изменился.')
+            return cached_answer
+    return None
+
+
+def send_api_request(timestamp, headers, stream=False, circuit=None,
+                     endpoint=None):
+    """GET к endpoint или ENDPOINT; сбои учитывает предохранитель circuit."""
+    if endpoint is None:
+        endpoint = ENDPOINT
+    if circuit is not None:
+        circuit.before_call()
     try:
-        api_answer_yandex = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params={'from_date': timestamp}
+        response = lazy_import('http_pool').get_session().get(
+            endpoint,
+            headers=headers,
+            params={'from_date': timestamp},
+            stream=stream
+        )
+    except lazy_import('requests').RequestException:
+        if circuit is not None:
+            circuit.record_failure()
+        raise
+    if circuit is not None:
+        if response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            circuit.record_failure()
+        else:
+            circuit.record_success()
+    return response
+
+
+@instrumented
+def request_api_answer(timestamp, headers, cache=None, stream=False,
+                       circuit=None, endpoint=None):
+    """Запрос статусов домашних работ с произвольными заголовками.
+
+    С кешем ответов запрос становится условным, а не изменившийся ответ
+    возвращается как CachedAnswer без декодирования JSON. С stream большой
+    ответ возвращается как HomeworkStream и разбирается по мере чтения.
+    С предохранителем circuit при недоступном API запрос не отправляется,
+    а выбрасывается CircuitOpenError. Без endpoint запрос уходит
+    на ENDPOINT, прочитанный в момент вызова.
+    """
+    if endpoint is None:
+        endpoint = ENDPOINT
+    cache_key = headers.get('Authorization')
+    if cache is not None:
+        headers = {**headers, **cache.conditional_headers(cache_key)}
+    try:
+        api_answer_yandex = send_api_request(
+            timestamp, headers, stream, circuit, endpoint
         )
         logger.debug('Отправка запроса.')
+        early_answer = read_early_answer(
+            api_answer_yandex, cache, cache_key, stream
+        )
+        if early_answer is not None:
+            return early_answer
         if api_answer_yandex.status_code != HTTPStatus.OK:
-            msg_error = (f'API Эндпойнт{ENDPOINT} в данный момент недоступен, '
+            msg_error = (f'API Эндпойнт{endpoint} в данный момент недоступен, '
                          f'код ошибки: {api_answer_yandex.status_code}')
-            raise StatusOtherThan200Error(msg_error)
+            raise StatusOtherThan200Error(
+                msg_error, api_answer_yandex.status_code
+            )
         logger.debug('Запрос успешно отправлен.')
 
-        return api_answer_yandex.json()
+        try:
+            return api_answer_yandex.json()
+        except ValueError:
+            if cache is not None:
+                cache.forget(cache_key)
+            raise
 
-    except requests.exceptions.RequestException as error_request:
+    except lazy_import('requests').RequestException as error_request:
         msg_error = f'Ошибка при запросе к API: {error_request}'
-        raise ApiRequestError(msg_error)
+        raise ApiRequestError(msg_error) from error_request
 
 
+@instrumented
 def check_response(response):
     """Проверяет ответ API на соответствие документации."""
     if not isinstance(response, dict):
@@ -111,6 +215,14 @@ def check_response(response):
     return homeworks
 
 
+@functools.lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def render_verdict(homework_name, homework_status):
+    """Текст уведомления о статусе работы, один на пару имя-статус."""
+    verdict = HOMEWORK_VERDICTS[homework_status]
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+@instrumented
 def parse_status(homework):
     """Информация о домашней работе и ее статус."""
     homework_all = ('homework_name', 'status')
@@ -127,53 +239,141 @@ def parse_status(homework):
         message = f'Неизвестный статус работы ревью: {homework_status}'
         raise KeyError(message)
 
-    verdict = HOMEWORK_VERDICTS[homework_status]
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return render_verdict(homework_name, homework_status)
+
+
+def collect_changes(homeworks, last_statuses):
+    """Работы, чей статус отличается от последнего известного.
+
+    Возвращаются в порядке обновления, от давних к свежим.
+    """
+    changed_homeworks = [
+        homework for homework in homeworks
+        if last_statuses.get(homework.get('homework_name'))
+        != homework.get('status')
+    ]
+    changed_homeworks.sort(
+        key=lambda homework: homework.get('date_updated') or ''
+    )
+    return changed_homeworks
+
+
+def join_messages(messages):
+    """Объединяет несколько уведомлений в одно сообщение."""
+    return '\n\n'.join(messages)
+
+
+def main_settings(scheduler):
+    """Настройки одиночного режима, которые можно сменить файлом."""
+    return {
+        'retry_period': scheduler.retry_period,
+        'reviewing_period': scheduler.reviewing_period,
+        'idle_period': scheduler.idle_period,
+        'endpoint': None,
+        'chat_id': None,
+        'templates': None,
+    }
+
+
+def apply_main_settings(scheduler, values):
+    """Подменяет периоды опроса одиночного режима новыми настройками."""
+    scheduler.retry_period = values['retry_period']
+    scheduler.reviewing_period = values['reviewing_period']
+    scheduler.idle_period = values['idle_period']
+    logger.info(f'Применены настройки: период опроса '
+                f'{scheduler.retry_period} с.')
+    return values
+
+
+def render_changes(homeworks, templates=None):
+    """Уведомления об изменившихся работах: шаблоны или HOMEWORK_VERDICTS."""
+    if templates is None:
+        return [parse_status(homework) for homework in homeworks]
+    return [
+        templates.render(homework.get('homework_name'),
+                         homework.get('status'), MAIN_TENANT_ID)
+        for homework in homeworks
+    ]
+
+
+def notify(bot, message, chat_id=None):
+    """Отправка в чат из настроек, а без него - в TELEGRAM_CHAT_ID."""
+    if chat_id is None:
+        send_message(bot, message)
+    else:
+        send_chat_message(bot, chat_id, message)
 
 
 def main():
     """Основная логика работы бота."""
+    from telegram import Bot
+
+    from config import CONFIG_PATH, SettingsSlot, watch_config
     check_tokens()
     bot = Bot(token=TELEGRAM_TOKEN)
-    timestamp = int(time.time())
-    current_report = {
-        'name': '',
-        'output': ''
-    }
+    start_metrics_server()
+    state_store = open_state_store()
+    timestamp = state_store.load_cursor(MAIN_TENANT_ID) or int(time.time())
+    scheduler = AdaptiveScheduler(RETRY_PERIOD)
+    settings = SettingsSlot(main_settings(scheduler))
+    watch_config(settings.request, CONFIG_PATH)
+    current = settings.defaults
+    error_throttle = ErrorThrottle()
+    changed_at = time.time()
+    failures = 0
 
     while True:
+        values = settings.take()
+        if values is not None:
+            current = apply_main_settings(scheduler, values)
         try:
-            response = get_api_answer(timestamp)
-            timestamp = response.get('current_date')
+            response = request_api_answer(
+                timestamp, HEADERS, endpoint=current['endpoint']
+            )
+            current_date = response.get('current_date')
             new_homeworks = response.get('homeworks')
             check_response(response)
             logger.debug('Запрос проверен.')
-            if new_homeworks:
-                homework, *_ = new_homeworks
-                message = parse_status(homework)
-                current_report['name'] = homework.get('homework_name')
-                current_report['output'] = homework.get('status')
-                send_message(bot, message)
+            changed_homeworks = collect_changes(
+                new_homeworks, state_store.statuses(MAIN_TENANT_ID)
+            )
+            if changed_homeworks:
+                message = join_messages(render_changes(
+                    changed_homeworks, current['templates']
+                ))
+                notify(bot, message, current['chat_id'])
                 logger.debug(f'Пользователю отправлено: {message}')
+                changed_at = time.time()
             else:
-                current_report['output'] = 'Новых статусов работ Нет!'
-                logger.debug(current_report['output'])
+                logger.debug('Новых статусов работ Нет!')
+            next_timestamp = (
+                timestamp if current_date is None else current_date
+            )
+            state_store.save(MAIN_TENANT_ID, next_timestamp, {
+                homework.get('homework_name'): homework.get('status')
+                for homework in changed_homeworks
+            })
+            timestamp = next_timestamp
+            failures = 0
+            recovered_message = error_throttle.recovered(MAIN_TENANT_ID)
+            if recovered_message:
+                notify(bot, recovered_message, current['chat_id'])
 
         except Exception as error:
-            last_error = ''
+            failures = failures + 1 if scheduler.is_backoff_error(error) else 0
             message = f'Сбой в работе программы: {error}'
-            logger.error(message, error)
-            if message != last_error:
-                last_error = message
-                send_message(bot, message)
+            logger.error(message, extra={
+                'tenant': MAIN_TENANT_ID, 'error_class': type(error).__name__
+            })
+            if error_throttle.should_notify(MAIN_TENANT_ID, error):
+                notify(bot, message, current['chat_id'])
         finally:
-            time.sleep(RETRY_PERIOD)
+            delay = scheduler.next_delay(
+                state_store.statuses(MAIN_TENANT_ID), changed_at, failures
+            )
+            time.sleep(delay)
 
 
 if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.DEBUG,
-        filename='program.log',
-        format='%(asctime)s, %(levelname)s, %(message)s, %(name)s'
-    )
+    configure_logging('program.log', loggers=[logger])
     main()
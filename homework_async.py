@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sys import exit
+
+from analytics import ANALYTICS_PATH, open_analytics
+from commands import start_command_interface
+from config import CONFIG_PATH, watch_config
+from delivery import DeliveryQueue
+from engine import (SUBSCRIPTIONS_PATH,
+                    PollingEngine,
+                    register_engine_metrics,
+                    )
+from event_log import EVENT_LOG_PATH, open_event_log
+from homework import (HEADERS,
+                      TELEGRAM_CHAT_ID,
+                      TELEGRAM_TOKEN,
+                      lazy_import,
+                      make_headers,
+                      request_api_answer,
+                      send_chat_message,
+                      )
+from metrics import start_metrics_server
+from state_store import STATE_STORE_PATH, open_state_store
+from streaming import HomeworkStream
+from structured_logging import configure_logging
+from tenants import open_registry
+
+ASYNC_CONCURRENCY = int(os.getenv('ASYNC_CONCURRENCY', 100))
+
+logger = logging.getLogger(__name__)
+
+
+async def get_api_answer_async(timestamp, headers=HEADERS, executor=None,
+                               cache=None, stream=False, circuit=None,
+                               endpoint=None):
+    """Асинхронный вариант get_api_answer.
+
+    requests остаётся блокирующим, поэтому запрос выполняется в пуле
+    потоков, а цикл событий тем временем обслуживает другие опросы.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, request_api_answer, timestamp, headers, cache, stream,
+        circuit, endpoint
+    )
+
+
+async def send_message_async(bot, message, chat_id=TELEGRAM_CHAT_ID,
+                             executor=None):
+    """Асинхронный вариант send_message."""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        executor, send_chat_message, bot, chat_id, message
+    )
+
+
+class AsyncPollingEngine(PollingEngine):
+    """Опрос подписчиков конкурентными задачами asyncio.
+
+    Каждый опрос - отдельная задача: запрос к API, разбор ответа и
+    доставка сообщений. Число одновременных опросов ограничено
+    семафором и размером пула потоков.
+    """
+
+    def __init__(self, registry, bot, concurrency=ASYNC_CONCURRENCY,
+                 **kwargs):
+        """Движок с пулом из concurrency потоков для запросов."""
+        super().__init__(registry, bot, **kwargs)
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='homework-poll'
+        )
+        self._semaphore = None
+        self._tasks = set()
+
+    async def poll_tenant_async(self, cursor):
+        """Асинхронный цикл опроса подписчика."""
+        async with self._semaphore:
+            chat_id = cursor.tenant.chat_id
+            error = None
+            try:
+                response = await get_api_answer_async(
+                    cursor.timestamp,
+                    make_headers(cursor.tenant.practicum_token),
+                    executor=self._executor,
+                    cache=self.response_cache,
+                    stream=self.stream_responses,
+                    circuit=self.circuit_breaker,
+                    endpoint=self.endpoint
+                )
+                if isinstance(response, HomeworkStream):
+                    loop = asyncio.get_running_loop()
+                    messages = await loop.run_in_executor(
+                        self._executor, self.process_response, cursor, response
+                    )
+                else:
+                    messages = self.process_response(cursor, response)
+            except Exception as poll_error:
+                error = poll_error
+                messages = self.error_messages(cursor, error)
+            if self.delivery is not None:
+                for message in messages:
+                    self.delivery.put(chat_id, message)
+            else:
+                await asyncio.gather(*(
+                    send_message_async(
+                        self.bot, message, chat_id, executor=self._executor
+                    )
+                    for message in messages
+                ))
+        self.reschedule(cursor, time.time(), error)
+
+    def dispatch(self, now=None):
+        """Запускает задачи опроса для подписчиков, чей срок наступил."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        now = time.time() if now is None else now
+        started = 0
+        for cursor in self.pop_due(now):
+            task = asyncio.create_task(self.poll_tenant_async(cursor))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            started += 1
+        return started
+
+    async def drain(self):
+        """Ожидает завершения запущенных опросов."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def run_forever(self):
+        """Цикл событий: просыпается точно к ближайшему сроку опроса."""
+        try:
+            while True:
+                self.dispatch()
+                next_due = self.next_due()
+                delay = self.refresh_period
+                if next_due is not None:
+                    delay = min(delay, next_due - time.time())
+                await asyncio.sleep(max(delay, 0))
+                self.state_store.flush()
+        finally:
+            self._executor.shutdown(wait=False)
+            self.state_store.close()
+            if self.event_log is not None:
+                self.event_log.close()
+
+
+def main():
+    """Точка входа асинхронного многопользовательского режима."""
+    parser = argparse.ArgumentParser(
+        description='Асинхронный опрос статусов домашних работ.'
+    )
+    parser.add_argument('--registry', default=SUBSCRIPTIONS_PATH)
+    parser.add_argument('--state', default=STATE_STORE_PATH)
+    parser.add_argument('--concurrency', type=int, default=ASYNC_CONCURRENCY)
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--commands', action='store_true')
+    parser.add_argument('--events', default=EVENT_LOG_PATH)
+    parser.add_argument('--analytics', default=ANALYTICS_PATH)
+    parser.add_argument('--config', default=CONFIG_PATH)
+    arguments = parser.parse_args()
+    if not TELEGRAM_TOKEN:
+        no_token_msg = ('Бот не работает!'
+                        'Отсутствует переменная окружения:TELEGRAM_TOKEN!')
+        logger.critical(no_token_msg)
+        exit(no_token_msg)
+    bot = lazy_import('telegram').Bot(token=TELEGRAM_TOKEN)
+    engine = AsyncPollingEngine(
+        open_registry(arguments.registry),
+        bot,
+        concurrency=arguments.concurrency,
+        state_store=open_state_store(arguments.state),
+        delivery=DeliveryQueue(bot),
+        stream_responses=arguments.stream,
+        event_log=open_event_log(arguments.events),
+        analytics=open_analytics(arguments.analytics)
+    )
+    register_engine_metrics(engine)
+    start_metrics_server()
+    updater = (start_command_interface(engine, TELEGRAM_TOKEN)
+               if arguments.commands else None)
+    config_watcher = watch_config(engine.request_settings,
+                                  arguments.config)
+    try:
+        asyncio.run(engine.run_forever())
+    finally:
+        if config_watcher is not None:
+            config_watcher.stop()
+        if engine.analytics is not None:
+            engine.analytics.flush()
+        engine.delivery.close(timeout=engine.refresh_period)
+        if updater is not None:
+            updater.stop()
+
+
+if __name__ == '__main__':
+    configure_logging('program.log')
+    main()
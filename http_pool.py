@@ -0,0 +1,95 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """HTTP-адаптер, считающий новые и переиспользованные соединения."""
+
+    def __init__(self, *args, **kwargs):
+        """Адаптер с пустым учётом пулов соединений."""
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        """Отправка запроса с запоминанием пула соединений хоста."""
+        pool = self.get_connection(request.url, kwargs.get('proxies'))
+        with self._pools_lock:
+            self._pools.setdefault(id(pool), pool)
+        return super().send(request, *args, **kwargs)
+
+    def connection_stats(self):
+        """Число запросов, новых и переиспользованных соединений."""
+        with self._pools_lock:
+            pools = list(self._pools.values())
+        requests_count = sum(pool.num_requests for pool in pools)
+        new_connections = sum(pool.num_connections for pool in pools)
+        return {
+            'requests': requests_count,
+            'new_connections': new_connections,
+            'reused_connections': max(requests_count - new_connections, 0),
+        }
+
+
+class PracticumSession(requests.Session):
+    """Сессия с пулом keep-alive соединений, повторами и таймаутами."""
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES,
+                 timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        """Сессия с адаптером на pool_size соединений и retries повторами."""
+        super().__init__()
+        self.timeout = timeout
+        self.adapter = CountingHTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.5,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({'GET'}),
+                raise_on_status=False,
+            )
+        )
+        self.mount('https://', self.adapter)
+        self.mount('http://', self.adapter)
+
+    def request(self, method, url, **kwargs):
+        """Запрос с таймаутом по умолчанию: без него запрос может висеть."""
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+    def connection_stats(self):
+        """Статистика соединений пула."""
+        return self.adapter.connection_stats()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Общая для всех опросов сессия, создаётся при первом обращении."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = PracticumSession()
+    return _session
+
+
+def close_session():
+    """Закрывает общую сессию и её соединения."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
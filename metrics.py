@@ -0,0 +1,257 @@
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = os.getenv('METRICS_PORT')
+DURATION_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _format_labels(label_names, label_values, extra=()):
+    pairs = list(zip(label_names, label_values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\')
+                         .replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class Counter:
+    """Монотонный счётчик с метками."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        """Счётчик name с метками label_names."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        """Увеличивает счётчик для набора меток."""
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels):
+        """Текущее значение счётчика для набора меток."""
+        key = tuple(labels[name] for name in self.label_names)
+        return self._values.get(key, 0)
+
+    def samples(self):
+        """Строки текстового формата Prometheus."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            labels = _format_labels(self.label_names, key)
+            yield f'{self.name}{labels} {value}'
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными корзинами."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(),
+                 buckets=DURATION_BUCKETS):
+        """Гистограмма name с метками label_names и корзинами buckets."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Учитывает одно наблюдение."""
+        key = tuple(labels[name] for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [
+                    [0] * (len(self.buckets) + 1), 0.0
+                ]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def count(self, **labels):
+        """Число наблюдений для набора меток."""
+        key = tuple(labels[name] for name in self.label_names)
+        counts = self._values.get(key)
+        return sum(counts[0]) if counts else 0
+
+    def samples(self):
+        """Строки текстового формата Prometheus."""
+        with self._lock:
+            values = [(key, list(counts[0]), counts[1])
+                      for key, counts in self._values.items()]
+        for key, bucket_counts, total in values:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                    self.buckets + ('+Inf',), bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.label_names, key, [('le', bound)]
+                )
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = _format_labels(self.label_names, key)
+            yield f'{self.name}_sum{labels} {total}'
+            yield f'{self.name}_count{labels} {cumulative}'
+
+
+class MetricsRegistry:
+    """Набор метрик процесса и их выдача в текстовом формате Prometheus."""
+
+    def __init__(self):
+        """Пустой набор метрик."""
+        self._metrics = []
+        self._stats = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику в выдачу."""
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix, documentation, stats):
+        """Выдаёт словарь stats() как набор gauge-метрик prefix_<ключ>."""
+        with self._lock:
+            self._stats.append((prefix, documentation, stats))
+
+    def render(self):
+        """Текст для эндпойнта /metrics."""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+            stats = list(self._stats)
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        for prefix, documentation, collect in stats:
+            try:
+                values = collect()
+            except Exception as error:
+                logger.error(f'Метрики {prefix} недоступны: {error}')
+                continue
+            for key, value in values.items():
+                lines.append(f'# HELP {prefix}_{key} {documentation}')
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+CALL_DURATION = REGISTRY.register(Histogram(
+    'homework_bot_call_duration_seconds',
+    'Длительность функций цикла опроса.',
+    ('function',)
+))
+CALL_EXCEPTIONS = REGISTRY.register(Counter(
+    'homework_bot_exceptions_total',
+    'Исключения функций цикла опроса по классам.',
+    ('function', 'exception')
+))
+
+
+def instrumented(func=None, name=None):
+    """Замер длительности и подсчёт исключений функции.
+
+    name - значение метки function вместо имени функции, чтобы разные
+    реализации одного этапа попадали в один ряд.
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    function_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception as error:
+            CALL_EXCEPTIONS.inc(
+                function=function_name, exception=type(error).__name__
+            )
+            raise
+        finally:
+            CALL_DURATION.observe(
+                time.perf_counter() - started, function=function_name
+            )
+
+    return wrapper
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST,
+                         registry=REGISTRY):
+    """Запускает /metrics в фоновом потоке; без порта ничего не делает."""
+    if port is None or port == '':
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('UTF-8')
+            self.send_response(200)
+            self.send_header(
+                'Content-Type', 'text/plain; version=0.0.4; charset=utf-8'
+            )
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(
+        target=server.serve_forever, name='metrics', daemon=True
+    ).start()
+    logger.debug(f'Метрики доступны на http://{host}:{port}/metrics')
+    return server
+
+
+def instrumented_iter(iterable, function_name):
+    """Замер суммарного времени чтения итератора и подсчёт его исключений.
+
+    Для ленивого разбора, где работа идёт не при вызове функции, а при
+    переборе результата: одно наблюдение на весь перебор.
+    """
+    elapsed = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    except Exception as error:
+        CALL_EXCEPTIONS.inc(
+            function=function_name, exception=type(error).__name__
+        )
+        raise
+    finally:
+        CALL_DURATION.observe(elapsed, function=function_name)
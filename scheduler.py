@@ -0,0 +1,63 @@
+import random
+import time
+
+from exceptions_api_answer import (ApiRequestError, CircuitOpenError,
+                                   StatusOtherThan200Error)
+
+REVIEWING_PERIOD = 120
+IDLE_PERIOD = 3600
+IDLE_AFTER = 3 * 24 * 60 * 60
+BACKOFF_BASE = 60
+BACKOFF_MAX = 3600
+BACKOFF_ERRORS = (StatusOtherThan200Error, ApiRequestError, CircuitOpenError)
+
+
+class AdaptiveScheduler:
+    """Интервал до следующего опроса в зависимости от состояния работ.
+
+    Пока работа на ревью, опрос идёт чаще RETRY_PERIOD; если давно ничего
+    не менялось и на проверке ничего нет, реже. После сбоев API интервал
+    растёт экспоненциально со случайным разбросом, чтобы подписчики не
+    возвращались к API одновременно.
+    """
+
+    def __init__(self, retry_period, reviewing_period=REVIEWING_PERIOD,
+                 idle_period=IDLE_PERIOD, idle_after=IDLE_AFTER,
+                 backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 rng=None):
+        """Периоды опроса в секундах; rng - источник случайного разброса."""
+        self.retry_period = retry_period
+        self.reviewing_period = reviewing_period
+        self.idle_period = idle_period
+        self.idle_after = idle_after
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rng = rng or random.Random()
+
+    @staticmethod
+    def is_backoff_error(error):
+        """Ошибка, после которой API нужно дать передышку."""
+        return isinstance(error, BACKOFF_ERRORS)
+
+    def backoff(self, failures):
+        """Экспоненциальная задержка с разбросом после failures сбоев."""
+        ceiling = min(
+            self.backoff_max, self.backoff_base * 2 ** (failures - 1)
+        )
+        return ceiling / 2 + self.rng.uniform(0, ceiling / 2)
+
+    def next_delay(self, statuses, changed_at, failures=0, now=None):
+        """Задержка до следующего опроса в секундах.
+
+        statuses - последние известные статусы работ подписчика,
+        changed_at - время последнего изменения статуса,
+        failures - число сбоев API подряд.
+        """
+        if failures:
+            return self.backoff(failures)
+        if 'reviewing' in statuses.values():
+            return self.reviewing_period
+        now = time.time() if now is None else now
+        if now - changed_at >= self.idle_after:
+            return self.idle_period
+        return self.retry_period
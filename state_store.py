@@ -0,0 +1,252 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+STATE_STORE_PATH = os.getenv('STATE_STORE_PATH')
+STATE_FLUSH_INTERVAL = 1.0
+STATE_FLUSH_BATCH = 500
+STATE_COMPACT_FACTOR = 4
+
+
+class MemoryStateStore:
+    """Курсоры from_date и последние статусы работ подписчиков.
+
+    Хранит состояние в памяти; наследники дополнительно записывают его
+    на диск. Запись на диск копится и сбрасывается пачкой: по числу
+    изменений или по времени, чтобы fsync не стоял в каждом цикле опроса.
+    """
+
+    def __init__(self, flush_interval=STATE_FLUSH_INTERVAL,
+                 flush_batch=STATE_FLUSH_BATCH):
+        """Пустое состояние; сброс по flush_interval и flush_batch."""
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._cursors = {}
+        self._statuses = {}
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _apply(self, tenant_id, timestamp, statuses):
+        if timestamp is not None:
+            self._cursors[tenant_id] = timestamp
+        if statuses:
+            self._statuses.setdefault(tenant_id, {}).update(statuses)
+
+    def _restore(self, tenant_id, timestamp, statuses):
+        if timestamp is None:
+            self._cursors.pop(tenant_id, None)
+        else:
+            self._cursors[tenant_id] = timestamp
+        known = self._statuses.setdefault(tenant_id, {})
+        for homework_name, status in statuses.items():
+            if status is None:
+                known.pop(homework_name, None)
+            else:
+                known[homework_name] = status
+        if not known:
+            del self._statuses[tenant_id]
+
+    def _write(self, tenant_id, timestamp, statuses):
+        """Запись изменения в хранилище, без гарантии попадания на диск."""
+
+    def _sync(self):
+        """Сброс накопленных записей на диск."""
+
+    def load_cursor(self, tenant_id):
+        """Сохранённый курсор from_date подписчика или None."""
+        return self._cursors.get(tenant_id)
+
+    def last_status(self, tenant_id, homework_name):
+        """Последний известный статус работы или None."""
+        return self._statuses.get(tenant_id, {}).get(homework_name)
+
+    def statuses(self, tenant_id):
+        """Последние известные статусы всех работ подписчика."""
+        return dict(self._statuses.get(tenant_id, {}))
+
+    def tenants(self):
+        """Подписчики, для которых есть сохранённое состояние."""
+        return set(self._cursors) | set(self._statuses)
+
+    def save(self, tenant_id, timestamp, statuses=None):
+        """Сохраняет итог успешного цикла опроса подписчика.
+
+        Если запись или сброс на диск не удались, состояние в памяти
+        остаётся прежним: повторный опрос снова найдёт эти изменения.
+        """
+        with self._lock:
+            self._write(tenant_id, timestamp, statuses)
+            self._pending += 1
+            known = self._statuses.get(tenant_id, {})
+            previous = {name: known.get(name) for name in statuses or ()}
+            previous_cursor = self._cursors.get(tenant_id)
+            self._apply(tenant_id, timestamp, statuses)
+            try:
+                if (self._pending >= self.flush_batch
+                        or time.monotonic() - self._flushed_at
+                        >= self.flush_interval):
+                    self._flush_locked()
+            except Exception:
+                self._restore(tenant_id, previous_cursor, previous)
+                raise
+
+    def _flush_locked(self):
+        self._sync()
+        self._pending = 0
+        self._flushed_at = time.monotonic()
+
+    def flush(self):
+        """Сбрасывает накопленные изменения на диск."""
+        with self._lock:
+            if self._pending:
+                self._flush_locked()
+
+    def close(self):
+        """Сбрасывает изменения и освобождает ресурсы."""
+        self.flush()
+
+
+class AppendOnlyStateStore(MemoryStateStore):
+    """Состояние в журнале JSON-строк, дописываемом в конец файла.
+
+    При открытии журнал проигрывается заново; недописанная последняя
+    строка (сбой посреди записи) отбрасывается. Когда журнал становится
+    много длиннее актуального состояния, он сжимается в снимок.
+    """
+
+    def __init__(self, path, compact_factor=STATE_COMPACT_FACTOR, **kwargs):
+        """Проигрывает журнал path и открывает его на дописывание."""
+        super().__init__(**kwargs)
+        self.path = path
+        self.compact_factor = compact_factor
+        self._records = 0
+        if os.path.exists(path):
+            self._replay()
+        self._file = open(path, 'a', encoding='UTF-8')
+
+    def _replay(self):
+        valid_size = 0
+        with open(self.path, 'rb') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(record['t'], record.get('c'), record.get('s'))
+                self._records += 1
+                valid_size += len(line)
+        if valid_size != os.path.getsize(self.path):
+            with open(self.path, 'r+b') as journal:
+                journal.truncate(valid_size)
+
+    @staticmethod
+    def _dump(tenant_id, timestamp, statuses):
+        record = {'t': tenant_id}
+        if timestamp is not None:
+            record['c'] = timestamp
+        if statuses:
+            record['s'] = statuses
+        return json.dumps(
+            record, ensure_ascii=False, separators=(',', ':')
+        ) + '\n'
+
+    def _write(self, tenant_id, timestamp, statuses):
+        self._file.write(self._dump(tenant_id, timestamp, statuses))
+        self._records += 1
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        live_records = len(self.tenants())
+        if self._records > self.compact_factor * max(live_records, 1):
+            self._compact()
+
+    def _compact(self):
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w', encoding='UTF-8') as snapshot:
+            for tenant_id in self.tenants():
+                snapshot.write(self._dump(
+                    tenant_id,
+                    self._cursors.get(tenant_id),
+                    self._statuses.get(tenant_id)
+                ))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        self._file.close()
+        os.replace(temporary_path, self.path)
+        self._file = open(self.path, 'a', encoding='UTF-8')
+        self._records = len(self.tenants())
+
+    def close(self):
+        """Сбрасывает журнал на диск и закрывает файл."""
+        super().close()
+        self._file.close()
+
+
+class SQLiteStateStore(MemoryStateStore):
+    """Состояние в базе SQLite; изменения фиксируются пачкой транзакций.
+
+    Строки копятся в памяти и пишутся одной короткой транзакцией при
+    сбросе, чтобы блокировка записи не держалась между циклами опроса
+    и не мешала другим процессам с той же базой.
+    """
+
+    def __init__(self, path, **kwargs):
+        """Открывает базу path и загружает из неё состояние."""
+        super().__init__(**kwargs)
+        self.path = path
+        self._cursor_rows = {}
+        self._status_rows = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'CREATE TABLE IF NOT EXISTS cursors ('
+            'tenant_id INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS statuses ('
+            'tenant_id INTEGER NOT NULL, homework_name TEXT NOT NULL, '
+            'status TEXT NOT NULL, PRIMARY KEY (tenant_id, homework_name));'
+        )
+        for tenant_id, timestamp in self._connection.execute(
+                'SELECT tenant_id, timestamp FROM cursors'):
+            self._apply(tenant_id, timestamp, None)
+        for tenant_id, homework_name, status in self._connection.execute(
+                'SELECT tenant_id, homework_name, status FROM statuses'):
+            self._apply(tenant_id, None, {homework_name: status})
+
+    def _write(self, tenant_id, timestamp, statuses):
+        if timestamp is not None:
+            self._cursor_rows[tenant_id] = timestamp
+        for name, status in (statuses or {}).items():
+            self._status_rows[tenant_id, name] = status
+
+    def _sync(self):
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO cursors VALUES (?, ?)',
+                self._cursor_rows.items()
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO statuses VALUES (?, ?, ?)',
+                [(tenant_id, name, status) for (tenant_id, name), status
+                 in self._status_rows.items()]
+            )
+        self._cursor_rows.clear()
+        self._status_rows.clear()
+
+    def close(self):
+        """Фиксирует изменения и закрывает соединение."""
+        super().close()
+        self._connection.close()
+
+
+def open_state_store(path=STATE_STORE_PATH):
+    """Хранилище состояния по пути: .sqlite3/.db, журнал или память."""
+    if not path:
+        return MemoryStateStore()
+    if path.endswith(('.sqlite3', '.db')):
+        return SQLiteStateStore(path)
+    return AppendOnlyStateStore(path)
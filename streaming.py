@@ -0,0 +1,143 @@
+import codecs
+import json
+from http import HTTPStatus
+
+STREAM_CHUNK_SIZE = 16384
+STREAM_MIN_BYTES = 65536
+
+_decoder = json.JSONDecoder()
+
+
+class HomeworkStream:
+    """Работы из тела ответа API по мере его чтения.
+
+    Тело разбирается по частям: в памяти держится только ещё не
+    разобранный хвост и текущая работа, а не весь список. Итерация
+    выдаёт словари работ; после неё доступна current_date. Ошибки
+    структуры те же, что у check_response: TypeError и KeyError,
+    а некорректный JSON - ValueError.
+    """
+
+    def __init__(self, chunks, close=None):
+        """Поток по частям тела chunks; close закрывает ответ."""
+        self.current_date = None
+        self._chunks = iter(chunks)
+        self._close = close
+        self._text = codecs.getincrementaldecoder('UTF-8')()
+        self._buffer = ''
+        self._position = 0
+        self._exhausted = False
+
+    @classmethod
+    def from_response(cls, response, chunk_size=STREAM_CHUNK_SIZE):
+        """Поток работ из ответа requests, запрошенного с stream=True."""
+        return cls(response.iter_content(chunk_size), response.close)
+
+    def close(self):
+        """Освобождает соединение, даже если тело прочитано не до конца."""
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def _read(self):
+        if self._exhausted:
+            return False
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+        for chunk in self._chunks:
+            text = self._text.decode(chunk) if isinstance(
+                chunk, bytes) else chunk
+            if text:
+                self._buffer += text
+                return True
+        self._buffer += self._text.decode(b'', final=True)
+        self._exhausted = True
+        return False
+
+    def _peek(self):
+        while True:
+            while (self._position < len(self._buffer)
+                   and self._buffer[self._position].isspace()):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                return ''
+
+    def _expect(self, expected):
+        char = self._peek()
+        if not char or char not in expected:
+            raise ValueError(
+                f'Некорректный JSON в ответе API: ожидался один из {expected}'
+            )
+        self._position += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._position)
+            except ValueError:
+                if not self._read():
+                    raise
+                continue
+            if end == len(self._buffer) and self._read():
+                continue
+            self._position = end
+            return value
+
+    def _homeworks(self):
+        if self._peek() != '[':
+            raise TypeError('Проверка ответа API списка')
+        self._position += 1
+        if self._peek() == ']':
+            self._position += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        """Словари работ по мере чтения тела."""
+        try:
+            first = self._peek()
+            if not first:
+                raise ValueError('Пустой ответ API')
+            if first != '{':
+                raise TypeError('Ошибка в типе ответа API')
+            self._position += 1
+            has_homeworks = False
+            while self._peek() != '}':
+                key = self._value()
+                self._expect(':')
+                if key == 'homeworks':
+                    has_homeworks = True
+                    yield from self._homeworks()
+                else:
+                    value = self._value()
+                    if key == 'current_date':
+                        self.current_date = value
+                if self._expect(',}') == '}':
+                    break
+            else:
+                self._position += 1
+            if not has_homeworks:
+                raise KeyError('Нет ключа в ответе API')
+        finally:
+            self.close()
+
+
+def stream_or_read(response, min_bytes=STREAM_MIN_BYTES):
+    """Поток работ HomeworkStream для большого успешного ответа.
+
+    Ответ с ошибкой или небольшим Content-Length читается целиком, чтобы
+    вернуть соединение в пул, и тогда возвращается None.
+    """
+    length = response.headers.get('Content-Length')
+    if response.status_code == HTTPStatus.OK and (
+            length is None or int(length) >= min_bytes):
+        return HomeworkStream.from_response(response)
+    response.content
+    return None
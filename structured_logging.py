@@ -0,0 +1,124 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 100))
+LOG_SAMPLE_KEYS = 10000
+LOG_FIELDS = ('tenant', 'homework', 'duration', 'error_class', 'sampled')
+
+
+class JsonFormatter(logging.Formatter):
+    """Компактная JSON-строка на запись лога."""
+
+    def format(self, record):
+        """Запись с полями подписчика, работы, длительности и ошибки."""
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in LOG_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает каждую every-ю из одинаковых DEBUG-записей.
+
+    Одинаковыми считаются записи из одной строки кода: текст сообщения
+    в f-строке у каждой записи свой. Записи уровня выше level проходят
+    всегда. У пропущенной записи поле sampled показывает, сколько
+    подобных записей она представляет.
+    """
+
+    def __init__(self, every=LOG_SAMPLE_EVERY, level=logging.DEBUG):
+        """Фильтр с пустыми счётчиками записей."""
+        super().__init__()
+        self.every = every
+        self.level = level
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        """Решает, попадёт ли запись в очередь."""
+        if record.levelno > self.level or self.every <= 1:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            if len(self._counts) >= LOG_SAMPLE_KEYS:
+                self._counts.clear()
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        if count % self.every:
+            return False
+        record.sampled = self.every
+        return True
+
+
+def _start_listener(handlers, sample_every):
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(sample_every))
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    return queue_handler, listener
+
+
+def setup_queue_logging(filename='program.log', level=logging.DEBUG,
+                        sample_every=LOG_SAMPLE_EVERY, loggers=()):
+    """Логирование через очередь: запись в файл идёт в фоновом потоке.
+
+    Поток опроса только кладёт запись в очередь; форматирование в JSON и
+    файловый ввод-вывод выполняет QueueListener. Обработчики логгеров из
+    loggers остаются у своих логгеров, но за отдельной очередью, и тоже
+    пишут JSON: в их файлы не попадают записи других логгеров.
+    """
+    formatter = JsonFormatter()
+    for named_logger in loggers:
+        handlers = list(named_logger.handlers)
+        if not handlers:
+            continue
+        for handler in handlers:
+            named_logger.removeHandler(handler)
+            handler.setFormatter(formatter)
+        queue_handler, _ = _start_listener(handlers, sample_every)
+        named_logger.addHandler(queue_handler)
+    file_handler = RotatingFileHandler(
+        filename, maxBytes=50000000, encoding='UTF-8'
+    )
+    file_handler.setFormatter(formatter)
+    queue_handler, listener = _start_listener(
+        [file_handler], sample_every
+    )
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    return listener
+
+
+def configure_logging(filename='program.log', loggers=()):
+    """Настройка логов процесса по LOG_FORMAT: text или json."""
+    if LOG_FORMAT == 'json':
+        return setup_queue_logging(filename, loggers=loggers)
+    logging.basicConfig(
+        level=logging.DEBUG,
+        filename=filename,
+        format='%(asctime)s, %(levelname)s, %(message)s, %(name)s',
+        force=True
+    )
+    return None
@@ -0,0 +1,288 @@
+import argparse
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from sys import exit
+
+from analytics import ANALYTICS_PATH, open_analytics, shard_path
+from config import CONFIG_PATH, watch_config
+from delivery import TELEGRAM_GLOBAL_RATE, DeliveryQueue
+from engine import (REGISTRY_REFRESH_PERIOD, SUBSCRIPTIONS_PATH,
+                    PollingEngine, register_engine_metrics)
+from event_log import open_event_log
+from homework import TELEGRAM_TOKEN, lazy_import
+from metrics import METRICS_PORT, start_metrics_server
+from state_store import STATE_STORE_PATH, open_state_store
+from structured_logging import configure_logging
+from tenants import open_registry
+
+SHARD_WORKERS = int(os.getenv('SHARD_WORKERS', os.cpu_count() or 1))
+HASH_RING_REPLICAS = 160
+WORKER_RESTART_DELAY = 1.0
+WORKER_STOP_TIMEOUT = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key):
+    digest = hashlib.md5(str(key).encode(), usedforsecurity=False).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+class HashRing:
+    """Согласованное хеширование подписчиков по shards процессам.
+
+    У каждого процесса replicas точек на кольце; подписчик достаётся
+    процессу ближайшей точки по часовой стрелке. При добавлении процесса
+    переезжает только около 1/shards подписчиков, и только на новый.
+    """
+
+    def __init__(self, shards, replicas=HASH_RING_REPLICAS):
+        """Кольцо из replicas точек на каждый из shards процессов."""
+        self.shards = shards
+        points = sorted(
+            (_hash(f'{shard}:{replica}'), shard)
+            for shard in range(shards)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key):
+        """Номер процесса, который опрашивает подписчика key."""
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._shards[index]
+
+
+class ShardedRegistry:
+    """Реестр подписок, из которого процесс видит только свою долю.
+
+    shards - число процессов: целое или multiprocessing.Value, которое
+    супервизор меняет при масштабировании; кольцо пересчитывается, когда
+    число меняется.
+    """
+
+    def __init__(self, registry, shard, shards):
+        """Доля shard реестра registry при shards процессах."""
+        self.registry = registry
+        self.shard = shard
+        self.shards = shards
+        self._ring = None
+
+    def _shard_count(self):
+        return getattr(self.shards, 'value', self.shards)
+
+    def ring(self):
+        """Кольцо для текущего числа процессов."""
+        count = self._shard_count()
+        if self._ring is None or self._ring.shards != count:
+            self._ring = HashRing(count)
+        return self._ring
+
+    def tenants(self):
+        """Подписки, которые опрашивает этот процесс."""
+        ring = self.ring()
+        return [tenant for tenant in self.registry.tenants()
+                if ring.shard_for(tenant.tenant_id) == self.shard]
+
+    def __getattr__(self, name):
+        """Прочие методы - от общего реестра."""
+        return getattr(self.registry, name)
+
+
+def shard_rate(shards, rate=TELEGRAM_GLOBAL_RATE):
+    """Доля общего лимита rate на процесс при текущем числе shards."""
+    return lambda: rate / getattr(shards, 'value', shards)
+
+
+def run_worker(shard, shards, start_delay, registry_path, state_path,
+               stream=False, config_path=None):
+    """Процесс опроса доли подписчиков shard из shards.
+
+    Статистика проверки процесса пишется в свой файл shard_path, а
+    engine.py report объединяет файлы всех процессов.
+    """
+    signal.signal(signal.SIGTERM, lambda *args: exit(0))
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    for signum in (signal.SIGTTIN, signal.SIGTTOU):
+        signal.signal(signum, signal.SIG_IGN)
+    configure_logging(f'program-{shard}.log')
+    time.sleep(start_delay)
+    bot = lazy_import('telegram').Bot(token=TELEGRAM_TOKEN)
+    count = getattr(shards, 'value', shards)
+    engine = PollingEngine(
+        ShardedRegistry(open_registry(registry_path), shard, shards),
+        bot,
+        state_store=open_state_store(state_path),
+        delivery=DeliveryQueue(bot, global_rate=shard_rate(shards)),
+        stream_responses=stream,
+        event_log=open_event_log(),
+        analytics=open_analytics(shard_path(ANALYTICS_PATH, shard))
+    )
+    register_engine_metrics(engine)
+    if METRICS_PORT:
+        start_metrics_server(port=int(METRICS_PORT) + shard)
+    logger.debug(f'Процесс {shard} из {count} запущен')
+    config_watcher = watch_config(engine.request_settings, config_path)
+    try:
+        engine.run_forever()
+    finally:
+        if config_watcher is not None:
+            config_watcher.stop()
+        engine.state_store.close()
+        if engine.event_log is not None:
+            engine.event_log.close()
+        if engine.analytics is not None:
+            engine.analytics.flush()
+        engine.delivery.close(timeout=REGISTRY_REFRESH_PERIOD)
+
+
+class Supervisor:
+    """Запускает процессы опроса, перезапускает упавшие, масштабирует.
+
+    SIGTTIN добавляет процесс, SIGTTOU убирает, SIGTERM и SIGINT
+    останавливают всех. Новый процесс начинает опрос через
+    REGISTRY_REFRESH_PERIOD, когда прежние владельцы его подписчиков
+    уже перечитали кольцо и отпустили их. При уменьшении оставшиеся
+    процессы перезапускаются, чтобы принять подписчиков убранного
+    с актуальным состоянием из общего хранилища.
+    """
+
+    def __init__(self, workers, target=run_worker, args=(),
+                 restart_delay=WORKER_RESTART_DELAY,
+                 scale_up_delay=REGISTRY_REFRESH_PERIOD):
+        """Супервизор workers процессов target."""
+        self.shards = multiprocessing.Value('i', workers)
+        self.target = target
+        self.args = args
+        self.restart_delay = restart_delay
+        self.scale_up_delay = scale_up_delay
+        self.processes = {}
+        self.restarts = 0
+        self._signals = []
+
+    def spawn(self, shard, start_delay=0.0):
+        """Запускает процесс доли shard."""
+        process = multiprocessing.Process(
+            target=self.target,
+            args=(shard, self.shards, start_delay, *self.args),
+            name=f'homework-shard-{shard}',
+            daemon=False
+        )
+        process.start()
+        self.processes[shard] = process
+        return process
+
+    def stop_worker(self, shard, timeout=WORKER_STOP_TIMEOUT):
+        """Останавливает процесс доли shard, давая ему сохранить состояние."""
+        process = self.processes.pop(shard, None)
+        if process is None:
+            return
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    def start(self):
+        """Запускает все процессы."""
+        for shard in range(self.shards.value):
+            self.spawn(shard)
+
+    def check(self):
+        """Перезапускает упавшие процессы, возвращает их число."""
+        restarted = 0
+        for shard, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            logger.error(f'Процесс {shard} завершился с кодом '
+                         f'{process.exitcode}, перезапуск')
+            self.spawn(shard)
+            restarted += 1
+        self.restarts += restarted
+        return restarted
+
+    def scale_up(self):
+        """Добавляет процесс; его доля переезжает к нему от остальных."""
+        with self.shards.get_lock():
+            shard = self.shards.value
+            self.shards.value += 1
+        self.spawn(shard, start_delay=self.scale_up_delay)
+        logger.info(f'Процессов опроса: {shard + 1}')
+
+    def scale_down(self):
+        """Убирает последний процесс и перезапускает остальные."""
+        if self.shards.value <= 1:
+            return
+        shard = self.shards.value - 1
+        self.stop_worker(shard)
+        with self.shards.get_lock():
+            self.shards.value = shard
+        for remaining in list(self.processes):
+            self.stop_worker(remaining)
+            self.spawn(remaining)
+        logger.info(f'Процессов опроса: {shard}')
+
+    def stop(self):
+        """Останавливает все процессы."""
+        for shard in list(self.processes):
+            self.stop_worker(shard)
+
+    def _on_signal(self, signum, frame):
+        self._signals.append(signum)
+
+    def run(self):
+        """Цикл супервизора до SIGTERM или SIGINT."""
+        for signum in (signal.SIGTERM, signal.SIGINT,
+                       signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, self._on_signal)
+        self.start()
+        try:
+            while True:
+                while self._signals:
+                    signum = self._signals.pop(0)
+                    if signum in (signal.SIGTERM, signal.SIGINT):
+                        return
+                    if signum == signal.SIGTTIN:
+                        self.scale_up()
+                    else:
+                        self.scale_down()
+                self.check()
+                time.sleep(self.restart_delay)
+        finally:
+            self.stop()
+
+
+def main():
+    """Точка входа многопроцессного режима."""
+    parser = argparse.ArgumentParser(
+        description='Опрос подписчиков несколькими процессами.'
+    )
+    parser.add_argument('--workers', type=int, default=SHARD_WORKERS)
+    parser.add_argument('--registry', default=SUBSCRIPTIONS_PATH)
+    parser.add_argument('--state', default=STATE_STORE_PATH)
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--config', default=CONFIG_PATH)
+    arguments = parser.parse_args()
+    if not TELEGRAM_TOKEN:
+        no_token_msg = ('Бот не работает!'
+                        'Отсутствует переменная окружения:TELEGRAM_TOKEN!')
+        logger.critical(no_token_msg)
+        exit(no_token_msg)
+    if not (arguments.state or '').endswith(('.sqlite3', '.db')):
+        exit('Процессам нужно общее хранилище состояния SQLite: '
+             '--state или STATE_STORE_PATH с расширением .sqlite3 или .db')
+    Supervisor(
+        arguments.workers,
+        args=(arguments.registry, arguments.state, arguments.stream,
+              arguments.config)
+    ).run()
+
+
+if __name__ == '__main__':
+    configure_logging('program.log')
+    main()
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+from string import Formatter
+
+from homework import HOMEWORK_VERDICTS
+from metrics import instrumented
+
+TEMPLATES_PATH = os.getenv('TEMPLATES_PATH')
+DEFAULT_LOCALE = os.getenv('BOT_LOCALE', 'ru')
+TEMPLATE_FIELDS = frozenset({'homework_name', 'status', 'verdict'})
+LOCALE_KEYS = frozenset({'message', 'unknown', 'verdicts'})
+TENANT_KEYS = LOCALE_KEYS | {'locale'}
+_NAME_MARK = '\x00'
+
+DEFAULT_TEMPLATES = {
+    'default_locale': DEFAULT_LOCALE,
+    'locales': {
+        'ru': {
+            'message': 'Изменился статус проверки работы '
+                       '"{homework_name}". {verdict}',
+            'unknown': 'Статус работы: {status}.',
+            'verdicts': HOMEWORK_VERDICTS,
+        },
+        'en': {
+            'message': 'Review status of "{homework_name}" has changed. '
+                       '{verdict}',
+            'unknown': 'New status: {status}.',
+            'verdicts': {
+                'approved': 'The reviewer approved the work. Hooray!',
+                'reviewing': 'The reviewer has started the review.',
+                'rejected': 'The reviewer has comments on the work.',
+            },
+        },
+    },
+    'tenants': {},
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _check_fields(template):
+    fields = {field for _, field, _, _ in Formatter().parse(template)
+              if field is not None}
+    unknown = fields - TEMPLATE_FIELDS
+    if unknown:
+        raise ValueError(
+            f'Неизвестные поля шаблона {template!r}: {", ".join(unknown)}'
+        )
+
+
+def _check_mapping(value, where):
+    if not isinstance(value, dict):
+        raise ValueError(f'{where}: ожидается объект, получено {value!r}')
+    return value
+
+
+def _check_section(section, allowed, where):
+    _check_mapping(section, where)
+    unknown = set(section) - allowed
+    if unknown:
+        raise ValueError(f'{where}: неизвестные ключи {", ".join(unknown)}')
+    for key in ('message', 'unknown', 'locale'):
+        if key in section and not isinstance(section[key], str):
+            raise ValueError(f'{where}: {key} должен быть строкой')
+    verdicts = _check_mapping(section.get('verdicts', {}),
+                              f'{where}: verdicts')
+    for status, verdict in verdicts.items():
+        if not isinstance(verdict, str):
+            raise ValueError(f'{where}: вердикт {status} должен быть строкой')
+    return section
+
+
+def check_templates(config):
+    """Проверяет структуру настроек шаблонов; ошибка - ValueError."""
+    _check_mapping(config, 'Шаблоны')
+    unknown = set(config) - {'default_locale', 'locales', 'tenants'}
+    if unknown:
+        raise ValueError(f'Шаблоны: неизвестные ключи {", ".join(unknown)}')
+    if not isinstance(config.get('default_locale', ''), str):
+        raise ValueError('Шаблоны: default_locale должен быть строкой')
+    for locale, section in _check_mapping(config.get('locales', {}),
+                                          'Шаблоны: locales').items():
+        _check_section(section, LOCALE_KEYS, f'Язык {locale}')
+    for tenant_id, section in _check_mapping(config.get('tenants', {}),
+                                             'Шаблоны: tenants').items():
+        try:
+            int(tenant_id)
+        except ValueError:
+            raise ValueError(f'Подписчик {tenant_id!r}: id должен быть '
+                             f'целым числом') from None
+        _check_section(section, TENANT_KEYS, f'Подписчик {tenant_id}')
+    return config
+
+
+def compile_message(template, status, verdict):
+    """Шаблон сообщения для статуса в виде кусков вокруг имени работы."""
+    _check_fields(template)
+    return tuple(template.format(
+        homework_name=_NAME_MARK, status=status, verdict=verdict
+    ).split(_NAME_MARK))
+
+
+class Catalog:
+    """Скомпилированные сообщения одного языка для всех статусов.
+
+    Шаблон и вердикт подставляются при компиляции, на каждое сообщение
+    остаётся только склеить куски с именем работы.
+    """
+
+    def __init__(self, message, unknown, verdicts):
+        """Компилирует шаблоны message и unknown с вердиктами verdicts."""
+        _check_fields(message)
+        _check_fields(unknown)
+        self.message = message
+        self.unknown = unknown
+        self.verdicts = dict(verdicts)
+        self._compiled = {
+            status: compile_message(message, status, verdict)
+            for status, verdict in self.verdicts.items()
+        }
+
+    def verdict(self, status):
+        """Текст вердикта; для неизвестного статуса - шаблон unknown."""
+        verdict = self.verdicts.get(status)
+        if verdict is None:
+            return self.unknown.format(status=status, verdict='',
+                                       homework_name='')
+        return verdict
+
+    def render(self, homework_name, status):
+        """Уведомление о статусе работы."""
+        parts = self._compiled.get(status)
+        if parts is None:
+            logger.warning(f'Нет шаблона для статуса работы: {status}')
+            return self.message.format(
+                homework_name=homework_name, status=status,
+                verdict=self.verdict(status)
+            )
+        return str(homework_name).join(parts)
+
+    @instrumented
+    def render_records(self, records):
+        """Уведомления для записей Homework, один замер на всю пачку."""
+        render = self.render
+        return [render(record.homework_name, record.status)
+                for record in records]
+
+
+class TemplateRegistry:
+    """Тексты уведомлений по языкам с переопределениями для подписчиков.
+
+    config - словарь как DEFAULT_TEMPLATES: язык по умолчанию, языки
+    с шаблонами message и unknown и вердиктами, и tenants - для
+    подписчика язык и любые из этих полей поверх языка. Всё компилируется
+    при создании реестра; ошибка в шаблоне - ValueError при загрузке,
+    а не при отправке. Неизвестный статус не прерывает опрос: сообщение
+    собирается по шаблону unknown.
+    """
+
+    def __init__(self, config=DEFAULT_TEMPLATES):
+        """Проверяет и компилирует config."""
+        check_templates(config)
+        self.default_locale = config.get('default_locale', DEFAULT_LOCALE)
+        locales = config.get('locales', {})
+        if self.default_locale not in locales:
+            raise ValueError(f'Нет шаблонов языка {self.default_locale}')
+        for locale, templates in locales.items():
+            missing = LOCALE_KEYS - set(templates)
+            if missing:
+                raise ValueError(
+                    f'Язык {locale}: не заданы {", ".join(sorted(missing))}'
+                )
+        self.locales = {
+            locale: Catalog(**templates)
+            for locale, templates in locales.items()
+        }
+        self.tenants = {}
+        for tenant_id, overrides in config.get('tenants', {}).items():
+            locale = overrides.get('locale', self.default_locale)
+            if locale not in locales:
+                raise ValueError(
+                    f'Подписчик {tenant_id}: нет шаблонов языка {locale}'
+                )
+            base = locales[locale]
+            self.tenants[int(tenant_id)] = Catalog(
+                overrides.get('message', base['message']),
+                overrides.get('unknown', base['unknown']),
+                {**base['verdicts'], **overrides.get('verdicts', {})}
+            )
+
+    def catalog(self, tenant_id=None):
+        """Сообщения подписчика: его переопределения или язык по умолчанию."""
+        catalog = self.tenants.get(tenant_id)
+        if catalog is None:
+            return self.locales[self.default_locale]
+        return catalog
+
+    def render(self, homework_name, status, tenant_id=None):
+        """Уведомление о статусе работы для подписчика."""
+        return self.catalog(tenant_id).render(homework_name, status)
+
+    def verdict(self, status, tenant_id=None):
+        """Текст вердикта для подписчика."""
+        return self.catalog(tenant_id).verdict(status)
+
+
+def merge_templates(config, base=DEFAULT_TEMPLATES):
+    """Настройки шаблонов поверх base: языки и подписчики дополняются."""
+    check_templates(config)
+    locales = {locale: dict(templates)
+               for locale, templates in base['locales'].items()}
+    for locale, templates in config.get('locales', {}).items():
+        merged = locales.setdefault(
+            locale, dict(locales[base['default_locale']])
+        )
+        verdicts = {**merged.get('verdicts', {}),
+                    **templates.get('verdicts', {})}
+        merged.update(templates)
+        merged['verdicts'] = verdicts
+    return {
+        'default_locale': config.get('default_locale',
+                                     base['default_locale']),
+        'locales': locales,
+        'tenants': {**base.get('tenants', {}), **config.get('tenants', {})},
+    }
+
+
+def load_templates(path=TEMPLATES_PATH):
+    """Реестр шаблонов из JSON-файла поверх встроенных или встроенный."""
+    if not path:
+        return TemplateRegistry()
+    with open(path, encoding='UTF-8') as templates_file:
+        return TemplateRegistry(merge_templates(json.load(templates_file)))
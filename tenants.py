@@ -0,0 +1,234 @@
+import json
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, replace
+
+from exceptions_api_answer import TokenOwnedError
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Подписка: токен Практикума и чат Telegram для уведомлений."""
+
+    tenant_id: int
+    practicum_token: str
+    chat_id: str
+    paused: bool = False
+
+
+class SQLiteTenantRegistry:
+    """Реестр подписок в базе SQLite."""
+
+    def __init__(self, path):
+        """Открывает базу path, создавая и обновляя таблицу подписок."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS subscriptions ('
+            'tenant_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'practicum_token TEXT NOT NULL UNIQUE, '
+            'chat_id TEXT NOT NULL, '
+            'paused INTEGER NOT NULL DEFAULT 0)'
+        )
+        columns = {
+            row[1] for row in self._connection.execute(
+                'PRAGMA table_info(subscriptions)'
+            )
+        }
+        if 'paused' not in columns:
+            self._connection.execute(
+                'ALTER TABLE subscriptions '
+                'ADD COLUMN paused INTEGER NOT NULL DEFAULT 0'
+            )
+        self._connection.execute(
+            'CREATE INDEX IF NOT EXISTS subscriptions_chat_id '
+            'ON subscriptions (chat_id)'
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def _tenant(row):
+        tenant_id, practicum_token, chat_id, paused = row
+        return Tenant(tenant_id, practicum_token, chat_id, bool(paused))
+
+    def subscribe(self, practicum_token, chat_id, reassign=False):
+        """Добавляет подписку; известный токен другого чата - TokenOwnedError.
+
+        reassign=True переносит подписку известного токена в chat_id.
+        """
+        chat_id = str(chat_id)
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT chat_id FROM subscriptions WHERE practicum_token = ?',
+                (practicum_token,)
+            ).fetchone()
+            if row is not None and row[0] != chat_id and not reassign:
+                raise TokenOwnedError('Токен уже подписан в другом чате')
+            self._connection.execute(
+                'INSERT INTO subscriptions (practicum_token, chat_id) '
+                'VALUES (?, ?) ON CONFLICT(practicum_token) '
+                'DO UPDATE SET chat_id = excluded.chat_id',
+                (practicum_token, chat_id)
+            )
+            row = self._connection.execute(
+                'SELECT tenant_id, practicum_token, chat_id, paused '
+                'FROM subscriptions WHERE practicum_token = ?',
+                (practicum_token,)
+            ).fetchone()
+        return self._tenant(row)
+
+    def unsubscribe(self, tenant_id):
+        """Удаляет подписку, возвращает True, если она существовала."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'DELETE FROM subscriptions WHERE tenant_id = ?', (tenant_id,)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, tenant_id):
+        """Подписка по идентификатору или None."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT tenant_id, practicum_token, chat_id, paused '
+                'FROM subscriptions WHERE tenant_id = ?', (tenant_id,)
+            ).fetchone()
+        return self._tenant(row) if row else None
+
+    def by_chat(self, chat_id):
+        """Подписки чата Telegram."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT tenant_id, practicum_token, chat_id, paused '
+                'FROM subscriptions WHERE chat_id = ? ORDER BY tenant_id',
+                (str(chat_id),)
+            ).fetchall()
+        return [self._tenant(row) for row in rows]
+
+    def set_paused(self, tenant_id, paused):
+        """Приостанавливает или возобновляет опрос подписки."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                'UPDATE subscriptions SET paused = ? WHERE tenant_id = ?',
+                (int(paused), tenant_id)
+            )
+        return cursor.rowcount > 0
+
+    def tenants(self):
+        """Все подписки в порядке добавления."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT tenant_id, practicum_token, chat_id, paused '
+                'FROM subscriptions ORDER BY tenant_id'
+            ).fetchall()
+        return [self._tenant(row) for row in rows]
+
+    def __len__(self):
+        """Число подписок."""
+        with self._lock:
+            (count,) = self._connection.execute(
+                'SELECT COUNT(*) FROM subscriptions'
+            ).fetchone()
+        return count
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        self._connection.close()
+
+
+class JSONTenantRegistry:
+    """Реестр подписок в JSON-файле: для небольших установок."""
+
+    def __init__(self, path):
+        """Загружает подписки из файла path, если он есть."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._tenants = {}
+        self._last_id = 0
+        if os.path.exists(path):
+            with open(path, encoding='UTF-8') as registry_file:
+                data = json.load(registry_file)
+            for item in data.get('tenants', []):
+                tenant = Tenant(**item)
+                self._tenants[tenant.tenant_id] = tenant
+            self._last_id = data.get('last_id', max(self._tenants, default=0))
+
+    def _dump(self):
+        data = {
+            'last_id': self._last_id,
+            'tenants': [vars(tenant) for tenant in self._tenants.values()],
+        }
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'w', encoding='UTF-8') as registry_file:
+            json.dump(data, registry_file, ensure_ascii=False)
+        os.replace(temporary_path, self.path)
+
+    def subscribe(self, practicum_token, chat_id, reassign=False):
+        """Добавляет подписку; известный токен другого чата - TokenOwnedError.
+
+        reassign=True переносит подписку известного токена в chat_id.
+        """
+        chat_id = str(chat_id)
+        with self._lock:
+            for tenant in self._tenants.values():
+                if tenant.practicum_token == practicum_token:
+                    if tenant.chat_id != chat_id and not reassign:
+                        raise TokenOwnedError(
+                            'Токен уже подписан в другом чате'
+                        )
+                    tenant = replace(tenant, chat_id=chat_id)
+                    break
+            else:
+                self._last_id += 1
+                tenant = Tenant(self._last_id, practicum_token, chat_id)
+            self._tenants[tenant.tenant_id] = tenant
+            self._dump()
+        return tenant
+
+    def unsubscribe(self, tenant_id):
+        """Удаляет подписку, возвращает True, если она существовала."""
+        with self._lock:
+            if self._tenants.pop(tenant_id, None) is None:
+                return False
+            self._dump()
+        return True
+
+    def get(self, tenant_id):
+        """Подписка по идентификатору или None."""
+        return self._tenants.get(tenant_id)
+
+    def by_chat(self, chat_id):
+        """Подписки чата Telegram."""
+        chat_id = str(chat_id)
+        return [tenant for tenant in self.tenants()
+                if tenant.chat_id == chat_id]
+
+    def set_paused(self, tenant_id, paused):
+        """Приостанавливает или возобновляет опрос подписки."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                return False
+            self._tenants[tenant_id] = replace(tenant, paused=bool(paused))
+            self._dump()
+        return True
+
+    def tenants(self):
+        """Все подписки в порядке добавления."""
+        with self._lock:
+            return sorted(self._tenants.values(), key=lambda t: t.tenant_id)
+
+    def __len__(self):
+        """Число подписок."""
+        return len(self._tenants)
+
+    def close(self):
+        """JSON-реестр не держит открытых ресурсов."""
+
+
+def open_registry(path):
+    """Открывает реестр, выбирая хранилище по расширению файла."""
+    if path.endswith('.json'):
+        return JSONTenantRegistry(path)
+    return SQLiteTenantRegistry(path)
@@ -0,0 +1,186 @@
+import io
+import json
+import random
+
+import requests
+
+import utils
+
+
+class TestAnalytics:
+    def test_sketch_relative_accuracy(self):
+        from analytics import QuantileSketch
+        sketch = QuantileSketch(accuracy=0.01)
+        values = [random.lognormvariate(8, 2) for _ in range(20000)]
+        for value in values:
+            sketch.add(value)
+        values.sort()
+        for share in (0.5, 0.9, 0.99):
+            exact = values[round(share * (len(values) - 1))]
+            assert abs(sketch.quantile(share) - exact) <= 0.011 * exact, (
+                'Перцентиль должен считаться с относительной погрешностью.'
+            )
+        assert len(sketch.buckets) < 2000, (
+            'Память скетча не должна расти с числом значений.'
+        )
+
+    def test_review_cycles(self):
+        from analytics import ReviewAnalytics
+        analytics = ReviewAnalytics()
+        for observed_at, old_status, new_status in (
+                (0, None, 'reviewing'), (100, 'reviewing', 'rejected'),
+                (200, 'rejected', 'reviewing'),
+                (500, 'reviewing', 'approved')):
+            analytics.observe(1, 'hw1', old_status, new_status, observed_at)
+        analytics.observe(2, 'hw1', None, 'reviewing', 600)
+        report = analytics.report()
+        assert report['transitions']['reviewing->rejected'] == 1
+        assert report['review_seconds']['count'] == 2
+        assert report['review_seconds']['max'] == 300
+        assert report['turnaround_seconds']['max'] == 500
+        assert abs(report['turnaround_seconds']['p50'] - 500) <= 5
+        assert report['rejections_before_approval'] == {'1': 1}
+        assert report['in_review'] == 1
+
+    def test_snapshot_and_export(self, tmp_path):
+        from analytics import ReviewAnalytics, open_analytics
+        from validation import Homework
+        path = str(tmp_path / 'analytics.json')
+        assert open_analytics(None) is None
+        analytics = open_analytics(path)
+        analytics.observe_records(1, [Homework('hw1', 'reviewing', None)],
+                                  {}, observed_at=10)
+        analytics.save(path)
+        restored = open_analytics(path)
+        restored.observe(1, 'hw1', 'reviewing', 'approved', 70)
+        assert restored.report()['turnaround_seconds']['max'] == 60, (
+            'Незавершённые ревью должны переживать перезапуск.'
+        )
+        report_file = io.StringIO()
+        restored.write_json(report_file)
+        assert json.loads(report_file.getvalue()) == restored.report()
+        report_file = io.StringIO()
+        restored.write_csv(report_file)
+        lines = report_file.getvalue().splitlines()
+        assert lines[0] == 'section,key,value'
+        assert 'transitions,reviewing->approved,1' in lines
+        assert isinstance(ReviewAnalytics().stats(), dict)
+
+    def test_durations_use_date_updated(self):
+        from analytics import ReviewAnalytics
+        from validation import Homework
+        analytics = ReviewAnalytics()
+        analytics.observe_records(1, [Homework(
+            'hw1', 'reviewing', '2023-01-01T10:00:00Z'
+        )], {}, observed_at=10 ** 9)
+        analytics.observe_records(1, [Homework(
+            'hw1', 'approved', '2023-01-01T10:07:30Z'
+        )], {'hw1': 'reviewing'}, observed_at=10 ** 9 + 3600)
+        assert analytics.report()['review_seconds']['max'] == 450, (
+            'Длительность ревью считается по date_updated, а не по опросам.'
+        )
+        analytics.observe_records(2, [Homework('hw2', 'reviewing', 'вчера')],
+                                  {}, observed_at=100)
+        analytics.observe_records(2, [Homework('hw2', 'rejected', None)],
+                                  {'hw2': 'reviewing'}, observed_at=160)
+        assert analytics.report()['review_seconds']['count'] == 2
+
+    def test_failed_save_is_not_recorded_twice(self, monkeypatch, tmp_path,
+                                               random_timestamp):
+        from analytics import ReviewAnalytics
+        from engine import PollingEngine
+        from event_log import EventLog
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        registry.subscribe('token-1', 100)
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': 'reviewing',
+                               'date_updated': '2023-01-01T10:00:00Z'}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        engine = PollingEngine(registry, utils.RecordingTelegramBot(),
+                               event_log=EventLog(),
+                               analytics=ReviewAnalytics())
+        engine.refresh(0)
+        save = engine.state_store.save
+
+        def broken_save(*args, **kwargs):
+            raise OSError('диск заполнен')
+
+        monkeypatch.setattr(engine.state_store, 'save', broken_save)
+        engine.run_round(10 ** 10)
+        monkeypatch.setattr(engine.state_store, 'save', save)
+        engine.run_round(10 ** 11)
+        assert len(engine.event_log) == 1
+        assert engine.analytics.report()['transitions'] == {
+            'None->reviewing': 1
+        }, 'Повтор после сбоя сохранения не должен учитываться дважды.'
+
+    def test_stale_open_reviews_expire(self, tmp_path):
+        from analytics import ReviewAnalytics, open_analytics
+        path = str(tmp_path / 'analytics.json')
+        analytics = ReviewAnalytics(path=path, open_ttl=100)
+        analytics.observe(1, 'hw1', None, 'reviewing', 0)
+        analytics.observe(1, 'hw2', None, 'reviewing', 0)
+        analytics.observe(1, 'hw2', 'reviewing', 'rejected', 50)
+        analytics.observe(1, 'hw3', None, 'reviewing', 500)
+        analytics.save()
+        report = analytics.report()
+        assert report['in_review'] == 1
+        assert report['expired_reviews'] == 2, (
+            'Незакрытые проверки не должны копиться бесконечно.'
+        )
+        restored = open_analytics(path)
+        assert restored.to_dict()['open'] == {'1:hw3': [500, 0]}
+        other = ReviewAnalytics()
+        other.observe(2, 'hw1', None, 'reviewing', 0)
+        restored.open_ttl = 100
+        restored.merge(other)
+        assert restored.report()['expired_reviews'] == 3
+        assert restored.report()['in_review'] == 1
+
+    def test_snapshot_is_flushed_on_refresh(self, tmp_path):
+        from analytics import open_analytics
+        from engine import PollingEngine
+        from tenants import open_registry
+        path = str(tmp_path / 'analytics.json')
+        engine = PollingEngine(
+            open_registry(str(tmp_path / 'subscriptions.json')),
+            utils.RecordingTelegramBot(), analytics=open_analytics(path)
+        )
+        engine.refresh(0)
+        assert not (tmp_path / 'analytics.json').exists(), (
+            'Без новых данных файл не переписывается.'
+        )
+        engine.analytics.observe(1, 'hw1', None, 'reviewing', 10)
+        engine.refresh(60)
+        assert open_analytics(path).report()['in_review'] == 1, (
+            'Статистика должна сохраняться по ходу работы, а не только '
+            'при штатной остановке.'
+        )
+
+    def test_report_merges_shards(self, tmp_path, capsys):
+        from analytics import open_analytics, shard_path
+        from engine import build_parser
+        path = str(tmp_path / 'analytics.json')
+        assert shard_path(path, 1) == str(tmp_path / 'analytics-1.json')
+        for shard, observed_at in ((0, 100), (1, 400)):
+            analytics = open_analytics(shard_path(path, shard))
+            analytics.observe(shard, 'hw1', None, 'reviewing', 0)
+            analytics.observe(shard, 'hw1', 'reviewing', 'approved',
+                              observed_at)
+            analytics.flush()
+        arguments = build_parser().parse_args([
+            'report', shard_path(path, 0), shard_path(path, 1)
+        ])
+        arguments.handler(arguments)
+        report = json.loads(capsys.readouterr().out)
+        assert report['transitions'] == {
+            'None->reviewing': 2, 'reviewing->approved': 2
+        }
+        assert report['turnaround_seconds']['count'] == 2
+        assert report['turnaround_seconds']['max'] == 400
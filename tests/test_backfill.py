@@ -0,0 +1,47 @@
+import requests
+
+import utils
+
+
+class TestBackfill:
+    def test_backfill_loads_statuses_without_messages(self, monkeypatch):
+        from backfill import backfill
+        from state_store import MemoryStateStore
+        from tenants import Tenant
+        requested = []
+
+        def mock_response_get(*args, headers=None, params=None, **kwargs):
+            token = headers['Authorization']
+            requested.append(params['from_date'])
+            if token == 'OAuth broken':
+                raise requests.RequestException('Something wrong')
+            return utils.MockResponseGET(data={
+                'homeworks': [
+                    {'homework_name': f'{token}.zip', 'status': 'approved',
+                     'date_updated': '2023-01-02T10:00:00Z'},
+                    {'homework_name': f'{token}.zip', 'status': 'reviewing',
+                     'date_updated': '2023-01-01T10:00:00Z'},
+                ],
+                'current_date': 500,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        tenants = [Tenant(1, 'one', '10'), Tenant(2, 'two', '20'),
+                   Tenant(3, 'broken', '30')]
+        state_store = MemoryStateStore()
+        report = backfill(tenants, state_store, workers=2)
+        assert report['tenants'] == 2
+        assert report['failed'] == 1
+        assert set(requested) == {0}, 'История загружается с from_date=0.'
+        assert state_store.load_cursor(1) == 500
+        assert state_store.statuses(2) == {'OAuth two.zip': 'approved'}, (
+            'Сохраняться должен самый свежий статус работы.'
+        )
+        assert state_store.load_cursor(3) is None
+
+        requested.clear()
+        report = backfill(tenants, state_store, workers=2)
+        assert report['skipped'] == 2, (
+            'Подписчики с сохранённым курсором не загружаются повторно.'
+        )
+        assert len(requested) == 1
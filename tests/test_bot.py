@@ -163,7 +163,8 @@ class TestHomework:
             self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
         )
 
-        def check_request_call(url,
+        def check_request_call(session,
+                               url,
                                current_timestamp=current_timestamp,
                                **kwargs):
             expected_url = (
@@ -200,7 +201,7 @@ class TestHomework:
                     'Проверьте, что в параметре `from_date` передано число.'
                 )
 
-        monkeypatch.setattr(requests, 'get', check_request_call)
+        monkeypatch.setattr(requests.Session, 'get', check_request_call)
         try:
             homework_module.get_api_answer(current_timestamp)
         except AssertionError:
@@ -223,7 +224,7 @@ class TestHomework:
                 current_timestamp=current_timestamp, **kwargs
             )
 
-        monkeypatch.setattr(requests, 'get', mock_response_get)
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
 
         result = homework_module.get_api_answer(current_timestamp)
         assert isinstance(result, dict), (
@@ -243,7 +244,7 @@ class TestHomework:
             self.HOMEWORK_FUNC_WITH_PARAMS_QTY[func_name]
         )
 
-        monkeypatch.setattr(requests, 'get', response)
+        monkeypatch.setattr(requests.Session, 'get', response)
         try:
             homework_module.get_api_answer(current_timestamp)
         except Exception:
@@ -267,7 +268,7 @@ class TestHomework:
         def mock_request_get_with_exception(*args, **kwargs):
             raise requests.RequestException('Something wrong')
 
-        monkeypatch.setattr(requests, 'get', mock_request_get_with_exception)
+        monkeypatch.setattr(requests.Session, 'get', mock_request_get_with_exception)
         try:
             homework_module.get_api_answer(current_timestamp)
         except requests.RequestException as e:
@@ -583,7 +584,7 @@ class TestHomework:
                 data=response_data
             ))
         monkeypatch.setattr(
-            requests,
+            requests.Session,
             'get',
             mock_response_get_with_new_status
         )
@@ -638,8 +639,9 @@ class TestHomework:
                     if record.message == utils.MockResponseGET.CALLED_LOG_MSG
                 ]
                 assert log_record, (
-                    'Убедитесь, что бот использует функцию `requests.get()` '
-                    'для отправки запроса к API домашки.'
+                    'Убедитесь, что бот использует метод '
+                    '`requests.Session.get()` для отправки запроса '
+                    'к API домашки.'
                 )
 
     def test_main_check_response_is_called(self, monkeypatch,
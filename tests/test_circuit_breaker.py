@@ -0,0 +1,82 @@
+import pytest
+import requests
+
+import utils
+
+
+class TestCircuitBreaker:
+    def test_states(self):
+        from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+        from exceptions_api_answer import CircuitOpenError
+        now = [0.0]
+        breaker = CircuitBreaker(
+            failure_threshold=3, recovery_timeout=60, clock=lambda: now[0]
+        )
+        for _ in range(3):
+            breaker.before_call()
+            breaker.record_failure()
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        now[0] = 61
+        breaker.before_call()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == OPEN, 'Неудачная проба размыкает снова.'
+        now[0] = 122
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        breaker.before_call()
+
+    def test_outage_costs_one_request_per_probe(self, monkeypatch, tmp_path):
+        from circuit_breaker import CircuitBreaker
+        from engine import PollingEngine
+        from tenants import open_registry
+        requests_sent = []
+        status = [500]
+
+        def mock_response_get(*args, **kwargs):
+            requests_sent.append(1)
+            return utils.MockResponseGET(http_status=status[0])
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        for number in range(20):
+            registry.subscribe(f'token-{number}', number)
+        now = [0.0]
+        engine = PollingEngine(
+            registry, utils.RecordingTelegramBot(),
+            circuit_breaker=CircuitBreaker(
+                failure_threshold=3, recovery_timeout=60,
+                clock=lambda: now[0]
+            )
+        )
+        engine.refresh(0)
+        assert engine.run_round(600) == 20
+        assert len(requests_sent) == 3, (
+            'После порога сбоев запросы к API не должны отправляться.'
+        )
+        now[0] = 61
+        status[0] = 200
+        assert engine.run_round(10 ** 6) == 20
+        assert len(requests_sent) == 23, (
+            'После удачной пробы опрос должен возобновиться для всех.'
+        )
+
+    def test_client_errors_do_not_open_circuit(self, monkeypatch):
+        from circuit_breaker import CLOSED, CircuitBreaker
+        from homework import request_api_answer
+        from exceptions_api_answer import StatusOtherThan200Error
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(http_status=401)
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        breaker = CircuitBreaker(failure_threshold=1)
+        with pytest.raises(StatusOtherThan200Error):
+            request_api_answer(0, {'Authorization': 'OAuth x'},
+                               circuit=breaker)
+        assert breaker.state == CLOSED
@@ -0,0 +1,90 @@
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture(params=['subscriptions.sqlite3', 'subscriptions.json'])
+def registry(request, tmp_path):
+    from tenants import open_registry
+    registry = open_registry(str(tmp_path / request.param))
+    yield registry
+    registry.close()
+
+
+class TestCommands:
+    def test_status_answers_from_state_store(self, registry):
+        from commands import NOT_SUBSCRIBED, CommandInterface
+        from homework import HOMEWORK_VERDICTS
+        from state_store import MemoryStateStore
+        state_store = MemoryStateStore()
+        interface = CommandInterface(registry, state_store)
+        assert interface.handle('status', 100) == NOT_SUBSCRIBED
+        changes = []
+        interface.on_change = lambda: changes.append(1)
+        assert 'оформлена' in interface.handle('subscribe', 100, ['token-1'])
+        assert changes, 'Цикл опроса должен узнать о новой подписке.'
+        tenant = registry.by_chat(100)[0]
+        state_store.save(tenant.tenant_id, 1, {'hw1': 'approved'})
+        reply = interface.handle('status', 100)
+        assert f'hw1: {HOMEWORK_VERDICTS["approved"]}' in reply
+
+    def test_subscribe_rejects_token_of_another_chat(self, registry):
+        from commands import TOKEN_OWNED, CommandInterface
+        from state_store import MemoryStateStore
+        changes = []
+        interface = CommandInterface(
+            registry, MemoryStateStore(), lambda: changes.append(1)
+        )
+        interface.handle('subscribe', 100, ['token-1'])
+        assert interface.handle('subscribe', 200, ['token-1']) == TOKEN_OWNED
+        assert registry.by_chat(200) == []
+        assert len(registry.by_chat(100)) == 1, (
+            'Подписка остаётся за чатом, который оформил её первым.'
+        )
+        assert changes == [1]
+
+    def test_pause_stops_polling(self, registry):
+        from commands import CommandInterface
+        from engine import PollingEngine
+        from state_store import MemoryStateStore
+        engine = PollingEngine(registry, bot=None)
+        interface = CommandInterface(
+            registry, engine.state_store, engine.request_refresh
+        )
+        interface.handle('subscribe', 100, ['token-1'])
+        interface.handle('subscribe', 200, ['token-2'])
+        engine.refresh(0)
+        assert len(engine) == 2
+        interface.handle('pause', 100)
+        assert registry.by_chat(100)[0].paused
+        list(engine.pop_due(1))
+        assert len(engine) == 1, (
+            'Приостановленная подписка не должна опрашиваться.'
+        )
+        assert '(приостановлена)' in CommandInterface(
+            registry, MemoryStateStore()
+        ).handle('status', 100)
+        interface.handle('resume', 100)
+        list(engine.pop_due(2))
+        assert len(engine) == 2
+
+    def test_sqlite_registry_migrates_paused_column(self, tmp_path):
+        from tenants import open_registry
+        path = str(tmp_path / 'subscriptions.sqlite3')
+        connection = sqlite3.connect(path)
+        connection.execute(
+            'CREATE TABLE subscriptions ('
+            'tenant_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'practicum_token TEXT NOT NULL UNIQUE, chat_id TEXT NOT NULL)'
+        )
+        connection.execute(
+            "INSERT INTO subscriptions (practicum_token, chat_id) "
+            "VALUES ('token-1', '100')"
+        )
+        connection.commit()
+        connection.close()
+        registry = open_registry(path)
+        assert registry.get(1).paused is False
+        assert registry.set_paused(1, True)
+        assert registry.get(1).paused is True
+        registry.close()
@@ -0,0 +1,273 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+import utils
+
+
+def write_config(path, data):
+    temporary = path.with_suffix('.tmp')
+    temporary.write_text(json.dumps(data), encoding='UTF-8')
+    os.replace(temporary, path)
+
+
+class TestConfig:
+    def test_load_settings(self, tmp_path):
+        from config import load_settings
+        path = tmp_path / 'config.json'
+        write_config(path, {
+            'retry_period': 60,
+            'endpoint': 'https://example.com/api/',
+            'templates': {'locales': {'ru': {
+                'verdicts': {'approved': 'Принято.'}
+            }}},
+        })
+        settings = load_settings(str(path))
+        assert settings.retry_period == 60
+        assert settings.idle_period is None
+        assert settings.templates.verdict('approved') == 'Принято.'
+        assert set(settings.overrides()) == {
+            'retry_period', 'endpoint', 'templates'
+        }
+
+    @pytest.mark.parametrize('data', [
+        {'retry_period': 0},
+        {'retry_period': '60'},
+        {'reviewing_period': True},
+        {'endpoint': 'ftp://example.com'},
+        {'retry_perod': 60},
+        {'chat_id': True},
+        {'chat_id': ' '},
+        [],
+    ])
+    def test_invalid_settings(self, data):
+        from config import parse_settings
+        with pytest.raises(ValueError):
+            parse_settings(data)
+
+    def test_polling_watcher_detects_change(self, tmp_path):
+        from config import PollingWatcher
+        path = tmp_path / 'config.json'
+        write_config(path, {'retry_period': 60})
+        watcher = PollingWatcher(str(path))
+        assert not watcher.wait(0)
+        write_config(path, {'retry_period': 30})
+        assert watcher.wait(0)
+        assert not watcher.wait(0)
+
+    def test_inotify_watcher_detects_replace(self, tmp_path):
+        from config import InotifyWatcher
+        path = tmp_path / 'config.json'
+        write_config(path, {'retry_period': 60})
+        try:
+            watcher = InotifyWatcher(str(path))
+        except (OSError, AttributeError, TypeError):
+            pytest.skip('inotify недоступен')
+        assert not watcher.wait(0)
+        (tmp_path / 'other.json').write_text('{}', encoding='UTF-8')
+        assert not watcher.wait(0.1), 'Чужие файлы каталога не в счёт.'
+        write_config(path, {'retry_period': 30})
+        assert watcher.wait(0.5)
+        watcher.close()
+
+    def test_bad_reload_keeps_settings(self, tmp_path):
+        from config import ConfigWatcher, PollingWatcher
+        path = tmp_path / 'config.json'
+        write_config(path, {'retry_period': 60})
+        received = []
+        watcher = ConfigWatcher(str(path), received.append, interval=0.01,
+                                watcher=PollingWatcher(str(path)))
+        watcher.start()
+        path.write_text('{"retry_period": ', encoding='UTF-8')
+        time.sleep(0.1)
+        write_config(path, {'retry_period': 30})
+        deadline = time.time() + 1
+        while len(received) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        watcher.stop()
+        assert [settings.retry_period for settings in received] == [60, 30], (
+            'Битый файл не должен сбрасывать действующие настройки.'
+        )
+
+    def test_bad_templates_followed_by_good(self, tmp_path, monkeypatch):
+        import templates
+        from config import ConfigWatcher, PollingWatcher
+        path = tmp_path / 'config.json'
+        write_config(path, {'retry_period': 60})
+        received = []
+        watcher = ConfigWatcher(str(path), received.append, interval=0.01,
+                                watcher=PollingWatcher(str(path)))
+        watcher.start()
+        write_config(path, {'templates': {'tenants': {'1': {'locale': 'de'}}}})
+        time.sleep(0.1)
+        original = templates.TemplateRegistry.__init__
+
+        def broken_init(*args, **kwargs):
+            raise RuntimeError('сбой компиляции')
+
+        monkeypatch.setattr(templates.TemplateRegistry, '__init__',
+                            broken_init)
+        write_config(path, {'templates': {}})
+        time.sleep(0.1)
+        monkeypatch.setattr(templates.TemplateRegistry, '__init__', original)
+        write_config(path, {'retry_period': 30, 'templates': {
+            'tenants': {'1': {'locale': 'en'}}
+        }})
+        deadline = time.time() + 1
+        while len(received) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        watcher.stop()
+        assert [settings.retry_period for settings in received] == [60, 30], (
+            'После любой ошибки в файле слежение должно продолжаться.'
+        )
+        assert received[-1].templates.render('hw1', 'approved', 1).startswith(
+            'Review status'
+        )
+
+    def test_engine_applies_settings_between_rounds(self, monkeypatch,
+                                                    tmp_path,
+                                                    random_timestamp):
+        from config import parse_settings
+        from engine import PollingEngine
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        registry.subscribe('token-1', 100)
+        urls = []
+
+        def mock_response_get(session, url, *args, **kwargs):
+            urls.append(url)
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, retry_period=600)
+        engine.refresh(0)
+        engine.request_settings(parse_settings({
+            'retry_period': 60,
+            'endpoint': 'https://example.com/api/',
+            'templates': {'tenants': {'1': {'message': '{homework_name}!'}}},
+        }))
+        assert engine.retry_period == 600, (
+            'Настройки применяются в потоке опроса, а не при получении.'
+        )
+        assert engine.next_due() <= 600
+        engine.run_round(600)
+        assert engine.retry_period == engine.scheduler.retry_period == 60
+        assert urls == ['https://example.com/api/']
+        assert bot.sent[0][1] == 'hw1!'
+        engine.request_settings(parse_settings({}))
+        engine.apply_pending_settings()
+        assert engine.retry_period == 600
+        assert engine.endpoint == engine.current_settings()['endpoint']
+        assert engine.templates.render('hw1', 'approved', 1) != 'hw1!'
+
+    def test_default_endpoint_is_read_per_call(self, monkeypatch, tmp_path,
+                                               random_timestamp):
+        import homework
+        from engine import PollingEngine
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        registry.subscribe('token-1', 100)
+        urls = []
+
+        def mock_response_get(session, url, *args, **kwargs):
+            urls.append(url)
+            return utils.MockResponseGET(data={
+                'homeworks': [], 'current_date': random_timestamp
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        monkeypatch.setattr(homework, 'ENDPOINT', 'http://127.0.0.1:1/api/')
+        engine = PollingEngine(registry, utils.RecordingTelegramBot())
+        engine.refresh(0)
+        engine.run_round(10 ** 10)
+        assert urls == ['http://127.0.0.1:1/api/'], (
+            'Адрес API по умолчанию читается при запросе, а не при импорте.'
+        )
+
+    def test_endpoint_change_resets_api_state(self, tmp_path):
+        from config import parse_settings
+        from engine import PollingEngine
+        from tenants import open_registry
+        engine = PollingEngine(
+            open_registry(str(tmp_path / 'subscriptions.json')),
+            utils.RecordingTelegramBot()
+        )
+        for _ in range(engine.circuit_breaker.failure_threshold):
+            engine.circuit_breaker.record_failure()
+        engine.response_cache.check('token', utils.MockResponseGET(data={
+            'homeworks': [], 'current_date': 1
+        }))
+        engine.request_settings(parse_settings({'retry_period': 60}))
+        engine.apply_pending_settings()
+        assert engine.circuit_breaker.state == 'open', (
+            'Без смены адреса состояние предохранителя сохраняется.'
+        )
+        engine.request_settings(parse_settings({
+            'endpoint': 'https://example.com/api/'
+        }))
+        engine.apply_pending_settings()
+        assert engine.circuit_breaker.state == 'closed'
+        assert engine.response_cache.stats()['entries'] == 0
+
+    def test_shorter_period_pulls_schedule_in(self, tmp_path):
+        from config import parse_settings
+        from engine import PollingEngine
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        for number in range(10):
+            registry.subscribe(f'token-{number}', number)
+        engine = PollingEngine(registry, utils.RecordingTelegramBot(),
+                               retry_period=600)
+        engine.refresh(0)
+        engine.request_settings(parse_settings({'retry_period': 60}))
+        engine.apply_pending_settings(0)
+        assert engine.next_due() <= 60
+        assert list(engine.pop_due(60)) and engine.next_due() is None
+
+    def test_main_applies_settings(self, monkeypatch, tmp_path,
+                                   random_timestamp):
+        import telegram
+
+        import config
+        import homework
+        path = tmp_path / 'config.json'
+        write_config(path, {
+            'retry_period': 30,
+            'chat_id': 777,
+            'templates': {'tenants': {'0': {'message': '{homework_name}!'}}},
+        })
+        monkeypatch.setattr(config, 'CONFIG_PATH', str(path))
+        bot = utils.RecordingTelegramBot()
+        monkeypatch.setattr(telegram, 'Bot', lambda **kwargs: bot)
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        delays = []
+        original_sleep = time.sleep
+
+        def sleep_to_interrupt(secs):
+            if threading.current_thread() is not threading.main_thread():
+                return original_sleep(secs)
+            delays.append(secs)
+            raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework.main()
+        assert bot.sent == [('777', 'hw1!')], (
+            'Одиночный режим берёт чат и шаблоны из файла настроек.'
+        )
+        assert delays == [30]
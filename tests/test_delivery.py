@@ -0,0 +1,133 @@
+import threading
+import time
+
+import telegram
+
+
+class FlakyBot:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+        self.sent_at = []
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        with self.lock:
+            if self.errors:
+                raise self.errors.pop(0)
+            self.sent.append((chat_id, text))
+            self.sent_at.append(time.monotonic())
+
+
+class GatedBot(FlakyBot):
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.started.set()
+        assert self.release.wait(1)
+        super().send_message(chat_id, text)
+
+
+class TestDelivery:
+    def test_token_bucket(self):
+        from delivery import TokenBucket
+        now = [0.0]
+        bucket = TokenBucket(2, capacity=2, clock=lambda: now[0])
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == 0.5
+        now[0] += 0.5
+        assert bucket.delay() == 0
+        assert bucket.try_acquire() == 0
+
+    def test_messages_are_coalesced_per_chat(self):
+        from delivery import DeliveryQueue
+        bot = GatedBot()
+        queue = DeliveryQueue(bot, workers=2, chat_rate=5)
+        queue.put(1, 'zero')
+        assert bot.started.wait(1)
+        for number in range(3):
+            queue.put(1, f'first-{number}')
+        queue.put(2, 'second')
+        bot.release.set()
+        assert queue.join(timeout=1)
+        queue.close()
+        assert sorted(bot.sent) == [
+            (1, 'first-0\n\nfirst-1\n\nfirst-2'), (1, 'zero'), (2, 'second')
+        ], 'Сообщения одного чата должны склеиваться по порядку.'
+        assert queue.stats()['coalesced'] == 2
+
+    def test_long_message_is_split(self):
+        from delivery import DeliveryQueue
+        bot = FlakyBot()
+        queue = DeliveryQueue(bot, chat_rate=100)
+        text = '\n'.join(f'Строка {number}' for number in range(1000))
+        queue.put(1, text)
+        assert queue.join(timeout=1)
+        queue.close()
+        parts = [part for _, part in bot.sent]
+        assert len(parts) > 1 and all(
+            len(part) <= queue.max_length for part in parts
+        ), 'Длинное сообщение должно уходить частями, а не отбрасываться.'
+        assert '\n'.join(parts) == text
+        assert queue.stats()['dropped'] == 0
+
+    def test_idle_chat_limiters_are_evicted(self, monkeypatch):
+        import delivery
+        monkeypatch.setattr(delivery, 'DELIVERY_BUCKET_SWEEP', 0)
+        queue = delivery.DeliveryQueue(FlakyBot(), chat_rate=100)
+        for chat_id in range(50):
+            queue.put(chat_id, 'hello')
+        assert queue.join(timeout=1)
+        time.sleep(0.05)
+        queue.put(50, 'hello')
+        assert queue.join(timeout=1)
+        queue.close()
+        assert queue.stats()['sent'] == 51
+        assert queue.stats()['chat_buckets'] <= 1, (
+            'Ограничители чатов без сообщений не должны накапливаться.'
+        )
+
+    def test_chat_rate_limit(self):
+        from delivery import DeliveryQueue
+        bot = FlakyBot()
+        queue = DeliveryQueue(bot, chat_rate=10, coalesce=False)
+        for number in range(3):
+            queue.put(1, str(number))
+        assert queue.join(timeout=1)
+        queue.close()
+        assert [text for _, text in bot.sent] == ['0', '1', '2']
+        gaps = [later - earlier
+                for earlier, later in zip(bot.sent_at, bot.sent_at[1:])]
+        assert min(gaps) >= 0.09, (
+            'Убедитесь, что частота отправки в чат ограничена.'
+        )
+
+    def test_transient_errors_are_retried(self, monkeypatch):
+        import delivery
+        monkeypatch.setattr(delivery, 'DELIVERY_BACKOFF', 0.01)
+        bot = FlakyBot(errors=[
+            telegram.error.TimedOut(),
+            telegram.error.RetryAfter(0.01),
+        ])
+        queue = delivery.DeliveryQueue(bot, chat_rate=100)
+        queue.put(1, 'hello')
+        assert queue.join(timeout=1)
+        queue.close()
+        assert bot.sent == [(1, 'hello')], (
+            'Временные ошибки Telegram должны повторяться.'
+        )
+        assert queue.stats()['retried'] == 1
+
+    def test_permanent_error_drops_message(self):
+        from delivery import DeliveryQueue
+        bot = FlakyBot(errors=[telegram.error.BadRequest('chat not found')])
+        queue = DeliveryQueue(bot, chat_rate=100)
+        queue.put(1, 'hello')
+        assert queue.join(timeout=1)
+        queue.close()
+        assert bot.sent == []
+        assert queue.stats()['dropped'] == 1
@@ -0,0 +1,220 @@
+import pytest
+import requests
+
+import utils
+
+
+@pytest.fixture(params=['subscriptions.sqlite3', 'subscriptions.json'])
+def registry(request, tmp_path):
+    from tenants import open_registry
+    registry = open_registry(str(tmp_path / request.param))
+    yield registry
+    registry.close()
+
+
+class TestEngine:
+    def test_registry_subscribe(self, registry):
+        from exceptions_api_answer import TokenOwnedError
+        first = registry.subscribe('token-1', 100)
+        second = registry.subscribe('token-2', 200)
+        assert first.tenant_id != second.tenant_id, (
+            'Убедитесь, что подписчики получают разные идентификаторы.'
+        )
+        assert registry.subscribe('token-1', 100) == first, (
+            'Повторная подписка с тем же токеном не должна '
+            'создавать нового подписчика.'
+        )
+        with pytest.raises(TokenOwnedError):
+            registry.subscribe('token-1', 300)
+        assert registry.get(first.tenant_id).chat_id == '100', (
+            'Чужой чат не должен перехватывать подписку по токену.'
+        )
+        updated = registry.subscribe('token-1', 300, reassign=True)
+        assert updated.tenant_id == first.tenant_id
+        assert registry.get(first.tenant_id).chat_id == '300'
+        assert len(registry) == 2
+        assert registry.unsubscribe(second.tenant_id)
+        assert not registry.unsubscribe(second.tenant_id)
+        assert [t.tenant_id for t in registry.tenants()] == [first.tenant_id]
+
+    def test_registry_is_persistent(self, registry):
+        from tenants import open_registry
+        registry.subscribe('token-1', 100)
+        reopened = open_registry(registry.path)
+        assert [t.practicum_token for t in reopened.tenants()] == ['token-1']
+        reopened.close()
+
+    def test_round_polls_every_tenant(self, monkeypatch, registry,
+                                      random_timestamp):
+        from engine import PollingEngine
+        registry.subscribe('token-1', 100)
+        registry.subscribe('token-2', 200)
+        seen_tokens = []
+
+        def mock_response_get(*args, headers=None, params=None, **kwargs):
+            seen_tokens.append(headers['Authorization'])
+            return utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data={
+                    'homeworks': [
+                        {'homework_name': 'hw123', 'status': 'approved'}
+                    ],
+                    'current_date': random_timestamp,
+                }
+            )
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, retry_period=600)
+        now = 1_000_000.0
+        assert engine.run_round(now) == 0, (
+            'Первый опрос подписчиков должен распределяться по времени.'
+        )
+        assert engine.run_round(now + 600) == 2
+        assert sorted(seen_tokens) == ['OAuth token-1', 'OAuth token-2']
+        assert sorted(chat for chat, _ in bot.sent) == ['100', '200']
+        assert engine.run_round(now + 601) == 0, (
+            'Повторный опрос должен выполняться не раньше RETRY_PERIOD.'
+        )
+
+    def test_round_survives_tenant_error(self, monkeypatch, registry):
+        from engine import PollingEngine
+        registry.subscribe('token-1', 100)
+
+        def mock_request_get_with_exception(*args, **kwargs):
+            raise requests.RequestException('Something wrong')
+
+        monkeypatch.setattr(requests.Session, 'get', mock_request_get_with_exception)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, retry_period=600)
+        engine.refresh(0)
+        assert engine.run_round(600) == 1
+        assert bot.sent and bot.sent[0][0] == '100', (
+            'Убедитесь, что об ошибке опроса сообщается подписчику.'
+        )
+
+    def test_cursor_is_restored_from_state_store(self, monkeypatch, registry,
+                                                 tmp_path, random_timestamp):
+        from engine import PollingEngine
+        from state_store import open_state_store
+        tenant = registry.subscribe('token-1', 100)
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(random_timestamp=random_timestamp)
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        state_path = str(tmp_path / 'state.jsonl')
+        state_store = open_state_store(state_path)
+        engine = PollingEngine(registry, utils.RecordingTelegramBot(),
+                               state_store=state_store)
+        engine.refresh(0)
+        engine.run_round(600)
+        state_store.close()
+
+        restarted = PollingEngine(registry, utils.RecordingTelegramBot(),
+                                  state_store=open_state_store(state_path))
+        restarted.refresh(10 ** 10)
+        assert restarted._cursors[tenant.tenant_id].timestamp == (
+            random_timestamp
+        ), 'Убедитесь, что после перезапуска опрос продолжается с курсора.'
+
+    def test_all_changes_are_batched(self, monkeypatch, registry,
+                                     random_timestamp):
+        from engine import PollingEngine
+        registry.subscribe('token-1', 100)
+        homeworks = [
+            {'homework_name': 'hw2', 'status': 'reviewing',
+             'date_updated': '2023-05-02T10:00:00Z'},
+            {'homework_name': 'hw1', 'status': 'approved',
+             'date_updated': '2023-05-01T10:00:00Z'},
+        ]
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': homeworks, 'current_date': random_timestamp
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, retry_period=600)
+        engine.refresh(0)
+        engine.run_round(600)
+        assert len(bot.sent) == 1, (
+            'Несколько изменений за цикл должны уходить одним сообщением.'
+        )
+        text = bot.sent[0][1]
+        assert '"hw1"' in text and '"hw2"' in text, (
+            'Убедитесь, что обрабатываются все работы из ответа API.'
+        )
+        assert text.index('"hw1"') < text.index('"hw2"'), (
+            'Изменения должны приходить в порядке обновления работ.'
+        )
+        engine.response_cache.forget('OAuth token-1')
+        engine.run_round(10 ** 10)
+        assert len(bot.sent) == 1, (
+            'Уже известные статусы не должны отправляться повторно.'
+        )
+
+    def test_failed_save_is_notified_on_retry(self, monkeypatch, registry,
+                                              random_timestamp):
+        from engine import PollingEngine
+        from state_store import MemoryStateStore
+        registry.subscribe('token-1', 100)
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        state_store = MemoryStateStore()
+        original_write = state_store._write
+
+        def failing_write(*args):
+            state_store._write = original_write
+            raise OSError('database is locked')
+
+        state_store._write = failing_write
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, state_store=state_store)
+        engine.refresh(0)
+        cursor = next(iter(engine._cursors.values()))
+        timestamp = cursor.timestamp
+        engine.run_round(10 ** 10)
+        assert cursor.timestamp == timestamp, (
+            'Курсор не должен сдвигаться, пока изменения не сохранены.'
+        )
+        engine.run_round(2 * 10 ** 10)
+        assert [text for _, text in bot.sent if '"hw1"' in text], (
+            'После сбоя сохранения изменение должно прийти при повторе.'
+        )
+
+    def test_outage_is_reported_once(self, monkeypatch, registry,
+                                     random_timestamp):
+        from circuit_breaker import CircuitBreaker
+        from engine import PollingEngine
+        registry.subscribe('token-1', 100)
+        outage = [True]
+
+        def mock_response_get(*args, **kwargs):
+            if outage[0]:
+                raise requests.RequestException('Something wrong')
+            return utils.MockResponseGET(random_timestamp=random_timestamp)
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(
+            registry, bot, retry_period=600,
+            circuit_breaker=CircuitBreaker(failure_threshold=10)
+        )
+        engine.refresh(0)
+        for now in range(1, 6):
+            engine.run_round(now * 10 ** 5)
+        assert len(bot.sent) == 1, (
+            'Об одной и той же ошибке нужно сообщать один раз за окно.'
+        )
+        outage[0] = False
+        engine.run_round(10 ** 7)
+        assert len(bot.sent) == 2
+        assert 'восстановлена' in bot.sent[-1][1]
@@ -0,0 +1,79 @@
+import pytest
+import requests
+
+import utils
+from exceptions_api_answer import ApiRequestError, StatusOtherThan200Error
+
+
+class TestErrorThrottle:
+    def test_repeated_error_is_suppressed(self):
+        from error_throttle import ErrorThrottle
+        now = [0.0]
+        throttle = ErrorThrottle(window=60, clock=lambda: now[0])
+        error = StatusOtherThan200Error('код ошибки: 500')
+        assert throttle.should_notify(1, error)
+        assert not throttle.should_notify(1, error), (
+            'Повторная ошибка не должна отправляться каждый цикл.'
+        )
+        assert throttle.should_notify(2, error), (
+            'Подписчики должны подавляться независимо.'
+        )
+        assert throttle.should_notify(1, ApiRequestError('timeout')), (
+            'О новой ошибке нужно сообщать сразу.'
+        )
+        now[0] = 61
+        assert throttle.should_notify(1, error), (
+            'По истечении окна об ошибке нужно напомнить.'
+        )
+
+    def test_recovered_message(self):
+        from error_throttle import ErrorThrottle
+        throttle = ErrorThrottle(window=60, clock=lambda: 0.0)
+        assert throttle.recovered(1) is None
+        error = StatusOtherThan200Error('код ошибки: 500')
+        for _ in range(3):
+            throttle.should_notify(1, error)
+        message = throttle.recovered(1)
+        assert 'StatusOtherThan200Error' in message
+        assert '2' in message
+        assert throttle.recovered(1) is None
+
+    def test_connection_errors_share_a_key(self, monkeypatch):
+        from error_throttle import ErrorThrottle
+        from homework import request_api_answer
+
+        addresses = iter((0x7f0000001000, 0x7f0000002000))
+
+        def refused(*args, **kwargs):
+            raise requests.ConnectionError(
+                f'<urllib3.connection.HTTPSConnection object at '
+                f'{next(addresses):#x}>: Connection refused'
+            )
+
+        monkeypatch.setattr(requests.Session, 'get', refused)
+        throttle = ErrorThrottle(window=60, clock=lambda: 0.0)
+        errors = []
+        for _ in range(2):
+            with pytest.raises(ApiRequestError) as error:
+                request_api_answer(0, {'Authorization': 'OAuth token'})
+            errors.append(error.value)
+        assert str(errors[0]) != str(errors[1])
+        assert throttle.should_notify(1, errors[0])
+        assert not throttle.should_notify(1, errors[1]), (
+            'Сбои соединения с разным адресом объекта - одна и та же ошибка.'
+        )
+
+    def test_status_codes_are_distinct(self, monkeypatch):
+        from error_throttle import ErrorThrottle
+        from homework import request_api_answer
+        throttle = ErrorThrottle(window=60, clock=lambda: 0.0)
+        for status, notify in ((500, True), (500, False), (502, True)):
+            monkeypatch.setattr(
+                requests.Session, 'get',
+                lambda *args, status=status, **kwargs: utils.MockResponseGET(
+                    http_status=status
+                )
+            )
+            with pytest.raises(StatusOtherThan200Error) as error:
+                request_api_answer(0, {'Authorization': 'OAuth token'})
+            assert throttle.should_notify(1, error.value) is notify
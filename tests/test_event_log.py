@@ -0,0 +1,133 @@
+import requests
+
+import utils
+
+
+class TestEventLog:
+    def test_transitions_are_appended(self, tmp_path):
+        from event_log import EventLog
+        from validation import Homework
+        event_log = EventLog(str(tmp_path / 'events.sqlite3'))
+        event_log.append(1, [Homework('hw1', 'reviewing', None)], {},
+                         current_date=100, observed_at=1000.0)
+        event_log.append(1, [Homework('hw1', 'approved', None)],
+                         {'hw1': 'reviewing'}, current_date=200,
+                         observed_at=1600.0)
+        event_log.append(2, [Homework('hw2', 'reviewing', None)], {},
+                         observed_at=1700.0)
+        assert [(t.old_status, t.new_status)
+                for t in event_log.history(1, 'hw1')] == [
+            (None, 'reviewing'), ('reviewing', 'approved')
+        ]
+        assert [t.homework_name for t in event_log.recent()] == [
+            'hw2', 'hw1', 'hw1'
+        ], 'Последние смены статусов идут от свежих к давним.'
+        assert [t.tenant_id for t in event_log.recent(1, limit=1)] == [1]
+        assert event_log.recent(1, limit=1)[0].current_date == 200
+        event_log.close()
+
+    def test_ordered_queries_use_indexes(self, tmp_path):
+        from event_log import EventLog
+        event_log = EventLog(str(tmp_path / 'events.sqlite3'))
+        queries = []
+        event_log._connection.set_trace_callback(queries.append)
+        event_log.recent(1)
+        event_log.history(1, 'hw1')
+        event_log._connection.set_trace_callback(None)
+        for query in queries:
+            plan = ' '.join(row[-1] for row in event_log._connection.execute(
+                f'EXPLAIN QUERY PLAN {query}'
+            ))
+            assert 'USING INDEX' in plan, query
+            assert 'TEMP B-TREE' not in plan, (
+                'Запросы по подписчику и по работе должны получать '
+                'события из индекса сразу в порядке event_id.'
+            )
+        event_log.close()
+
+    def test_turnaround(self):
+        from event_log import EventLog
+        from validation import Homework
+        event_log = EventLog()
+        assert event_log.turnaround(1, 'hw1') is None
+        statuses = {}
+        for observed_at, status in ((10.0, 'reviewing'), (70.0, 'rejected'),
+                                    (100.0, 'reviewing'), (400.0, 'approved')):
+            event_log.append(1, [Homework('hw1', status, None)], statuses,
+                             observed_at=observed_at)
+            statuses['hw1'] = status
+        assert event_log.turnaround(1, 'hw1') == 390.0, (
+            'Время проверки считается от первой отправки на ревью.'
+        )
+        assert event_log.turnaround(1, 'hw1', end='rejected') == 60.0
+        assert event_log.turnaround(2, 'hw1') is None
+
+    def test_turnaround_uses_date_updated(self):
+        from event_log import EventLog
+        from validation import Homework
+        event_log = EventLog()
+        event_log.append(1, [Homework(
+            'hw1', 'reviewing', '2022-01-01T10:00:00Z'
+        )], {}, observed_at=5000.0)
+        event_log.append(1, [Homework(
+            'hw1', 'approved', '2022-01-01T11:00:00Z'
+        )], {'hw1': 'reviewing'}, observed_at=5600.0)
+        assert event_log.turnaround(1, 'hw1') == 3600.0, (
+            'Время проверки считается по date_updated, а не по опросу.'
+        )
+        event_log.close()
+
+    def test_old_journal_is_migrated(self, tmp_path):
+        import sqlite3
+
+        from event_log import EventLog
+        path = str(tmp_path / 'events.sqlite3')
+        connection = sqlite3.connect(path)
+        connection.executescript(
+            'CREATE TABLE events ('
+            'event_id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'tenant_id INTEGER NOT NULL, homework_name TEXT NOT NULL, '
+            'old_status TEXT, new_status TEXT NOT NULL, '
+            'observed_at REAL NOT NULL, server_date INTEGER);'
+            "INSERT INTO events (tenant_id, homework_name, new_status, "
+            "observed_at) VALUES (1, 'hw1', 'reviewing', 10.0);"
+            "INSERT INTO events (tenant_id, homework_name, new_status, "
+            "observed_at) VALUES (1, 'hw1', 'approved', 70.0);"
+        )
+        connection.close()
+        event_log = EventLog(path)
+        assert event_log.turnaround(1, 'hw1') == 60.0
+        assert event_log.history(1, 'hw1')[0].updated_at == 10.0
+        event_log.close()
+
+    def test_engine_records_transitions(self, monkeypatch, tmp_path,
+                                        random_timestamp):
+        from engine import PollingEngine
+        from event_log import EventLog
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        tenant = registry.subscribe('token-1', 100)
+        status = ['reviewing']
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': status[0]}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        event_log = EventLog()
+        engine = PollingEngine(registry, utils.RecordingTelegramBot(),
+                               event_log=event_log)
+        engine.refresh(0)
+        engine.run_round(600)
+        engine.response_cache.forget('OAuth token-1')
+        engine.run_round(10 ** 10)
+        status[0] = 'approved'
+        engine.response_cache.forget('OAuth token-1')
+        engine.run_round(10 ** 11)
+        assert [(t.old_status, t.new_status, t.current_date)
+                for t in event_log.history(tenant.tenant_id, 'hw1')] == [
+            (None, 'reviewing', random_timestamp),
+            ('reviewing', 'approved', random_timestamp),
+        ], 'Журнал должен содержать только смены статусов.'
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+import requests
+
+import utils
+
+
+class TestHomeworkAsync:
+    def test_get_api_answer_async(self, monkeypatch, random_timestamp):
+        from homework_async import get_api_answer_async
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(random_timestamp=random_timestamp)
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        result = asyncio.run(get_api_answer_async(random_timestamp))
+        assert result == {'homeworks': [], 'current_date': random_timestamp}
+
+    def test_polls_run_concurrently(self, monkeypatch, tmp_path,
+                                    random_timestamp):
+        from homework_async import AsyncPollingEngine
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.sqlite3'))
+        for number in range(20):
+            registry.subscribe(f'token-{number}', number)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_response_get(*args, **kwargs):
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.05)
+            with lock:
+                in_flight.pop()
+            return utils.MockResponseGET(
+                random_timestamp=random_timestamp,
+                data={
+                    'homeworks': [
+                        {'homework_name': 'hw123', 'status': 'reviewing'}
+                    ],
+                    'current_date': random_timestamp,
+                }
+            )
+
+        monkeypatch.setattr(requests.Session, 'get', slow_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = AsyncPollingEngine(registry, bot, concurrency=10)
+
+        async def poll_everyone():
+            engine.refresh(0)
+            assert engine.dispatch(10 ** 10) == 20
+            await engine.drain()
+
+        started = time.monotonic()
+        asyncio.run(poll_everyone())
+        elapsed = time.monotonic() - started
+        assert len(bot.sent) == 20
+        assert max(peak) <= 10, (
+            'Убедитесь, что число одновременных опросов ограничено.'
+        )
+        assert elapsed < 20 * 0.05, (
+            'Убедитесь, что опросы выполняются конкурентно.'
+        )
+        assert engine.next_due() is not None
+        registry.close()
@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpPool:
+    def test_connections_are_reused(self, local_server):
+        from http_pool import PracticumSession
+        session = PracticumSession(pool_size=2)
+        for _ in range(5):
+            assert session.get(local_server).json()['current_date'] == 1
+        stats = session.connection_stats()
+        session.close()
+        assert stats['requests'] == 5
+        assert stats['new_connections'] == 1, (
+            'Убедитесь, что сессия переиспользует keep-alive соединения.'
+        )
+        assert stats['reused_connections'] == 4
+
+    def test_default_timeout(self, monkeypatch):
+        import requests
+        from http_pool import PracticumSession
+        seen = {}
+
+        def mock_request(self, method, url, **kwargs):
+            seen.update(kwargs)
+
+        monkeypatch.setattr(requests.Session, 'request', mock_request)
+        session = PracticumSession(timeout=(1, 2))
+        session.get('http://127.0.0.1/')
+        assert seen['timeout'] == (1, 2), (
+            'Убедитесь, что запросы отправляются с таймаутом.'
+        )
@@ -0,0 +1,110 @@
+import urllib.request
+
+import pytest
+
+import utils
+
+
+class TestMetrics:
+    def test_instrumented_counts_exceptions(self):
+        from metrics import CALL_DURATION, CALL_EXCEPTIONS, instrumented
+
+        @instrumented
+        def failing_function():
+            """Всегда падает."""
+            raise KeyError('status')
+
+        before = CALL_EXCEPTIONS.value(
+            function='failing_function', exception='KeyError'
+        )
+        with pytest.raises(KeyError):
+            failing_function()
+        assert CALL_EXCEPTIONS.value(
+            function='failing_function', exception='KeyError'
+        ) == before + 1
+        assert CALL_DURATION.count(function='failing_function') >= 1
+        assert failing_function.__doc__ == 'Всегда падает.'
+
+    def test_hot_path_is_instrumented(self, homework_module):
+        from metrics import CALL_DURATION
+        before = CALL_DURATION.count(function='parse_status')
+        homework_module.parse_status(
+            {'homework_name': 'hw123', 'status': 'approved'}
+        )
+        assert CALL_DURATION.count(function='parse_status') == before + 1
+
+    def test_stream_validation_is_instrumented(self):
+        from metrics import CALL_DURATION, CALL_EXCEPTIONS
+        from validation import validate_homework_stream
+        before = CALL_DURATION.count(function='validate_homework_stream')
+        records = validate_homework_stream(
+            iter([{'homework_name': 'hw1', 'status': 'approved'}])
+        )
+        assert CALL_DURATION.count(
+            function='validate_homework_stream'
+        ) == before, 'Разбор ленивый: замер идёт при переборе.'
+        assert [record.status for record in records] == ['approved']
+        assert CALL_DURATION.count(
+            function='validate_homework_stream'
+        ) == before + 1
+        failures = CALL_EXCEPTIONS.value(
+            function='validate_homework_stream',
+            exception='KeyError'
+        )
+        with pytest.raises(KeyError):
+            list(validate_homework_stream(iter([{'status': 'approved'}])))
+        assert CALL_EXCEPTIONS.value(
+            function='validate_homework_stream',
+            exception='KeyError'
+        ) == failures + 1
+
+    def test_engine_send_and_render_are_instrumented(self):
+        from delivery import DeliveryQueue
+        from metrics import CALL_DURATION
+        from templates import TemplateRegistry
+        from validation import Homework
+        sends = CALL_DURATION.count(function='send_chat_message')
+        renders = CALL_DURATION.count(function='render_records')
+        messages = TemplateRegistry().catalog(1).render_records(
+            [Homework('hw1', 'approved', None),
+             Homework('hw2', 'rejected', None)]
+        )
+        assert len(messages) == 2
+        assert CALL_DURATION.count(function='render_records') == renders + 1
+        bot = utils.RecordingTelegramBot()
+        queue = DeliveryQueue(bot, workers=1)
+        queue.put(1, messages[0])
+        queue.join()
+        queue.close()
+        assert bot.sent == [(1, messages[0])]
+        assert CALL_DURATION.count(
+            function='send_chat_message'
+        ) == sends + 1, 'Отправка из очереди попадает в тот же ряд.'
+
+    def test_metrics_endpoint(self):
+        from metrics import (Counter, Histogram, MetricsRegistry,
+                             start_metrics_server)
+        registry = MetricsRegistry()
+        counter = registry.register(
+            Counter('test_total', 'Тест.', ('exception',))
+        )
+        histogram = registry.register(
+            Histogram('test_seconds', 'Тест.', buckets=(0.1, 1.0))
+        )
+        registry.register_stats('test_cache', 'Тест.', lambda: {'hits': 3})
+        counter.inc(exception='ApiRequestError')
+        histogram.observe(0.5)
+        server = start_metrics_server(port=0, registry=registry)
+        port = server.server_address[1]
+        try:
+            with urllib.request.urlopen(
+                    f'http://127.0.0.1:{port}/metrics') as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'test_total{exception="ApiRequestError"} 1' in body
+        assert 'test_seconds_bucket{le="0.1"} 0' in body
+        assert 'test_seconds_bucket{le="1.0"} 1' in body
+        assert 'test_seconds_count 1' in body
+        assert 'test_cache_hits 3' in body
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import requests
+
+import utils
+
+
+class TestResponseCache:
+    def test_identical_body_is_not_decoded(self):
+        from response_cache import CachedAnswer, ResponseCache
+        cache = ResponseCache()
+        first = utils.MockResponseGET(random_timestamp=100)
+        second = utils.MockResponseGET(random_timestamp=200)
+        assert cache.check('token', first) is None
+        cache.commit('token')
+        cached = cache.check('token', second)
+        assert isinstance(cached, CachedAnswer), (
+            'Ответ, отличающийся только current_date, должен '
+            'распознаваться как неизменившийся.'
+        )
+        assert cached['current_date'] == 200
+        changed = utils.MockResponseGET(data={
+            'homeworks': [{'homework_name': 'hw123', 'status': 'approved'}],
+            'current_date': 300,
+        })
+        assert cache.check('token', changed) is None
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 2
+
+    def test_conditional_headers(self):
+        from response_cache import CachedAnswer, ResponseCache
+        cache = ResponseCache()
+        response = utils.MockResponseGET(random_timestamp=100)
+        response.headers = {'ETag': '"abc"', 'Last-Modified': 'yesterday'}
+        cache.check('token', response)
+        assert cache.conditional_headers('token') == {}, (
+            'Валидаторы ответа действуют только после его обработки.'
+        )
+        cache.commit('token')
+        assert cache.conditional_headers('token') == {
+            'If-None-Match': '"abc"', 'If-Modified-Since': 'yesterday'
+        }
+        assert cache.conditional_headers('other') == {}
+        not_modified = utils.MockResponseGET(
+            http_status=HTTPStatus.NOT_MODIFIED
+        )
+        assert isinstance(cache.check('token', not_modified), CachedAnswer)
+        assert cache.stats()['not_modified'] == 1
+
+    def test_request_api_answer_short_circuit(self, monkeypatch,
+                                              homework_module):
+        from response_cache import CachedAnswer, ResponseCache
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(random_timestamp=123)
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        cache = ResponseCache()
+        headers = homework_module.make_headers('token')
+        first = homework_module.request_api_answer(0, headers, cache)
+        cache.commit(headers['Authorization'])
+        second = homework_module.request_api_answer(123, headers, cache)
+        assert not isinstance(first, CachedAnswer)
+        assert isinstance(second, CachedAnswer)
+        assert second['current_date'] == 123
+
+    def test_failed_processing_is_retried(self, monkeypatch, tmp_path,
+                                          random_timestamp):
+        from engine import PollingEngine
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        tenant = registry.subscribe('token-1', 100)
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, retry_period=600)
+        engine.refresh(0)
+        save = engine.state_store.save
+
+        def broken_save(*args, **kwargs):
+            raise OSError('диск заполнен')
+
+        monkeypatch.setattr(engine.state_store, 'save', broken_save)
+        engine.run_round(600)
+        assert not any('hw1' in text for _, text in bot.sent)
+        monkeypatch.setattr(engine.state_store, 'save', save)
+        engine.run_round(10 ** 10)
+        assert any('hw1' in text for _, text in bot.sent), (
+            'Тот же ответ после сбоя обработки нужно разобрать заново, '
+            'а не принять за неизменившийся.'
+        )
+        assert engine.state_store.statuses(tenant.tenant_id) == {
+            'hw1': 'approved'
+        }
+        assert engine.response_cache.stats()['hits'] == 0
@@ -0,0 +1,37 @@
+import random
+
+
+class TestScheduler:
+    def make_scheduler(self):
+        from scheduler import AdaptiveScheduler
+        return AdaptiveScheduler(600, rng=random.Random(0))
+
+    def test_reviewing_is_polled_faster(self):
+        scheduler = self.make_scheduler()
+        now = 10 ** 9
+        assert scheduler.next_delay({}, now, now=now) == 600
+        assert scheduler.next_delay(
+            {'hw1': 'approved', 'hw2': 'reviewing'}, now, now=now
+        ) < 600, 'Пока работа на ревью, опрос должен идти чаще.'
+
+    def test_idle_tenant_backs_off(self):
+        scheduler = self.make_scheduler()
+        now = 10 ** 9
+        week_ago = now - 7 * 24 * 60 * 60
+        assert scheduler.next_delay(
+            {'hw1': 'approved'}, week_ago, now=now
+        ) > 600, 'Давно неактивных подписчиков нужно опрашивать реже.'
+
+    def test_exponential_backoff_with_jitter(self):
+        from exceptions_api_answer import ApiRequestError
+        scheduler = self.make_scheduler()
+        assert scheduler.is_backoff_error(ApiRequestError())
+        assert not scheduler.is_backoff_error(KeyError())
+        assert not scheduler.is_backoff_error(None)
+        delays = [scheduler.backoff(failures) for failures in range(1, 12)]
+        for failures, delay in enumerate(delays, start=1):
+            ceiling = min(3600, 60 * 2 ** (failures - 1))
+            assert ceiling / 2 <= delay <= ceiling
+        assert len({scheduler.backoff(3) for _ in range(5)}) > 1, (
+            'Убедитесь, что к задержке добавляется случайный разброс.'
+        )
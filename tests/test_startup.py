@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('requests', 'telegram', 'http.server', 'http_pool')
+
+
+def loaded_modules(module, names, cwd):
+    code = (
+        f'import sys, {module}; '
+        f'print(*[name for name in {names!r} if name in sys.modules])'
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=cwd,
+        env={**os.environ, 'PYTHONPATH': BASE_DIR},
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+
+class TestStartup:
+    def test_homework_import_is_lazy(self, tmp_path):
+        assert loaded_modules('homework', HEAVY_MODULES, tmp_path) == [], (
+            'Импорт homework не должен загружать requests и telegram: '
+            'они нужны только при первом запросе и отправке сообщения.'
+        )
+        assert not (tmp_path / 'bot.log').exists(), (
+            'Файл лога должен открываться при первой записи, а не при импорте.'
+        )
+
+    @pytest.mark.parametrize(
+        'module', ['engine', 'supervisor', 'homework_async', 'delivery']
+    )
+    def test_engine_import_is_lazy(self, tmp_path, module):
+        assert loaded_modules(module, HEAVY_MODULES, tmp_path) == [], (
+            'requests и telegram загружаются в точке входа, при первом '
+            'запросе и создании бота.'
+        )
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+import requests
+
+import utils
+
+
+@pytest.fixture(params=['state.jsonl', 'state.sqlite3'])
+def store_path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+class TestStateStore:
+    def test_state_survives_restart(self, store_path):
+        from state_store import open_state_store
+        store = open_state_store(store_path)
+        store.save(1, 100, {'hw1': 'reviewing'})
+        store.save(1, 200, {'hw1': 'approved', 'hw2': 'reviewing'})
+        store.save(2, 300)
+        store.close()
+
+        reopened = open_state_store(store_path)
+        assert reopened.load_cursor(1) == 200, (
+            'Убедитесь, что курсор from_date переживает перезапуск.'
+        )
+        assert reopened.load_cursor(2) == 300
+        assert reopened.load_cursor(3) is None
+        assert reopened.statuses(1) == {'hw1': 'approved', 'hw2': 'reviewing'}
+        assert reopened.last_status(1, 'hw2') == 'reviewing'
+        reopened.close()
+
+    def test_failed_save_keeps_previous_state(self, store_path):
+        from state_store import open_state_store
+        store = open_state_store(store_path)
+        store.save(1, 100, {'hw1': 'reviewing'})
+        store.flush_interval = 0
+        original_sync = store._sync
+
+        def failing_sync():
+            store._sync = original_sync
+            raise OSError('диск недоступен')
+
+        store._sync = failing_sync
+        with pytest.raises(OSError):
+            store.save(1, 200, {'hw1': 'approved', 'hw2': 'reviewing'})
+        assert store.load_cursor(1) == 100
+        assert store.statuses(1) == {'hw1': 'reviewing'}, (
+            'Несохранённое изменение не должно считаться известным.'
+        )
+        store.save(1, 200, {'hw1': 'approved', 'hw2': 'reviewing'})
+        store.close()
+        reopened = open_state_store(store_path)
+        assert reopened.load_cursor(1) == 200
+        assert reopened.statuses(1) == {'hw1': 'approved', 'hw2': 'reviewing'}
+        reopened.close()
+
+    def test_main_keeps_cursor_until_saved(self, monkeypatch,
+                                           random_timestamp):
+        import telegram
+
+        import homework
+        from state_store import MemoryStateStore
+        store = MemoryStateStore()
+        store.save(homework.MAIN_TENANT_ID, 100)
+        original_write = store._write
+
+        def failing_write(*args):
+            store._write = original_write
+            raise OSError('database is locked')
+
+        store._write = failing_write
+        monkeypatch.setattr(homework, 'open_state_store', lambda: store)
+        bot = utils.RecordingTelegramBot()
+        monkeypatch.setattr(telegram, 'Bot', lambda **kwargs: bot)
+        requested = []
+
+        def mock_response_get(*args, **kwargs):
+            requested.append(kwargs['params']['from_date'])
+            return utils.MockResponseGET(data={
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        original_sleep = time.sleep
+
+        def sleep_to_interrupt(secs):
+            if threading.current_thread() is not threading.main_thread():
+                return original_sleep(secs)
+            if len(requested) == 2:
+                raise utils.BreakInfiniteLoop('break')
+
+        monkeypatch.setattr(time, 'sleep', sleep_to_interrupt)
+        with pytest.raises(utils.BreakInfiniteLoop):
+            homework.main()
+        assert requested == [100, 100], (
+            'Курсор не должен сдвигаться, пока изменения не сохранены.'
+        )
+        assert store.load_cursor(homework.MAIN_TENANT_ID) == random_timestamp
+
+    def test_writes_are_batched(self, store_path):
+        from state_store import open_state_store
+        store = open_state_store(store_path)
+        store.flush_interval = 60
+        store.flush_batch = 3
+        synced = []
+        original_sync = store._sync
+
+        def counting_sync():
+            synced.append(1)
+            original_sync()
+
+        store._sync = counting_sync
+        for timestamp in range(7):
+            store.save(1, timestamp)
+        assert len(synced) == 2, (
+            'Убедитесь, что изменения сбрасываются на диск пачками.'
+        )
+        store.close()
+        assert len(synced) == 3
+
+    def test_workers_share_sqlite_file(self, tmp_path):
+        from state_store import SQLiteStateStore
+        path = str(tmp_path / 'state.sqlite3')
+        first = SQLiteStateStore(path, flush_interval=60)
+        second = SQLiteStateStore(path, flush_interval=0)
+        first.save(1, 100, {'hw1': 'reviewing'})
+        second.save(2, 200, {'hw2': 'approved'})
+        first.close()
+        second.close()
+        reopened = SQLiteStateStore(path)
+        assert reopened.load_cursor(1) == 100
+        assert reopened.load_cursor(2) == 200, (
+            'Несброшенные изменения одного процесса не должны держать '
+            'блокировку записи для других.'
+        )
+        assert reopened.statuses(2) == {'hw2': 'approved'}
+        reopened.close()
+
+    def test_torn_journal_line_is_dropped(self, tmp_path):
+        from state_store import AppendOnlyStateStore
+        path = str(tmp_path / 'state.jsonl')
+        store = AppendOnlyStateStore(path)
+        store.save(1, 100, {'hw1': 'approved'})
+        store.close()
+        with open(path, 'a', encoding='UTF-8') as journal:
+            journal.write('{"t":1,"c":2')
+        reopened = AppendOnlyStateStore(path)
+        assert reopened.load_cursor(1) == 100
+        reopened.save(1, 300)
+        reopened.close()
+        assert AppendOnlyStateStore(path).load_cursor(1) == 300
+
+    def test_journal_is_compacted(self, tmp_path):
+        from state_store import AppendOnlyStateStore
+        path = str(tmp_path / 'state.jsonl')
+        store = AppendOnlyStateStore(path, compact_factor=2, flush_batch=1)
+        for timestamp in range(10):
+            store.save(1, timestamp, {'hw1': 'reviewing'})
+        store.close()
+        with open(path, encoding='UTF-8') as journal:
+            assert len(journal.readlines()) <= 2
+        assert AppendOnlyStateStore(path).load_cursor(1) == 9
@@ -0,0 +1,75 @@
+import json
+
+import pytest
+import requests
+
+import utils
+
+RESPONSE = {
+    'current_date': 1672531200,
+    'homeworks': [
+        {'homework_name': 'студент__hw01.zip', 'status': 'approved',
+         'reviewer_comment': 'Всё "хорошо", {без} [замечаний]', 'id': 1},
+        {'homework_name': 'студент__hw02.zip', 'status': 'reviewing',
+         'id': 2},
+    ],
+}
+
+
+def chunks(data, size):
+    body = json.dumps(data, ensure_ascii=False, indent=1).encode()
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class TestStreaming:
+    @pytest.mark.parametrize('size', [1, 7, 4096])
+    def test_stream_yields_homeworks(self, size):
+        from streaming import HomeworkStream
+        closed = []
+        stream = HomeworkStream(
+            chunks(RESPONSE, size), lambda: closed.append(1)
+        )
+        assert list(stream) == RESPONSE['homeworks']
+        assert stream.current_date == RESPONSE['current_date']
+        assert closed, 'После чтения соединение должно освобождаться.'
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{"current_date": 1}', KeyError),
+        (b'{"homeworks": {}}', TypeError),
+        (b'{"homeworks": [{"homework_name": "hw1"', ValueError),
+        (b'', ValueError),
+    ])
+    def test_invalid_stream_raises(self, body, error):
+        from streaming import HomeworkStream
+        with pytest.raises(error):
+            list(HomeworkStream([body]))
+
+    def test_small_response_is_read_whole(self):
+        from streaming import stream_or_read
+        response = utils.MockResponseGET(data=RESPONSE)
+        response.headers = {'Content-Length': '100'}
+        assert stream_or_read(response) is None
+        response.headers = {}
+        assert stream_or_read(response) is not None
+
+    def test_engine_streams_responses(self, monkeypatch, tmp_path):
+        from engine import PollingEngine
+        from tenants import open_registry
+
+        def mock_response_get(*args, stream=False, **kwargs):
+            assert stream, 'В потоковом режиме запрос должен идти с stream.'
+            return utils.MockResponseGET(data=RESPONSE)
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        tenant = registry.subscribe('token-1', 100)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, stream_responses=True)
+        engine.refresh(0)
+        assert engine.run_round(600) == 1
+        assert len(bot.sent) == 1
+        assert 'студент__hw01.zip' in bot.sent[0][1]
+        assert engine.state_store.load_cursor(
+            tenant.tenant_id
+        ) == RESPONSE['current_date']
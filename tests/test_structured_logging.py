@@ -0,0 +1,118 @@
+import atexit
+import json
+import logging
+import time
+
+
+def make_record(message, level=logging.DEBUG, **extra):
+    record = logging.LogRecord(
+        'engine', level, __file__, 1, message, None, None
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+class TestStructuredLogging:
+    def test_json_formatter_fields(self):
+        from structured_logging import JsonFormatter
+        line = JsonFormatter().format(make_record(
+            'Сбой', logging.ERROR, tenant=7, homework='hw.zip',
+            duration=0.25, error_class='ApiRequestError'
+        ))
+        entry = json.loads(line)
+        assert '\n' not in line
+        assert entry['message'] == 'Сбой'
+        assert entry['level'] == 'ERROR'
+        assert entry['tenant'] == 7
+        assert entry['homework'] == 'hw.zip'
+        assert entry['duration'] == 0.25
+        assert entry['error_class'] == 'ApiRequestError'
+
+    def test_sampling_filter(self):
+        from structured_logging import SamplingFilter
+        sampling = SamplingFilter(every=10)
+        passed = [
+            sampling.filter(make_record('Новых статусов работ Нет!'))
+            for _ in range(25)
+        ]
+        assert sum(passed) == 3, (
+            'Повторяющиеся DEBUG-записи должны прореживаться.'
+        )
+        assert all(
+            sampling.filter(make_record('Сбой', logging.ERROR))
+            for _ in range(25)
+        ), 'Записи выше DEBUG не должны прореживаться.'
+
+    def test_sampling_keys_on_call_site(self):
+        from structured_logging import SamplingFilter
+        sampling = SamplingFilter(every=10)
+        passed = [
+            sampling.filter(make_record(f'Отправлено: {number}'))
+            for number in range(25)
+        ]
+        assert sum(passed) == 3, (
+            'Записи одной строки кода с f-строкой тоже прореживаются.'
+        )
+
+    def test_queue_logging_writes_json(self, tmp_path):
+        from structured_logging import setup_queue_logging
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        path = tmp_path / 'program.log'
+        listener = setup_queue_logging(str(path), sample_every=1)
+        try:
+            logging.getLogger('engine').error(
+                'Сбой', extra={'tenant': 3, 'error_class': 'KeyError'}
+            )
+        finally:
+            atexit.unregister(listener.stop)
+            listener.stop()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            for handler in handlers:
+                root.addHandler(handler)
+            root.setLevel(level)
+        for handler in listener.handlers:
+            handler.close()
+        entry = json.loads(path.read_text(encoding='UTF-8'))
+        assert entry['tenant'] == 3
+        assert entry['error_class'] == 'KeyError'
+
+    def test_named_logger_keeps_own_handlers(self, tmp_path):
+        from structured_logging import setup_queue_logging
+        root = logging.getLogger()
+        handlers, level = list(root.handlers), root.level
+        bot_path = tmp_path / 'bot.log'
+        named_logger = logging.getLogger('test_named_logger')
+        named_logger.addHandler(logging.FileHandler(bot_path, delay=True))
+        listener = setup_queue_logging(
+            str(tmp_path / 'program.log'), sample_every=1,
+            loggers=[named_logger]
+        )
+        try:
+            logging.getLogger('engine').error('Чужая запись')
+            named_logger.error('Своя запись')
+            deadline = time.time() + 1
+            while time.time() < deadline and not (
+                    bot_path.exists() and bot_path.read_text(
+                        encoding='UTF-8').endswith('\n')):
+                time.sleep(0.01)
+        finally:
+            atexit.unregister(listener.stop)
+            listener.stop()
+            for handler in list(root.handlers):
+                root.removeHandler(handler)
+            for handler in handlers:
+                root.addHandler(handler)
+            root.setLevel(level)
+            for handler in list(named_logger.handlers):
+                named_logger.removeHandler(handler)
+        for handler in listener.handlers:
+            handler.close()
+        program = tmp_path.joinpath('program.log').read_text(encoding='UTF-8')
+        assert 'Чужая запись' in program and 'Своя запись' in program
+        entries = [json.loads(line) for line in
+                   bot_path.read_text(encoding='UTF-8').splitlines()]
+        assert [entry['message'] for entry in entries] == ['Своя запись'], (
+            'В файл логгера не должны попадать записи других логгеров.'
+        )
@@ -0,0 +1,98 @@
+import multiprocessing
+import sys
+import time
+
+import pytest
+
+
+def crash(shard, shards, start_delay):
+    raise SystemExit(1)
+
+
+def idle(shard, shards, start_delay):
+    time.sleep(30)
+
+
+class TestSupervisor:
+    def test_ring_moves_tenants_only_to_new_shard(self):
+        from supervisor import HashRing
+        before, after = HashRing(4), HashRing(5)
+        moved = [
+            key for key in range(10000)
+            if before.shard_for(key) != after.shard_for(key)
+        ]
+        assert all(after.shard_for(key) == 4 for key in moved), (
+            'При добавлении процесса подписчики переезжают только на него.'
+        )
+        assert 1000 < len(moved) < 3000
+        counts = [0] * 4
+        for key in range(10000):
+            counts[before.shard_for(key)] += 1
+        assert min(counts) > 1500, 'Подписчики должны делиться равномерно.'
+
+    def test_sharded_registry_partitions_tenants(self, tmp_path):
+        from supervisor import ShardedRegistry
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        for number in range(50):
+            registry.subscribe(f'token-{number}', number)
+        shards = [ShardedRegistry(registry, shard, 3) for shard in range(3)]
+        seen = [t.tenant_id for shard in shards for t in shard.tenants()]
+        assert sorted(seen) == [t.tenant_id for t in registry.tenants()], (
+            'Каждый подписчик опрашивается ровно одним процессом.'
+        )
+        assert shards[0].get(1) == registry.get(1)
+
+    def test_crashed_worker_is_restarted(self):
+        from supervisor import Supervisor
+        supervisor = Supervisor(2, target=crash)
+        supervisor.start()
+        try:
+            for process in supervisor.processes.values():
+                process.join(5)
+            assert supervisor.check() == 2
+            assert supervisor.restarts == 2
+        finally:
+            supervisor.stop()
+
+    def test_scale_up_and_down(self):
+        from supervisor import Supervisor
+        supervisor = Supervisor(1, target=idle, scale_up_delay=0)
+        supervisor.start()
+        try:
+            supervisor.scale_up()
+            assert supervisor.shards.value == 2
+            assert sorted(supervisor.processes) == [0, 1]
+            supervisor.scale_down()
+            assert supervisor.shards.value == 1
+            assert sorted(supervisor.processes) == [0]
+            assert supervisor.processes[0].is_alive()
+        finally:
+            supervisor.stop()
+        assert not supervisor.processes
+
+    def test_worker_rate_follows_shard_count(self):
+        from delivery import TokenBucket
+        from supervisor import shard_rate
+        shards = multiprocessing.Value('i', 2)
+        now = [0.0]
+        bucket = TokenBucket(shard_rate(shards, rate=30),
+                             clock=lambda: now[0])
+        for _ in range(15):
+            assert bucket.try_acquire() == 0
+        assert bucket.try_acquire() == pytest.approx(1 / 15)
+        shards.value = 3
+        assert bucket.delay() == pytest.approx(1 / 10), (
+            'Доля общего лимита пересчитывается при смене числа процессов.'
+        )
+
+    @pytest.mark.parametrize('argv', [
+        ['--state', ''], ['--state', 'state.log']
+    ])
+    def test_sqlite_state_store_is_required(self, monkeypatch, argv):
+        import supervisor
+        monkeypatch.setattr(supervisor, 'TELEGRAM_TOKEN', 'token')
+        monkeypatch.setattr(sys, 'argv', ['supervisor.py', *argv])
+        monkeypatch.setattr(supervisor.Supervisor, 'run', lambda self: None)
+        with pytest.raises(SystemExit, match='SQLite'):
+            supervisor.main()
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+import requests
+
+import utils
+
+
+class TestTemplates:
+    def test_default_messages_match_parse_status(self):
+        from homework import HOMEWORK_VERDICTS, parse_status
+        from templates import TemplateRegistry
+        templates = TemplateRegistry()
+        for status in HOMEWORK_VERDICTS:
+            assert templates.render('hw1', status) == parse_status(
+                {'homework_name': 'hw1', 'status': status}
+            )
+
+    def test_locales_and_tenant_overrides(self, tmp_path):
+        from templates import load_templates
+        path = tmp_path / 'templates.json'
+        path.write_text(json.dumps({
+            'locales': {'ru': {'verdicts': {'approved': 'Принято.'}}},
+            'tenants': {
+                '7': {'locale': 'en'},
+                '8': {'message': '{homework_name}: {status}'},
+            },
+        }), encoding='UTF-8')
+        templates = load_templates(str(path))
+        assert templates.render('hw1', 'approved').endswith('Принято.')
+        assert templates.render('hw1', 'reviewing').endswith(
+            'Работа взята на проверку ревьюером.'
+        ), 'Непереопределённые вердикты берутся из встроенных.'
+        assert templates.render('hw1', 'approved', tenant_id=7).startswith(
+            'Review status of "hw1"'
+        )
+        assert templates.render('hw1', 'rejected', tenant_id=8) == (
+            'hw1: rejected'
+        )
+
+    def test_unknown_status_falls_back(self):
+        from templates import TemplateRegistry
+        templates = TemplateRegistry()
+        message = templates.render('hw1', 'on_hold')
+        assert '"hw1"' in message and 'on_hold' in message
+        assert templates.verdict('on_hold') == 'Статус работы: on_hold.'
+
+    def test_invalid_template_fails_on_load(self):
+        from templates import TemplateRegistry, merge_templates
+        with pytest.raises(ValueError):
+            TemplateRegistry(merge_templates(
+                {'locales': {'ru': {'message': '{homework} {verdict}'}}}
+            ))
+
+    @pytest.mark.parametrize('config', [
+        {'tenants': {'1': {'locale': 'de'}}},
+        {'tenants': {'1': {'verdicts': ['approved']}}},
+        {'tenants': {'first': {'locale': 'en'}}},
+        {'locales': {'ru': {'verdicts': {'approved': 1}}}},
+        {'locales': {'ru': {'mesage': '{homework_name}'}}},
+        {'locales': []},
+        {'default_locale': 'de'},
+        [],
+    ])
+    def test_invalid_config_is_value_error(self, config):
+        from templates import TemplateRegistry, merge_templates
+        with pytest.raises(ValueError):
+            TemplateRegistry(merge_templates(config))
+
+    def test_engine_survives_unknown_status(self, monkeypatch, tmp_path,
+                                            random_timestamp):
+        from engine import PollingEngine
+        from tenants import open_registry
+        registry = open_registry(str(tmp_path / 'subscriptions.json'))
+        tenant = registry.subscribe('token-1', 100)
+
+        def mock_response_get(*args, **kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': [
+                    {'homework_name': 'hw1', 'status': 'on_hold'},
+                    {'homework_name': 'hw2', 'status': 'approved'},
+                ],
+                'current_date': random_timestamp,
+            })
+
+        monkeypatch.setattr(requests.Session, 'get', mock_response_get)
+        bot = utils.RecordingTelegramBot()
+        engine = PollingEngine(registry, bot, retry_period=600)
+        engine.refresh(0)
+        engine.run_round(600)
+        assert len(bot.sent) == 1 and 'on_hold' in bot.sent[0][1], (
+            'Неизвестный статус не должен прерывать цикл опроса.'
+        )
+        assert engine.state_store.statuses(tenant.tenant_id) == {
+            'hw1': 'on_hold', 'hw2': 'approved'
+        }
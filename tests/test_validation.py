@@ -0,0 +1,75 @@
+import pytest
+
+
+class TestValidation:
+    def test_valid_response_returns_records(self):
+        from validation import Homework, validate_homework_statuses
+        current_date, records = validate_homework_statuses({
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved',
+                 'date_updated': '2023-01-02T10:00:00Z', 'id': 1},
+                {'homework_name': 'hw2', 'status': 'reviewing'},
+            ],
+            'current_date': 123,
+        })
+        assert current_date == 123
+        assert records == [
+            Homework('hw1', 'approved', '2023-01-02T10:00:00Z'),
+            Homework('hw2', 'reviewing', None),
+        ]
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {}}, TypeError),
+        ({'homeworks': ['hw1']}, TypeError),
+        ({'homeworks': [{'status': 'approved'}]}, KeyError),
+        ({'homeworks': [{'homework_name': 'hw1'}]}, KeyError),
+        ({'homeworks': [{'homework_name': 'hw1', 'status': 'new'}]},
+         KeyError),
+    ])
+    def test_invalid_response_raises(self, response, error):
+        from validation import validate_homework_statuses
+        with pytest.raises(error):
+            validate_homework_statuses(response)
+
+    def test_messages_match_parse_status(self):
+        from homework import HOMEWORK_VERDICTS, parse_status
+        from templates import TemplateRegistry
+        from validation import Homework
+        catalog = TemplateRegistry().catalog()
+        for status in HOMEWORK_VERDICTS:
+            homework = {'homework_name': 'hw1', 'status': status}
+            assert catalog.render_records(
+                [Homework('hw1', status, None)]
+            ) == [parse_status(homework)]
+
+    def test_changed_records_sorted_by_date(self):
+        from validation import Homework, changed_records
+        records = [
+            Homework('hw2', 'approved', '2023-01-03'),
+            Homework('hw1', 'reviewing', '2023-01-02'),
+            Homework('hw3', 'rejected', '2023-01-01'),
+        ]
+        changed = changed_records(records, {'hw3': 'rejected'})
+        assert [record.homework_name for record in changed] == ['hw1', 'hw2']
+
+    def test_homework_record_is_compact(self):
+        from validation import validate_homework_statuses
+        _, records = validate_homework_statuses({'homeworks': [
+            {'homework_name': 'hw1', 'status': ''.join(['appr', 'oved'])},
+            {'homework_name': 'hw2', 'status': ''.join(['appro', 'ved'])},
+        ]})
+        assert not hasattr(records[0], '__dict__')
+        assert records[0].status is records[1].status, (
+            'Статусы записей должны разделять один объект строки.'
+        )
+
+    def test_verdict_is_memoized(self):
+        from homework import parse_status, render_verdict
+        render_verdict.cache_clear()
+        homework = {'homework_name': 'hw1', 'status': 'approved'}
+        first = parse_status(homework)
+        second = parse_status(dict(homework))
+        assert first is second
+        assert render_verdict.cache_info().hits == 1
@@ -1,3 +1,4 @@
+import json
 import logging
 import signal
 import re
@@ -89,6 +90,7 @@ class MockResponseGET:
         self.status_code = http_status
         self.reason = ''
         self.text = ''
+        self.headers = {}
         default_data = {
             'homeworks': [],
             'current_date': self.random_timestamp
@@ -96,6 +98,18 @@ class MockResponseGET:
         self.data = default_data if data is None else data
         logging.warn(MockResponseGET.CALLED_LOG_MSG)
 
+    @property
+    def content(self):
+        return json.dumps(self.data).encode()
+
+    def iter_content(self, chunk_size=1):
+        content = self.content
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
     def json(self):
         return self.data
 
@@ -114,6 +128,14 @@ class MockTelegramBot:
         self.text = text
 
 
+class RecordingTelegramBot:
+    def __init__(self, **kwargs):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append((chat_id, text))
+
+
 class BreakInfiniteLoop(Exception):
     pass
 
@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+from homework import HOMEWORK_VERDICTS
+from metrics import instrumented, instrumented_iter
+
+
+class Homework(namedtuple(
+        'Homework', ('homework_name', 'status', 'date_updated'))):
+    """Запись о работе из ответа API: кортеж без словаря атрибутов."""
+
+    __slots__ = ()
+
+
+def compile_homework_builder(record_type=Homework,
+                             required=('homework_name', 'status'),
+                             statuses=HOMEWORK_VERDICTS, strict=True):
+    """Собирает проверку одной работы из ответа API в функцию.
+
+    Всё, что не зависит от ответа, - набор обязательных ключей, допустимые
+    статусы, тексты ошибок - вычисляется здесь один раз. Полученная функция
+    превращает словарь работы в запись record_type. Ошибки те же, что
+    у parse_status: KeyError, а для не-словаря - TypeError. Статус в записи -
+    общий для всех записей объект строки, поэтому сохранённые статусы не
+    занимают память на каждую работу. Без strict неизвестный строковый
+    статус не ошибка: он попадает в запись, а сообщение о нём собирает
+    реестр шаблонов.
+    """
+    fields = record_type._fields
+    make_record = record_type._make
+    status_index = fields.index('status')
+    required_keys = frozenset(required)
+    canonical_statuses = {status: status for status in statuses}
+    missing_messages = {
+        key: f'В ответе API отсутсвует ключ "{key}".' for key in required
+    }
+
+    def build(homework):
+        if homework.__class__ is not dict:
+            raise TypeError('Работа в ответе API не словарь')
+        if not required_keys <= homework.keys():
+            missing = next(key for key in required if key not in homework)
+            raise KeyError(missing_messages[missing])
+        values = list(map(homework.get, fields))
+        status = canonical_statuses.get(values[status_index])
+        if status is None:
+            status = values[status_index]
+            if strict or not isinstance(status, str):
+                raise KeyError(f'Неизвестный статус работы ревью: {status}')
+            canonical_statuses[status] = status
+        values[status_index] = status
+        return make_record(values)
+
+    return build
+
+
+def compile_homeworks_validator(build=None):
+    """Собирает проверку ответа homework_statuses в одну функцию.
+
+    Функция проходит по списку работ один раз и возвращает
+    (current_date, записи). Ошибки структуры те же, что у check_response.
+    """
+    build = compile_homework_builder() if build is None else build
+
+    def validate(response):
+        if not isinstance(response, dict):
+            raise TypeError('Ошибка в типе ответа API')
+        if 'homeworks' not in response:
+            raise KeyError('Нет ключа в ответе API')
+        homeworks = response['homeworks']
+        if not isinstance(homeworks, list):
+            raise TypeError('Проверка ответа API списка')
+        return response.get('current_date'), list(map(build, homeworks))
+
+    return validate
+
+
+_builders = {
+    strict: compile_homework_builder(strict=strict) for strict in (True, False)
+}
+_validators = {
+    strict: compile_homeworks_validator(build)
+    for strict, build in _builders.items()
+}
+
+
+@instrumented
+def validate_homework_statuses(response, strict=True):
+    """Проверяет ответ API, возвращает (current_date, записи работ)."""
+    return _validators[strict](response)
+
+
+def validate_homework_stream(homeworks, strict=True):
+    """Записи работ из потока словарей, по одной по мере чтения."""
+    return instrumented_iter(
+        map(_builders[strict], homeworks), 'validate_homework_stream'
+    )
+
+
+def changed_records(records, last_statuses):
+    """Записи, чей статус отличается от последнего известного, по дате."""
+    changed = [
+        record for record in records
+        if last_statuses.get(record.homework_name) != record.status
+    ]
+    changed.sort(key=lambda record: record.date_updated or '')
+    return changed